@@ -0,0 +1,283 @@
+"""
+This is the sprite atlas exporter.
+It renders frames of an animation, trims them to their content,
+removes duplicated frames and packs the rest into power-of-two pages.
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import numpy_raster
+import raster
+from bounds import pose_bounds
+from model import LOOP
+from settings import ProjectSettings
+
+
+class MaxRectsPacker:
+    """
+    MaxRects bin packer with "best short side fit" heuristic.
+    Keeps the list of maximal free rectangles of one page.
+    >>> packer = MaxRectsPacker(4, 4)
+    >>> packer.insert(4, 2)
+    (0, 0)
+    >>> packer.insert(2, 2)
+    (0, 2)
+    >>> packer.insert(2, 2)
+    (2, 2)
+    >>> packer.insert(1, 1)
+    >>> packer.used_size
+    (4, 4)
+    """
+    def __init__(self, width: int, height: int):
+        """
+        :param width: width of the page
+        :param height: height of the page
+        >>> MaxRectsPacker(8, 8).used_size
+        (0, 0)
+        """
+        self.__free = [(0, 0, width, height)]
+        self.__used_width = 0
+        self.__used_height = 0
+
+    @property
+    def used_size(self):
+        """
+        :return: (width, height) of the box which contains all packed rectangles
+        """
+        return self.__used_width, self.__used_height
+
+    def insert(self, width: int, height: int):
+        """
+        Places a rectangle on the page.
+        :param width: width of the rectangle
+        :param height: height of the rectangle
+        :return: (x, y) of the placed rectangle or None if it does not fit into the page
+        """
+        best, best_score = None, None
+        for x, y, free_width, free_height in self.__free:
+            if width <= free_width and height <= free_height:
+                score = (min(free_width - width, free_height - height), max(free_width - width, free_height - height))
+                if best_score is None or score < best_score:
+                    best, best_score = (x, y), score
+        if best is None:
+            return None
+
+        placed = (best[0], best[1], width, height)
+        free = list()
+        for rect in self.__free:
+            free.extend(self.__split(rect, placed))
+        self.__free = [
+            rect for i, rect in enumerate(free)
+            if not any(
+                j != i and self.__contains(other, rect) and (other != rect or j < i) for j, other in enumerate(free)
+            )
+        ]
+        self.__used_width = max(self.__used_width, best[0] + width)
+        self.__used_height = max(self.__used_height, best[1] + height)
+        return best
+
+    @staticmethod
+    def __contains(outer, inner):
+        return (outer[0] <= inner[0] and outer[1] <= inner[1] and
+                inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3])
+
+    @staticmethod
+    def __split(free, used):
+        """
+        :return: parts of the free rectangle which are not covered by the used one
+        """
+        fx, fy, fw, fh = free
+        ux, uy, uw, uh = used
+        if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+            return [free]
+        parts = list()
+        if ux > fx:
+            parts.append((fx, fy, ux - fx, fh))
+        if ux + uw < fx + fw:
+            parts.append((ux + uw, fy, fx + fw - ux - uw, fh))
+        if uy > fy:
+            parts.append((fx, fy, fw, uy - fy))
+        if uy + uh < fy + fh:
+            parts.append((fx, uy + uh, fw, fy + fh - uy - uh))
+        return parts
+
+
+def next_power_of_two(value: int):
+    """
+    >>> [next_power_of_two(v) for v in (0, 1, 5, 64, 65)]
+    [1, 1, 8, 64, 128]
+    """
+    result = 1
+    while result < value:
+        result *= 2
+    return result
+
+
+def sample_times(animation, fps: int):
+    """
+    Samples the animation the same way as the editor plays it:
+    states with transitions between them and the pause before the loop starts again.
+    :param animation: Animation to sample
+    :param fps: number of frames per second
+    :return: list with time in seconds of every frame
+    >>> from model import Animation, Skeleton, SkeletonState
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> animation = Animation(skeleton, 'Dancing')
+    >>> animation.add_state(SkeletonState(skeleton))
+    >>> animation.add_state(SkeletonState(skeleton), 0.5)
+    >>> sample_times(animation, 4)
+    [0.0, 0.25, 0.5, 0.75, 1.0, 1.25]
+    """
+    if not animation.number_of_states:
+        return list()
+    return [frame / fps for frame in range(int(math.ceil(animation.loop_duration * fps - 1e-9)))]
+
+
+def pack_rects(sizes: list, max_page_size: int):
+    """
+    Packs rectangles into as few pages as possible.
+    Each page is shrunk to the smallest power-of-two size which still holds its rectangles.
+    :param sizes: list of (width, height) of the rectangles
+    :param max_page_size: maximal width and height of the page
+    :return: tuple (placements, page_sizes), placement of every rectangle is (page, x, y)
+    >>> pack_rects([(30, 30), (30, 30), (60, 10)], 64)
+    ([(0, 0, 0), (0, 30, 0), (0, 0, 30)], [(64, 64)])
+    >>> pack_rects([(40, 40), (40, 40)], 64)[1]
+    [(64, 64), (64, 64)]
+    >>> pack_rects([(80, 10)], 64)
+    Traceback (most recent call last):
+    ...
+    ValueError: Rectangle 80x10 does not fit into atlas page 64x64.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (sizes[i][1], sizes[i][0]), reverse=True)
+    for i in order:
+        if sizes[i][0] > max_page_size or sizes[i][1] > max_page_size:
+            raise ValueError('Rectangle {}x{} does not fit into atlas page {}x{}.'.format(
+                sizes[i][0], sizes[i][1], max_page_size, max_page_size
+            ))
+
+    pages = list()
+    for i in order:
+        for page in pages:
+            if page[0].insert(*sizes[i]):
+                page[1].append(i)
+                break
+        else:
+            pages.append((MaxRectsPacker(max_page_size, max_page_size), [i]))
+            pages[-1][0].insert(*sizes[i])
+
+    candidates = list()
+    side = 1
+    while side <= max_page_size:
+        candidates.append(side)
+        side *= 2
+    candidates = sorted(((w, h) for w in candidates for h in candidates), key=lambda s: (s[0] * s[1], max(s)))
+
+    placements, page_sizes = [None] * len(sizes), list()
+    for _, rects in pages:
+        for width, height in candidates:
+            if width * height < sum(sizes[i][0] * sizes[i][1] for i in rects):
+                continue
+            packer = MaxRectsPacker(width, height)
+            positions = [packer.insert(*sizes[i]) for i in rects]
+            if all(positions):
+                break
+        for i, position in zip(rects, positions):
+            placements[i] = (len(page_sizes), position[0], position[1])
+        page_sizes.append((width, height))
+    return placements, page_sizes
+
+
+class Sprite:
+    """Trimmed unique image of one or several frames."""
+    def __init__(self, frame: raster.FrameBuffer):
+        self.frame = frame
+        self.page = None
+        self.position = None
+
+
+def export_atlas(animation, path_to_dir, fps=ProjectSettings.atlas_fps,
+                 max_page_size=ProjectSettings.atlas_max_page_size, padding=ProjectSettings.atlas_padding):
+    """
+    Exports an animation into the sprite atlas.
+    Equal poses are rendered once and equal images are stored once.
+    Creates pages "{name}_atlas_{page}.png" and index "{name}_atlas.json" inside the directory.
+    Index maps every frame to the sprite, the offset of its top left corner and the bounding box of the skeleton
+    (left, top, right, bottom) in the model coordinates, see bounds.pose_bounds().
+    :param animation: Animation to export
+    :param path_to_dir: directory where atlas is going to be saved
+    :param fps: number of sampled frames per second
+    :param max_page_size: maximal width and height of the page
+    :param padding: number of empty pixels between sprites
+    :return: index of the atlas as dictionary
+    >>> import tempfile
+    >>> from model import Project
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     index = export_atlas(project.get_animation('Sertaki'), path, fps=10)
+    ...     sorted(os.listdir(path))
+    ['Sertaki_atlas.json', 'Sertaki_atlas_0.png']
+    >>> len(index['frames']), len(index['sprites']), index['pages'][0]['size']
+    (16, 7, [512, 1024])
+    >>> index['frames'][0]
+    {'sprite': 0, 'offset': [73, 20], 'bounds': [72.552, 19.5, 227.515, 318.426]}
+    """
+    rendered = dict()
+    sprites = list()
+    sprite_by_hash = dict()
+    frames = list()
+    poses = list()
+
+    for time_point in sample_times(animation, fps):
+        skeleton = animation.pose_at(time_point, LOOP)
+        bones = skeleton.to_dict()['bones']
+        poses.append(bones)
+        pose = json.dumps(bones)
+        if pose not in rendered:
+            frame, origin = numpy_raster.render_skeleton(skeleton)
+            bounds = frame.content_bounds() or (0, 0, 0, 0)
+            frame = frame.crop(*bounds)
+            digest = hashlib.sha1(str(frame.size).encode() + bytes(frame.pixels)).digest()
+            if digest not in sprite_by_hash:
+                sprite_by_hash[digest] = len(sprites)
+                sprites.append(Sprite(frame))
+            rendered[pose] = dict(
+                sprite=sprite_by_hash[digest],
+                offset=[origin[0] + bounds[0], origin[1] + bounds[1]],
+            )
+        frames.append(rendered[pose])
+
+    if poses and poses[0]:
+        skeleton_boxes, _ = pose_bounds(poses)
+        frames = [dict(frame, bounds=[round(value, 3) for value in box])
+                  for frame, box in zip(frames, skeleton_boxes.tolist())]
+
+    placements, page_sizes = pack_rects(
+        [(sprite.frame.width + padding, sprite.frame.height + padding) for sprite in sprites], max_page_size
+    )
+    pages = [raster.FrameBuffer(*size) for size in page_sizes]
+    for sprite, (page, x, y) in zip(sprites, placements):
+        sprite.page, sprite.position = page, (x, y)
+        pages[page].paste(sprite.frame, x, y)
+
+    index = dict(
+        animation=animation.name,
+        fps=fps,
+        pages=list(),
+        sprites=[
+            dict(page=s.page, rect=[s.position[0], s.position[1], s.frame.width, s.frame.height]) for s in sprites
+        ],
+        frames=frames,
+    )
+    for i, page in enumerate(pages):
+        filename = '{}_atlas_{}.png'.format(animation.name, i)
+        page.save_png(os.path.join(path_to_dir, filename))
+        index['pages'].append(dict(file=filename, size=[page.width, page.height]))
+
+    with open(os.path.join(path_to_dir, '{}_atlas.json'.format(animation.name)), 'w') as file:
+        json.dump(index, file, indent=2)
+    return index
@@ -0,0 +1,277 @@
+"""
+This is the crash-safe autosave.
+Every applied or reverted command is appended to a journal by a background thread.
+The thread replays the journal on its own copy of the project and saves that copy
+as a checkpoint from time to time, so the GUI thread never writes the project itself.
+After a crash the project is restored from the last checkpoint and the journal after it.
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+from command import apply_record
+from model import Project
+from settings import ProjectSettings
+from watcher import ProjectWatcher
+
+CHECKPOINT_DIR = 'checkpoint'
+OLD_CHECKPOINT_DIR = 'checkpoint.old'
+NEW_CHECKPOINT_DIR = 'checkpoint.new'
+META_FILE = 'meta.json'
+JOURNAL_FILE = 'journal'
+CLEAN_FILE = 'clean'
+
+
+class Autosave:
+    """
+    Journal of the commands with periodic checkpoints.
+    >>> import tempfile
+    >>> from command import CommandList, AddSkeletonCommand, SelectCommand, AddBoneCommand
+    >>> from model import Skeleton, CircleBone
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     project = Project()
+    ...     command_list = CommandList(project)
+    ...     autosave = Autosave(project, path, interval=3600)
+    ...     command_list.journal = autosave
+    ...     autosave.start()
+    ...     command_list.add_command(AddSkeletonCommand(Skeleton(name='Vasiliy')))
+    ...     command_list.add_command(SelectCommand(project.get_skeleton(0)))
+    ...     command_list.add_command(AddBoneCommand(CircleBone(10, (0, 0), name='Head')))
+    ...     command_list.undo()
+    ...     command_list.redo()
+    ...     autosave.stop()
+    ...     needs_recovery(path)
+    ...     recovered = Project()
+    ...     recover(recovered, path)
+    ...     recovered.get_skeleton(0).to_dict()['bones'][0]['radius'], recovered.address_of(recovered.active_element)
+    True
+    5
+    (10, ['skeleton', 0])
+
+    stop() does not have to block the GUI thread: the thread finishes the journal while the caller polls running,
+    the next session waits for the previous one in its own thread.
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     project = Project()
+    ...     first = Autosave(project, path, interval=3600)
+    ...     first.start()
+    ...     first.stop(wait=False)
+    ...     second = Autosave(project, path, interval=3600)
+    ...     second.start(previous=first)
+    ...     second.stop(clean=True, wait=False)
+    ...     second.wait(timeout=10), first.running, needs_recovery(path)
+    (True, False, False)
+    """
+    def __init__(self, project, path_to_autosave_dir=ProjectSettings.autosave_dir,
+                 interval=ProjectSettings.autosave_interval):
+        """
+        :param project: Project which commands are journaled
+        :param path_to_autosave_dir: directory for the journal and the checkpoint
+        :param interval: seconds between checkpoints
+        """
+        self.__project = project
+        self.__path = path_to_autosave_dir
+        self.__interval = interval
+        self.__queue = queue.Queue()
+        self.__thread = None
+
+    def start(self, recovered=False, previous=None):
+        """
+        Starts a new session, previous journal and checkpoint are replaced.
+        :param recovered: the project was restored by recover() from the directory of the autosave,
+        otherwise it should be the same as the project saved in its path or empty
+        :param previous: stopped Autosave of the same directory, the new session waits in its thread
+        until the previous one writes the rest of its journal
+        """
+        os.makedirs(self.__path, exist_ok=True)
+        self.__thread = threading.Thread(
+            target=self.__work, args=(recovered, self.__project.path, previous), daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self, clean=False, wait=True):
+        """
+        Writes the rest of the journal and stops the thread, the journal is kept for recovery.
+        :param clean: the session is finished by the user, so it should not be offered for recovery
+        :param wait: wait until the thread is finished, otherwise the GUI thread can poll running
+        """
+        if self.__thread is not None:
+            self.__queue.put(('stop', clean))
+            if wait:
+                self.wait()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the stopped thread writes the rest of the journal.
+        :param timeout: seconds to wait, the call waits until the thread is finished if it is None
+        :return: True if the thread is finished
+        """
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        return not self.running
+
+    @property
+    def running(self):
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def record(self, command, reverted: bool):
+        """
+        Journals the command, called by CommandList after the command is applied or reverted.
+        Only the record of the command is made here, addresses of elements are cached by Project.address_of(),
+        the record is encoded and written by the background thread.
+        """
+        record = command.journal_record(self.__project, reverted)
+        if record.get('target', ['project']) is not None:
+            self.__queue.put(('record', record))
+
+    def reloaded(self):
+        """
+        Tells that files of the project were reloaded by ProjectWatcher.
+        """
+        self.__queue.put(('reload', None))
+
+    def saved(self, path_to_project_dir):
+        """
+        Tells that the project was saved to the directory.
+        """
+        self.__queue.put(('path', path_to_project_dir))
+
+    def __work(self, recovered, path_to_project_dir, previous):
+        if previous is not None:
+            previous.wait()
+        # skeletons of the library are copied, so the thread never changes objects of the GUI thread
+        shadow = Project(shared_skeletons=False)
+        if recovered:
+            recover(shadow, self.__path)
+        elif path_to_project_dir:
+            shadow.load(path_to_project_dir)
+        shadow.path = path_to_project_dir
+        watcher = ProjectWatcher(shadow) if path_to_project_dir else None
+
+        sequence = checkpoint_sequence = 0
+        write_checkpoint(shadow, self.__path, sequence)
+        journal = open(os.path.join(self.__path, JOURNAL_FILE), 'w')
+        next_checkpoint = time.monotonic() + self.__interval
+        while True:
+            try:
+                kind, value = self.__queue.get(timeout=max(next_checkpoint - time.monotonic(), 0))
+            except queue.Empty:
+                kind, value = 'checkpoint', None
+
+            force_checkpoint = False
+            while kind == 'record':
+                sequence += 1
+                value = json.dumps(value)
+                journal.write('{}\t{}\n'.format(sequence, value))
+                # the record is replayed as it is read from the journal by recover()
+                apply_record(shadow, json.loads(value))
+                try:
+                    kind, value = self.__queue.get_nowait()
+                except queue.Empty:
+                    kind, value = None, None
+            journal.flush()
+            os.fsync(journal.fileno())
+
+            if kind == 'reload' and watcher:
+                watcher.poll()
+                force_checkpoint = True
+            elif kind == 'path':
+                shadow.path = value
+                watcher = ProjectWatcher(shadow)
+                force_checkpoint = True
+
+            if kind == 'stop':
+                journal.close()
+                if value:
+                    open(os.path.join(self.__path, CLEAN_FILE), 'w').close()
+                return
+            if force_checkpoint or time.monotonic() >= next_checkpoint:
+                if sequence != checkpoint_sequence or force_checkpoint:
+                    write_checkpoint(shadow, self.__path, sequence)
+                    checkpoint_sequence = sequence
+                    journal.close()
+                    journal = open(os.path.join(self.__path, JOURNAL_FILE), 'w')
+                next_checkpoint = time.monotonic() + self.__interval
+
+
+def write_checkpoint(project, path_to_autosave_dir, sequence: int):
+    """
+    Saves the project next to the previous checkpoint and replaces it, so one of them is always complete.
+    :param project: Project to save
+    :param path_to_autosave_dir: directory of the autosave
+    :param sequence: number of the last journal record which is included into the checkpoint
+    """
+    new_dir = os.path.join(path_to_autosave_dir, NEW_CHECKPOINT_DIR)
+    current_dir = os.path.join(path_to_autosave_dir, CHECKPOINT_DIR)
+    old_dir = os.path.join(path_to_autosave_dir, OLD_CHECKPOINT_DIR)
+    clean_file = os.path.join(path_to_autosave_dir, CLEAN_FILE)
+
+    path_to_project_dir = project.path
+    # changed skeletons of the library are kept in the checkpoint, only the user publishes them
+    project.save(new_dir, publish=False)
+    project.path = path_to_project_dir
+    with open(os.path.join(new_dir, META_FILE), 'w') as file:
+        json.dump(dict(
+            sequence=sequence,
+            active=project.address_of(project.active_element),
+            path=path_to_project_dir,
+        ), file)
+    if os.path.exists(clean_file):
+        os.remove(clean_file)
+    if os.path.exists(current_dir):
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir)
+        os.rename(current_dir, old_dir)
+    os.rename(new_dir, current_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+
+def needs_recovery(path_to_autosave_dir=ProjectSettings.autosave_dir):
+    """
+    :return: True if the directory has a checkpoint of the session which was not finished by the user
+    """
+    return not os.path.exists(os.path.join(path_to_autosave_dir, CLEAN_FILE)) and any(
+        os.path.exists(os.path.join(path_to_autosave_dir, name, META_FILE))
+        for name in (CHECKPOINT_DIR, OLD_CHECKPOINT_DIR)
+    )
+
+
+def recover(project, path_to_autosave_dir=ProjectSettings.autosave_dir):
+    """
+    Loads the last checkpoint into the empty project and replays the journal after it.
+    The last line of the journal is skipped if it was not written completely.
+    :param project: empty Project
+    :param path_to_autosave_dir: directory of the autosave
+    :return: number of replayed records
+    """
+    for name in (CHECKPOINT_DIR, OLD_CHECKPOINT_DIR):
+        checkpoint_dir = os.path.join(path_to_autosave_dir, name)
+        if os.path.exists(os.path.join(checkpoint_dir, META_FILE)):
+            break
+    else:
+        raise FileNotFoundError('Autosave was not found in "{}".'.format(path_to_autosave_dir))
+
+    with open(os.path.join(checkpoint_dir, META_FILE)) as file:
+        meta = json.load(file)
+    project.load(checkpoint_dir)
+    project.active_element = project.element_at(meta['active']) or project
+
+    replayed = 0
+    journal_path = os.path.join(path_to_autosave_dir, JOURNAL_FILE)
+    if os.path.exists(journal_path):
+        with open(journal_path) as file:
+            for line in file:
+                sequence, _, data = line.partition('\t')
+                try:
+                    sequence, record = int(sequence), json.loads(data)
+                except ValueError:
+                    break
+                if sequence > meta['sequence']:
+                    apply_record(project, record)
+                    replayed += 1
+    project.path = meta['path']
+    return replayed
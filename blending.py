@@ -0,0 +1,231 @@
+"""
+This is the module with layered animation blending.
+Several animations are played on one skeleton at once, every layer
+overrides bone parameters of the layers below with its weight and bone mask.
+"""
+
+from model import bone_from_dict, LOOP
+
+
+class AnimationLayer:
+    """
+    Animation played with weight, bone mask, speed and time offset.
+    >>> from model import Animation
+    >>> layer = AnimationLayer(Animation(name='Waving'), 0.5, mask={'Arm': 1.0})
+    >>> layer.to_dict()
+    {'animation': 'Waving', 'weight': 0.5, 'mask': {'Arm': 1.0}, 'speed': 1.0, 'offset': 0.0}
+    """
+    def __init__(self, animation, weight=1.0, mask=None, speed=1.0, offset=0.0):
+        """
+        :param animation: Animation of the layer
+        :param weight: weight of the layer from 0 to 1
+        :param mask: dictionary with weights of the bones by their names, all bones are used with weight 1 if it is None
+        :param speed: playback rate of the layer
+        :param offset: time in seconds which is added to the time of the layer
+        """
+        self.animation = animation
+        self.weight = weight
+        self.mask = mask
+        self.speed = speed
+        self.offset = offset
+
+    def bone_weight(self, name: str):
+        """
+        :return: weight of the bone in the layer
+        >>> from model import Animation
+        >>> layer = AnimationLayer(Animation(name='Waving'), 0.5, mask={'Arm': 0.5})
+        >>> layer.bone_weight('Arm'), layer.bone_weight('Leg')
+        (0.25, 0.0)
+        """
+        if self.mask is None:
+            return self.weight
+        return self.weight * self.mask.get(name, 0.0)
+
+    def to_dict(self):
+        return dict(
+            animation=self.animation.name,
+            weight=self.weight,
+            mask=self.mask,
+            speed=self.speed,
+            offset=self.offset,
+        )
+
+
+class LayeredAnimation:
+    """
+    Stack of animation layers over the rest pose of the skeleton.
+    Bones of layers are matched with bones of the skeleton by names.
+    Bone parameters are flattened into channels, weights of every channel are computed
+    when layers are changed, so a frame is a single weighted pass over all channels.
+    >>> from model import Animation, Skeleton, SkeletonState, SegmentBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(SegmentBone(10, 0, (0, 0), name='Leg'))
+    >>> skeleton.add_bone(SegmentBone(10, 0, (0, 0), name='Arm'))
+    >>> walk = Animation(skeleton, 'Walking')
+    >>> walk.add_state(SkeletonState(skeleton, {0: dict(rotation=0), 1: dict(rotation=0)}))
+    >>> walk.add_state(SkeletonState(skeleton, {0: dict(rotation=1), 1: dict(rotation=1)}), 1.0)
+    >>> wave = Animation(skeleton, 'Waving')
+    >>> wave.add_state(SkeletonState(skeleton, [dict(), dict(rotation=-1)]))
+    >>> variant = LayeredAnimation(skeleton, [AnimationLayer(walk), AnimationLayer(wave, 0.5, mask={'Arm': 1})])
+    >>> [bone['rotation'] for bone in variant.pose_at(1.0).to_dict()['bones']]
+    [1.0, 0.0]
+    >>> [bone['rotation'] for bone in variant.pose_at(0.5).to_dict()['bones']]
+    [0.5, -0.25]
+    >>> variant.to_dict()['layers'][1]
+    {'animation': 'Waving', 'weight': 0.5, 'mask': {'Arm': 1}, 'speed': 1.0, 'offset': 0.0}
+    """
+    def __init__(self, skeleton, layers=None):
+        """
+        :param skeleton: Skeleton which rest pose is used where layers have no weight
+        :param layers: list of AnimationLayer from the bottom to the top
+        """
+        self.__skeleton = skeleton
+        self.__layers = list()
+        self.__layout = list()
+        self.__rest = list()
+        self.__weights = list()
+        self.__sources = list()
+        for layer in layers or list():
+            self.__layers.append(layer)
+        self.update_layers()
+
+    @property
+    def skeleton(self):
+        return self.__skeleton
+
+    @property
+    def layers(self):
+        return tuple(self.__layers)
+
+    def add_layer(self, layer: AnimationLayer):
+        """
+        :param layer: layer to put on the top of the stack
+        """
+        self.__layers.append(layer)
+        self.update_layers()
+
+    def remove_layer(self, idx: int):
+        """
+        :param idx: index of the layer to remove
+        """
+        self.__layers.pop(idx)
+        self.update_layers()
+
+    def update_layers(self):
+        """
+        Recomputes channel weights. Should be called after weights or masks of the layers are changed.
+        """
+        params = [self.__skeleton.get_bone(i).to_dict() for i in range(self.__skeleton.number_of_bones)]
+        self.__layout = [(bone, key) for bone in range(len(params)) for key in channel_keys(params[bone])]
+        self.__rest = flatten(params, self.__layout)
+        names = [bone.get('name') for bone in params]
+        self.__weights = list()
+        self.__sources = list()
+        for layer in self.__layers:
+            skeleton = layer.animation.pose_at(0)
+            layer_bones = {skeleton.get_bone(i).name: i for i in range(skeleton.number_of_bones)} if skeleton else {}
+            bone_weights = [layer.bone_weight(name) if name in layer_bones else 0.0 for name in names]
+            self.__weights.append([bone_weights[bone] for bone, _ in self.__layout])
+            self.__sources.append([layer_bones.get(name) for name in names])
+
+    def pose_at(self, time_point: float):
+        """
+        Evaluates all layers and blends them.
+        Time of each layer is looped over the playback loop of its animation.
+        :param time_point: time in seconds
+        :return: Skeleton with blended parameters
+        """
+        values = list(self.__rest)
+        for layer, weights, sources in zip(self.__layers, self.__weights, self.__sources):
+            if not layer.animation.number_of_states or not any(weights):
+                continue
+            skeleton = layer.animation.pose_at(time_point * layer.speed + layer.offset, LOOP)
+            params = [
+                skeleton.get_bone(source).to_dict() if source is not None else None
+                for source in sources
+            ]
+            layer_values = flatten(params, self.__layout, self.__rest)
+            values = [value + (other - value) * weight for value, other, weight in zip(values, layer_values, weights)]
+        return unflatten(self.__skeleton, self.__layout, values)
+
+    def to_dict(self):
+        """
+        :return: description of the blend which refers animations by their names
+        """
+        return dict(
+            skeleton_name=self.__skeleton.name,
+            layers=[layer.to_dict() for layer in self.__layers],
+        )
+
+    @staticmethod
+    def from_dict(project, data: dict):
+        """
+        Restores the blend described by to_dict().
+        :param project: Project with the skeleton and the animations
+        :param data: result of to_dict()
+        :return: LayeredAnimation
+        """
+        return LayeredAnimation(project.get_skeleton(data['skeleton_name']), [
+            AnimationLayer(
+                project.get_animation(layer['animation']),
+                layer['weight'], layer['mask'], layer['speed'], layer['offset']
+            )
+            for layer in data['layers']
+        ])
+
+
+def channel_keys(params: dict):
+    """
+    :param params: dictionary with attributes of the bone, see Bone.to_dict()
+    :return: list of (parameter, component) for every number in the parameters, component is None for scalars
+    >>> channel_keys({'position': (0, 0), 'thickness': 1.0, 'name': 'Leg', 'type': 'CIRCLE', 'radius': 2})
+    [('position', 0), ('position', 1), ('thickness', None), ('radius', None)]
+    """
+    keys = list()
+    for key, value in params.items():
+        if isinstance(value, (tuple, list)):
+            keys.extend((key, i) for i in range(len(value)))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            keys.append((key, None))
+    return keys
+
+
+def flatten(params: list, layout: list, default=None):
+    """
+    :param params: list with dictionaries of the bones, None for missing bones
+    :param layout: list of (bone index, (parameter, component))
+    :param default: values for missing bones and parameters
+    :return: list of floats
+    """
+    values = list()
+    for i, (bone, (key, component)) in enumerate(layout):
+        value = params[bone].get(key) if params[bone] is not None else None
+        if value is None:
+            values.append(default[i])
+        else:
+            values.append(value if component is None else value[component])
+    return values
+
+
+def unflatten(skeleton, layout: list, values: list):
+    """
+    :param skeleton: Skeleton which gives names and types of the bones
+    :param layout: list of (bone index, (parameter, component))
+    :param values: list of floats
+    :return: new Skeleton with the values
+    """
+    params = [skeleton.get_bone(i).to_dict() for i in range(skeleton.number_of_bones)]
+    for (bone, (key, component)), value in zip(layout, values):
+        if component is None:
+            params[bone][key] = value
+        else:
+            if not isinstance(params[bone][key], list):
+                params[bone][key] = list(params[bone][key])
+            params[bone][key][component] = value
+    result = type(skeleton)(name=skeleton.name)
+    for bone in params:
+        if 'color' in bone:
+            bone['color'] = tuple(int(round(c)) for c in bone['color'])
+        bone['position'] = tuple(bone['position'])
+        result.add_bone(bone_from_dict(bone))
+    return result
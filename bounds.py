@@ -0,0 +1,96 @@
+"""
+This is the computation of bounding boxes of animations for the runtime.
+Outlines of the bones in all frames are computed by the kernels of their types at once, see model.pose_shapes(),
+so boxes of the bones and of the skeleton in every frame are a few array operations instead of a loop over bones.
+Boxes are (left, top, right, bottom) in the coordinates of the model and include thickness of the bones.
+"""
+
+import numpy
+
+from model import CLAMP, pose_shapes
+
+
+def shape_boxes(shapes: dict):
+    """
+    :param shapes: outlines of the bones, see model.pose_shapes()
+    :return: array of shape (frames, bones, 4) with boxes of the bones
+    >>> from model import SegmentBone, CircleBone
+    >>> bones = [SegmentBone(10, 1, (3, 4), thickness=2.0), CircleBone(5, (1, 1), thickness=3.0)]
+    >>> boxes = shape_boxes(pose_shapes([[bone.to_dict() for bone in bones]]))
+    >>> numpy.allclose(boxes[0], [bone.compute_bounds() for bone in bones])
+    True
+    """
+    reach = (shapes['radius'] + shapes['thickness'] / 2)[..., None]
+    return numpy.concatenate((
+        numpy.minimum(shapes['start'], shapes['end']) - reach,
+        numpy.maximum(shapes['start'], shapes['end']) + reach,
+    ), axis=-1)
+
+
+def fold_boxes(boxes):
+    """
+    :param boxes: array of shape (frames, bones, 4) with boxes of the bones
+    :return: array of shape (frames, 4) with boxes of the skeleton, None if there are no bones
+    >>> fold_boxes(numpy.array([[[0.0, 0.0, 1.0, 1.0], [-1.0, 0.5, 0.5, 3.0]]])).tolist()
+    [[-1.0, 0.0, 1.0, 3.0]]
+    """
+    if not boxes.shape[1]:
+        return None
+    return numpy.concatenate((boxes[..., :2].min(axis=1), boxes[..., 2:].max(axis=1)), axis=-1)
+
+
+def pose_bounds(poses: list):
+    """
+    :param poses: list with parameters of the bones of every frame, see Bone.to_dict()
+    :return: tuple (boxes of the skeleton of shape (frames, 4), boxes of the bones of shape (frames, bones, 4)),
+    boxes of the skeleton are None if there are no bones, raises ValueError for unknown type of the bone
+    >>> skeleton_boxes, boxes = pose_bounds([
+    ...     [{'position': (0, 0), 'color': (0, 0, 0), 'thickness': 2.0, 'length': 10, 'rotation': 0, 'type': 'SEGMENT'},
+    ...      {'position': (5, 5), 'color': (0, 0, 0), 'thickness': 0.0, 'radius': 2, 'type': 'CIRCLE'}],
+    ... ])
+    >>> skeleton_boxes.tolist(), boxes.shape
+    ([[-1.0, -1.0, 11.0, 7.0]], (1, 2, 4))
+    """
+    boxes = shape_boxes(pose_shapes(poses))
+    return fold_boxes(boxes), boxes
+
+
+def animation_bounds(animation, times, mode=CLAMP):
+    """
+    Samples the animation and computes boxes of every frame.
+    :param animation: Animation with states
+    :param times: time in seconds of every frame
+    :param mode: playback mode, see Animation.pose_at()
+    :return: dictionary with bounds of the skeleton in every frame and bones: identifier, name, hit shape
+    (see Bone.HIT_SHAPE) and bounds in every frame of every bone
+    >>> from model import Project
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> animation = project.get_animation('Sertaki')
+    >>> result = animation_bounds(animation, [0, 0.3])
+    >>> len(result['bounds']), len(result['bones']), len(result['bones'][0]['bounds'])
+    (2, 10, 2)
+    >>> sorted(set(bone['shape'] for bone in result['bones']))
+    ['capsule', 'circle']
+    >>> from raster import skeleton_bounds
+    >>> numpy.allclose(result['bounds'][1], skeleton_bounds(animation.pose_at(0.3)))
+    True
+    """
+    skeletons = [animation.pose_at(time_point, mode) for time_point in times]
+    first = skeletons[0] if skeletons else None
+    bone_count = first.number_of_bones if first else 0
+    skeleton_boxes, boxes = pose_bounds(
+        [[skeleton.get_bone(i).to_dict() for i in range(bone_count)] for skeleton in skeletons]
+    )
+    return dict(
+        bounds=skeleton_boxes.tolist() if skeleton_boxes is not None else [None] * len(times),
+        bones=[
+            dict(
+                id=first.get_bone(i).id,
+                name=first.get_bone(i).name,
+                shape=type(first.get_bone(i)).HIT_SHAPE,
+                bounds=boxes[:, i].tolist(),
+            )
+            for i in range(bone_count)
+        ],
+    )
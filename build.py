@@ -0,0 +1,159 @@
+"""
+This is the incremental export of the whole project.
+Every animation is exported only if the hash of the animation, its skeleton and the export settings
+differs from the one recorded in the manifest of the output directory, so changing one skeleton
+exports again only the animations which use it.
+
+Usage: python build.py PROJECT_DIR OUTPUT_DIR [--formats atlas runtime] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import atlas
+import runtime_export
+from model import Project
+from settings import ProjectSettings
+
+ATLAS, RUNTIME = 'atlas', 'runtime'
+FORMATS = (ATLAS, RUNTIME)
+
+
+def export_settings(formats):
+    """
+    :param formats: names of the exported formats
+    :return: dictionary with settings which change the exported files
+    """
+    settings = dict()
+    if ATLAS in formats:
+        settings[ATLAS] = dict(
+            fps=ProjectSettings.atlas_fps,
+            max_page_size=ProjectSettings.atlas_max_page_size,
+            padding=ProjectSettings.atlas_padding,
+        )
+    if RUNTIME in formats:
+        settings[RUNTIME] = dict(fps=ProjectSettings.runtime_fps, steps=ProjectSettings.runtime_steps)
+    return settings
+
+
+def build_hash(animation, skeleton, settings: dict):
+    """
+    :param animation: Animation to export
+    :param skeleton: Skeleton of the animation or None
+    :param settings: export settings, see export_settings()
+    :return: hex digest of everything the exported files depend on
+    >>> from model import Skeleton, Animation, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> animation = Animation(skeleton, name='Dancing')
+    >>> first = build_hash(animation, skeleton, export_settings(FORMATS))
+    >>> first == build_hash(animation, skeleton, export_settings(FORMATS))
+    True
+    >>> skeleton.add_bone(CircleBone(10, (0, 0)))
+    >>> first == build_hash(animation, skeleton, export_settings(FORMATS))
+    False
+    """
+    data = json.dumps(dict(
+        animation=animation.to_dict(),
+        skeleton=skeleton.to_dict() if skeleton else None,
+        settings=settings,
+    ), sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def export_animation(animation, path_to_output_dir, formats):
+    """
+    :return: list with names of the created files
+    """
+    files = list()
+    if ATLAS in formats:
+        index = atlas.export_atlas(animation, path_to_output_dir)
+        files.append('{}_atlas.json'.format(animation.name))
+        files.extend(page['file'] for page in index['pages'])
+    if RUNTIME in formats:
+        files.append('{}.ska'.format(animation.name))
+        with open(os.path.join(path_to_output_dir, files[-1]), 'wb') as file:
+            file.write(runtime_export.export_animation(animation))
+    return files
+
+
+def build_project(project, path_to_output_dir, formats=FORMATS, force=False):
+    """
+    Exports animations of the project which have been changed since the previous build.
+    :param project: Project to export
+    :param path_to_output_dir: directory with the exported files and the manifest
+    :param formats: names of the exported formats, see FORMATS
+    :param force: export every animation
+    :return: dictionary with sorted names of rebuilt, skipped and removed animations
+    >>> import tempfile
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     build_project(project, path, formats=[RUNTIME])
+    ...     build_project(project, path, formats=[RUNTIME])
+    ...     project.get_skeleton('Vasilich').update_bone(0, dict(length=60))
+    ...     build_project(project, path, formats=[RUNTIME])
+    ...     sorted(os.listdir(path))
+    {'rebuilt': ['Sertaki'], 'skipped': [], 'removed': []}
+    {'rebuilt': [], 'skipped': ['Sertaki'], 'removed': []}
+    {'rebuilt': ['Sertaki'], 'skipped': [], 'removed': []}
+    ['Sertaki.ska', 'build_manifest.json']
+    """
+    os.makedirs(path_to_output_dir, exist_ok=True)
+    manifest_path = os.path.join(path_to_output_dir, ProjectSettings.build_manifest_file)
+    manifest = dict()
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+
+    settings = export_settings(formats)
+    report = dict(rebuilt=list(), skipped=list(), removed=list())
+    names = set()
+    for i in range(project.number_of_animations):
+        animation = project.get_animation(i)
+        if not animation.number_of_states:
+            continue
+        names.add(animation.name)
+        skeleton = project.get_skeleton(animation.skeleton_name) if animation.skeleton_name else None
+        digest = build_hash(animation, skeleton, settings)
+        entry = manifest.get(animation.name)
+        if not force and entry and entry['hash'] == digest and all(
+            os.path.exists(os.path.join(path_to_output_dir, name)) for name in entry['files']
+        ):
+            report['skipped'].append(animation.name)
+            continue
+        files = export_animation(animation, path_to_output_dir, formats)
+        for name in set(entry['files'] if entry else []) - set(files):
+            _remove(os.path.join(path_to_output_dir, name))
+        manifest[animation.name] = dict(hash=digest, files=files)
+        report['rebuilt'].append(animation.name)
+
+    for name in [name for name in manifest if name not in names]:
+        for file_name in manifest.pop(name)['files']:
+            _remove(os.path.join(path_to_output_dir, file_name))
+        report['removed'].append(name)
+
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return {key: sorted(value) for key, value in report.items()}
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export animations of the project which have been changed.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('output', help='path to the output directory')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS), help='exported formats')
+    parser.add_argument('--force', action='store_true', help='export every animation')
+    args = parser.parse_args()
+
+    project = Project()
+    project.load(args.project)
+    report = build_project(project, args.output, args.formats, args.force)
+    for key in ('rebuilt', 'skipped', 'removed'):
+        print('{}: {}'.format(key, ', '.join(report[key]) or '-'))
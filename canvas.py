@@ -1,63 +1,328 @@
-import math
 import tkinter
 
-from model import Skeleton, SegmentBone, CircleBone, Bone, SkeletonState, Animation
+from model import Skeleton, Bone, SkeletonState, Animation, LOOP, draw_bones
+from render_worker import FramePrefetcher
+from settings import ProjectSettings
+
+
+def create_primitive(canvas, primitive, tags):
+    """
+    Creates the item of the drawing primitive of a bone on the canvas.
+    :param canvas: tkinter.Canvas
+    :param primitive: drawing primitive of the bone or None, see Bone.draw_batch()
+    :return: id of the canvas item or None
+    """
+    if primitive is None:
+        return None
+    if primitive[0] == 'point':
+        _, (x, y), color = primitive
+        return canvas.create_oval((x, y, x + 1, y + 1), outline="#{:02x}{:02x}{:02x}".format(*color), tags=tags)
+    kind, start, end, color, width = primitive
+    color = "#{:02x}{:02x}{:02x}".format(*color)
+    if kind == 'line':
+        return canvas.create_line(start + end, fill=color, width=width, tags=tags)
+    if kind == 'circle':
+        return canvas.create_oval(
+            (start[0] - end, start[1] - end, start[0] + end, start[1] + end), outline=color, width=width, tags=tags
+        )
+    raise ValueError('Unknown drawing primitive "{}".'.format(kind))
 
 
 class ResourceViewer(tkinter.Canvas):
     def __init__(self, command_list):
         tkinter.Canvas.__init__(self, background="white")
         self.__command_list = command_list
+        self.__model = None
         self.__animation = None
-        self.current_state = 0
-
-    def __draw_bone(self, bone):
-        if isinstance(bone, SegmentBone):
-            params = bone.to_dict()
-            end_x = params["position"][0] + params["length"] * math.cos(params["rotation"])
-            end_y = params["position"][1] + params["length"] * math.sin(params["rotation"])
-            self.create_line(
-                (params["position"][0], params["position"][1], end_x, end_y),
-                fill="#{:02x}{:02x}{:02x}".format(*params["color"]),
-                width=params["thickness"]
-            )
-        if isinstance(bone, CircleBone):
-            params = bone.to_dict()
-            left = params["position"][0] - params["radius"]
-            right = params["position"][0] + params["radius"]
-            top = params["position"][1] - params["radius"]
-            bottom = params["position"][1] + params["radius"]
-            self.create_oval(
-                (left, top, right, bottom),
-                outline="#{:02x}{:02x}{:02x}".format(*params["color"]),
-                width=params["thickness"]
+        self.__clock = None
+        self.current_time = 0
+        # function which is called with the time of every shown frame of the playing animation
+        self.time_listener = None
+        self.__holding = False
+        self.onion_skin = ProjectSettings.onion_skin_enabled
+        self.level_of_detail = ProjectSettings.lod_enabled
+        # id of the state -> (state, version of the state, geometry version, list of (item, color))
+        self.__ghosts = dict()
+        # screen = model * scale + offset
+        self.__scale = 1.0
+        self.__offset = [0.0, 0.0]
+        self.__geometry_version = 0
+        self.__pan_start = None
+        self.background_rendering = ProjectSettings.background_rendering
+        self.__prefetcher = None
+        # view which the prefetcher renders and the scheduled update of it, see __view_changed()
+        self.__prefetcher_view = None
+        self.__view_update = None
+        # PhotoImage has to be referenced while it is shown
+        self.__image = None
+
+        self.bind("<MouseWheel>", lambda event: self.zoom(1.25 if event.delta > 0 else 0.8, event.x, event.y))
+        self.bind("<Button-4>", lambda event: self.zoom(1.25, event.x, event.y))
+        self.bind("<Button-5>", lambda event: self.zoom(0.8, event.x, event.y))
+        for button in (2, 3):
+            self.bind("<ButtonPress-{}>".format(button), self.__start_pan)
+            self.bind("<B{}-Motion>".format(button), self.__pan)
+        self.bind("<Configure>", lambda event: self.__view_changed())
+        self.bind("<Destroy>", lambda event: self.__stop_prefetcher())
+
+    def zoom(self, factor, x, y):
+        """
+        Scales the view around the point of the canvas.
+        :param factor: change of the scale
+        :param x, y: point of the canvas which stays in place
+        """
+        self.__scale *= factor
+        self.__offset = [x - (x - self.__offset[0]) * factor, y - (y - self.__offset[1]) * factor]
+        self.__geometry_version += 1
+        self.__view_changed()
+
+    def reset_view(self):
+        self.__scale = 1.0
+        self.__offset = [0.0, 0.0]
+        self.__geometry_version += 1
+        self.__view_changed()
+
+    def set_level_of_detail(self, enabled: bool):
+        self.level_of_detail = enabled
+        self.__geometry_version += 1
+        self.__view_changed()
+
+    def set_background_rendering(self, enabled: bool):
+        self.background_rendering = enabled
+        if enabled:
+            self.__start_prefetcher()
+        else:
+            self.__stop_prefetcher()
+        self.redraw()
+
+    def __view(self):
+        """
+        :return: (size, scale, offset, threshold) of the view for the background rendering
+        """
+        return (
+            (max(self.winfo_width(), 1), max(self.winfo_height(), 1)),
+            self.__scale,
+            tuple(self.__offset),
+            ProjectSettings.lod_pixel_threshold if self.level_of_detail else 0,
+        )
+
+    def __view_changed(self, ghosts=True):
+        """
+        Draws the view again at once and passes it to the background rendering
+        when it has not been changed for ProjectSettings.prefetch_view_delay, so panning and zooming
+        do not make the worker start again on every event.
+        """
+        self.redraw(ghosts)
+        if self.__prefetcher:
+            if self.__view_update:
+                self.after_cancel(self.__view_update)
+            self.__view_update = self.after(ProjectSettings.prefetch_view_delay, self.__update_prefetcher)
+
+    def __update_prefetcher(self, start_time=None):
+        """
+        Passes the current view to the background rendering if the view or the start time is changed.
+        :param start_time: time of the next frame, the current time is used if it is None
+        """
+        self.__view_update = None
+        view = self.__view()
+        if self.__prefetcher and (view != self.__prefetcher_view or start_time is not None):
+            size, scale, offset, threshold = view
+            self.__prefetcher.set_view(
+                size, scale, offset, self.current_time if start_time is None else start_time, threshold
             )
+            self.__prefetcher_view = view
 
-    def __draw_skeleton(self, skeleton):
-        for i in range(skeleton.number_of_bones):
-            self.__draw_bone(skeleton.get_bone(i))
+    def __stop_prefetcher(self):
+        if self.__view_update:
+            self.after_cancel(self.__view_update)
+            self.__view_update = None
+        if self.__prefetcher:
+            self.__prefetcher.stop(wait=False)
+            self.__prefetcher = None
 
-    def __draw_skeleton(self, skeleton):
-        for i in range(skeleton.number_of_bones):
-            self.__draw_bone(skeleton.get_bone(i))
+    def __start_prefetcher(self):
+        """
+        Starts rendering of the playing animation in the background from the current time with the current view.
+        The prefetcher plays a copy of the animation, so it is started again only when the model is changed,
+        changes of the view are passed to it, see __update_prefetcher().
+        """
+        self.__stop_prefetcher()
+        if self.background_rendering and self.__animation and self.__animation.number_of_states:
+            self.__prefetcher_view = self.__view()
+            size, scale, offset, threshold = self.__prefetcher_view
+            self.__prefetcher = FramePrefetcher(self.__animation, size, scale, offset, self.current_time,
+                                                threshold=threshold)
+            self.__prefetcher.start()
 
-    def on_model_changed(self, model):
-        self.delete("all")
-        self.__animation = None
+    def __start_pan(self, event):
+        self.__pan_start = (event.x, event.y)
+
+    def __pan(self, event):
+        dx, dy = event.x - self.__pan_start[0], event.y - self.__pan_start[1]
+        self.__pan_start = (event.x, event.y)
+        self.__offset = [self.__offset[0] + dx, self.__offset[1] + dy]
+        self.move("ghost", dx, dy)
+        self.__view_changed(ghosts=False)
+
+    def __viewport(self):
+        """
+        :return: visible part of the model as (left, top, right, bottom)
+        """
+        return (
+            -self.__offset[0] / self.__scale,
+            -self.__offset[1] / self.__scale,
+            (self.winfo_width() - self.__offset[0]) / self.__scale,
+            (self.winfo_height() - self.__offset[1]) / self.__scale,
+        )
+
+    def __draw_bones(self, bones, tags="frame", viewport=None):
+        """
+        Draws the bones in the coordinates of the view, the kernel of every type of bones is called once.
+        Bones outside of the viewport are skipped, in level of detail mode
+        small segments are skipped and small circles are drawn as points.
+        :return: list with id of the canvas item or None if the bone is not drawn for every bone
+        """
+        visible = list()
+        for idx, bone in enumerate(bones):
+            left, top, right, bottom = bone.bounds
+            if not viewport or not (
+                right < viewport[0] or left > viewport[2] or bottom < viewport[1] or top > viewport[3]
+            ):
+                visible.append(idx)
+        threshold = ProjectSettings.lod_pixel_threshold if self.level_of_detail else 0
+        primitives = draw_bones([bones[idx] for idx in visible], self.__scale, self.__offset, threshold)
+        items = [None] * len(bones)
+        for idx, primitive in zip(visible, primitives):
+            items[idx] = create_primitive(self, primitive, tags)
+        return items
+
+    def __draw_skeleton(self, skeleton, tags="frame", viewport=None):
+        return self.__draw_bones([skeleton.get_bone(i) for i in range(skeleton.number_of_bones)], tags, viewport)
+
+    def __draw_ghosts(self, model):
+        """
+        Shows neighbour states of the active state in fading colors.
+        Items of every ghost are kept on the canvas and redrawn only when its state, zoom or level of detail is changed,
+        other ghosts are just recolored, shown or hidden.
+        """
+        found = model.find_state(model.active_element) if self.onion_skin else None
+        visible = dict()
+        # ghosts of other states of the same animation are kept hidden, other ghosts are removed
+        states = set()
+        if found:
+            animation, idx = found
+            depth = ProjectSettings.onion_skin_frames
+            for distance in range(-depth, depth + 1):
+                if distance and 0 <= idx + distance < animation.number_of_states:
+                    visible[id(animation.get_state(idx + distance))] = (animation.get_state(idx + distance), distance)
+            states = {id(animation.get_state(i)) for i in range(animation.number_of_states)}
+        for key in [key for key in self.__ghosts if key not in states]:
+            self.delete("ghost_{}".format(key))
+            del self.__ghosts[key]
+
+        for key, (state, distance) in visible.items():
+            cached = self.__ghosts.get(key)
+            if not cached or cached[:3] != (state, state.version, self.__geometry_version):
+                tag = "ghost_{}".format(key)
+                self.delete(tag)
+                skeleton = state.get_skeleton()
+                items = self.__draw_skeleton(skeleton, ("ghost", tag))
+                colors = [skeleton.get_bone(i).color for i in range(skeleton.number_of_bones)]
+                self.__ghosts[key] = (
+                    state, state.version, self.__geometry_version,
+                    [(item, color) for item, color in zip(items, colors) if item is not None]
+                )
+
+            tint = ProjectSettings.onion_skin_previous_color if distance < 0 else ProjectSettings.onion_skin_next_color
+            fade = 1 - abs(distance) / (ProjectSettings.onion_skin_frames + 1)
+            for item, color in self.__ghosts[key][3]:
+                ghost_color = "#{:02x}{:02x}{:02x}".format(*(
+                    int(255 + ((c + t) / 2 - 255) * fade) for c, t in zip(color, tint)
+                ))
+                option = "outline" if self.type(item) == "oval" else "fill"
+                self.itemconfigure(item, {option: ghost_color, "state": "normal"})
+
+        for key in self.__ghosts:
+            if key not in visible:
+                self.itemconfigure("ghost_{}".format(key), state="hidden")
+        self.tag_lower("ghost")
+
+    def redraw(self, ghosts=True):
+        """
+        Draws the active element of the model again, for example after the view is changed.
+        Playing animation is drawn by update_clock().
+        :param ghosts: update onion skin too
+        """
+        if not self.__model:
+            return
+        model = self.__model
+        self.delete("frame")
+        if ghosts:
+            self.__draw_ghosts(model)
+        viewport = self.__viewport()
         if isinstance(model.active_element, Skeleton):
-            self.__draw_skeleton(model.active_element)
+            self.__draw_skeleton(model.active_element, viewport=viewport)
         elif isinstance(model.active_element, Bone):
-            self.__draw_bone(model.active_element)
+            self.__draw_bones([model.active_element], viewport=viewport)
         elif isinstance(model.active_element, SkeletonState):
-            self.__draw_skeleton(model.active_element.get_skeleton())
-        elif isinstance(model.active_element, Animation):
+            self.__draw_skeleton(model.active_element.get_skeleton(), viewport=viewport)
+
+    def seek(self, time_point, hold=False):
+        """
+        Shows the playing animation at the moment, for example when the timeline is scrubbed.
+        :param time_point: time in seconds
+        :param hold: keep the moment on the screen until seek() is called without hold
+        """
+        if not self.__animation or not self.__animation.number_of_states:
+            return
+        self.current_time = time_point
+        self.__holding = hold
+        self.delete("frame")
+        self.__draw_skeleton(self.__animation.pose_at(time_point, LOOP), viewport=self.__viewport())
+        if not hold:
+            self.__update_prefetcher(time_point)
+
+    def on_model_changed(self, model):
+        self.__model = model
+        self.__animation = None
+        self.__holding = False
+        self.__stop_prefetcher()
+        if self.__clock:
+            self.after_cancel(self.__clock)
+            self.__clock = None
+        self.redraw()
+        if isinstance(model.active_element, Animation):
             self.__animation = model.active_element
-            self.current_state = 0
+            self.current_time = 0
+            self.__start_prefetcher()
             self.update_clock()
 
     def update_clock(self):
+        """
+        Shows the next frame of the playing animation.
+        In background rendering mode the frame is taken from the worker,
+        the last frame stays on the screen if the worker is behind.
+        """
+        if self.__holding:
+            self.__clock = self.after(int(1000 / ProjectSettings.playback_fps), self.update_clock)
+            return
         if self.__animation and self.__animation.number_of_states:
-            self.delete("all")
-            self.__draw_skeleton(self.__animation.get_state(self.current_state).get_skeleton())
-            self.current_state = (self.current_state + 1) % self.__animation.number_of_states
-            self.after(self.__animation.get_transition_time(self.current_state), self.update_clock)
+            # frames of the worker have the old view until the changed view is passed to it
+            if self.__prefetcher and not self.__view_update:
+                frame = self.__prefetcher.get_frame()
+                if frame:
+                    self.current_time, data = frame
+                    self.__image = tkinter.PhotoImage(data=data, format="PPM")
+                    self.delete("frame")
+                    self.create_image(0, 0, image=self.__image, anchor="nw", tags="frame")
+                    self.tag_lower("frame")
+            else:
+                self.delete("frame")
+                self.__draw_skeleton(self.__animation.pose_at(self.current_time, LOOP), viewport=self.__viewport())
+            if self.time_listener:
+                self.time_listener(self.current_time)
+            loop_duration = self.__animation.loop_duration
+            # the loop of an animation with one state and no pause has no length
+            self.current_time = (self.current_time + 1 / ProjectSettings.playback_fps) % loop_duration \
+                if loop_duration > 0 else 0
+            self.__clock = self.after(int(1000 / ProjectSettings.playback_fps), self.update_clock)
@@ -3,6 +3,9 @@ This is a module with command pattern, which supports
 animation editing in the project.
 """
 
+import keyframes
+from model import Skeleton, SkeletonState, Animation, bone_from_dict
+
 
 class CommandList:
     """This class manages commands queue"""
@@ -10,17 +13,25 @@ class CommandList:
         self.model = model
         self.commands = list()
         self.last_id = -1
+        # object with record(command, reverted) method which is called after a command is applied or reverted
+        self.journal = None
 
     def add_command(self, command):
-        """Add command and apply"""
+        """Add command and apply, the command is dropped if it raises an exception"""
         self.commands.append(command)
-        self.redo()
+        try:
+            self.redo()
+        except ValueError:
+            self.commands.pop()
+            raise
 
     def undo(self):
         """Revert last command"""
         if self.last_id == -1:
             return
         self.commands[self.last_id].revert()
+        if self.journal:
+            self.journal.record(self.commands[self.last_id], True)
         self.last_id -= 1
         self.model.update_views()
 
@@ -28,8 +39,13 @@ class CommandList:
         """Redo next command"""
         if self.last_id + 1 == len(self.commands):
             return
+        if not isinstance(self.commands[self.last_id + 1], SelectCommand):
+            # shared skeletons of the library are copied before they are changed, see Project.editable()
+            self.model.active_element = self.model.editable(self.model.active_element)
+        self.commands[self.last_id + 1].apply(self.model)
         self.last_id += 1
-        self.commands[self.last_id].apply(self.model)
+        if self.journal:
+            self.journal.record(self.commands[self.last_id], False)
         self.model.update_views()
 
     def reset(self):
@@ -39,20 +55,37 @@ class CommandList:
 
 class PatchCommand:
     """Command which change an element."""
-    def __init__(self, opts):
+    def __init__(self, opts, target=None):
+        """
+        :param opts: patch of the element, see process_patch() of the element
+        :param target: element to change, the active element of the model by default
+        """
         self.opts = opts
         self.old_value = None
-        self.target = None
+        self.target = target
 
     def apply(self, model):
         """Apply command to model"""
-        self.target = model.active_element
-        self.old_value = model.active_element.process_patch(self.opts)
+        if self.target is None:
+            self.target = model.active_element
+        self.old_value = self.target.process_patch(self.opts)
 
     def revert(self):
         """Revert command"""
         self.target.process_patch(self.old_value)
 
+    def journal_record(self, model, reverted=False):
+        """
+        :return: record of the change made by apply() or revert(), see apply_record()
+        """
+        opts = self.old_value if reverted else self.opts
+        if isinstance(self.target, SkeletonState):
+            # updates given by indexes of the bones are recorded by identifiers as they are stored by the state
+            opts = dict(self.target.to_dict()["bone_updates"])
+        elif "skeleton" in opts:
+            opts = dict(opts, skeleton=model.address_of(opts["skeleton"]))
+        return dict(action="patch", target=model.address_of(self.target), opts=opts)
+
 
 class AddBoneCommand:
     """This command add bone to the skeleton"""
@@ -71,6 +104,13 @@ class AddBoneCommand:
         """Revert command"""
         self.target.remove_bone(self.added_id)
 
+    def journal_record(self, model, reverted=False):
+        if reverted:
+            return dict(action="remove_bone", target=model.address_of(self.target), idx=self.added_id)
+        return dict(
+            action="add_bone", target=model.address_of(self.target), bone=dict(self.bone.to_dict(), id=self.bone.id)
+        )
+
 
 class AddSkeletonCommand:
     """This command add a skeleton to the project"""
@@ -89,6 +129,11 @@ class AddSkeletonCommand:
         """Revert command"""
         self.target.remove_skeleton(self.added_id)
 
+    def journal_record(self, model, reverted=False):
+        if reverted:
+            return dict(action="remove_skeleton", idx=self.added_id)
+        return dict(action="add_skeleton", skeleton=self.skeleton.to_dict())
+
 
 class AddStateCommand:
     """This command add a skeleton to the project"""
@@ -107,6 +152,15 @@ class AddStateCommand:
         """Revert command"""
         self.target.remove_state(self.added_id)
 
+    def journal_record(self, model, reverted=False):
+        if reverted:
+            return dict(action="remove_state", target=model.address_of(self.target), idx=self.added_id)
+        return dict(
+            action="add_state",
+            target=model.address_of(self.target),
+            updates=self.state.to_dict()["bone_updates"],
+        )
+
 
 class AddAnimationCommand:
     """This command add a skeleton to the project"""
@@ -125,6 +179,36 @@ class AddAnimationCommand:
         """Revert command"""
         self.target.remove_animation(self.added_id)
 
+    def journal_record(self, model, reverted=False):
+        if reverted:
+            return dict(action="remove_animation", idx=self.added_id)
+        return dict(action="add_animation", animation=self.animation.to_dict())
+
+
+class ReduceKeyframesCommand:
+    """This command removes states which are reproducible by interpolation"""
+    def __init__(self, tolerances=None):
+        self.tolerances = tolerances
+        self.target = None
+        self.removed = None
+
+    def apply(self, model):
+        """Apply command to model"""
+        self.target = model.active_element
+        self.removed = keyframes.reduce_keyframes(self.target, self.tolerances)
+
+    def revert(self):
+        """Revert command"""
+        keyframes.restore_keyframes(self.target, self.removed)
+
+    def journal_record(self, model, reverted=False):
+        if reverted:
+            return dict(action="restore_keyframes", target=model.address_of(self.target), removed=[
+                [idx, state.to_dict()["bone_updates"]] + list(rest)
+                for idx, state, *rest in self.removed
+            ])
+        return dict(action="reduce_keyframes", target=model.address_of(self.target), tolerances=self.tolerances)
+
 
 class SelectCommand:
     """This command select another element"""
@@ -142,3 +226,99 @@ class SelectCommand:
     def revert(self):
         """Revert command"""
         self.model.active_element = self.previous
+
+    def journal_record(self, model, reverted=False):
+        return dict(action="select", element=model.address_of(self.previous if reverted else self.elem))
+
+
+def decode_bone_params(params: dict):
+    """
+    Restores tuples of the bone parameters which are turned into lists by JSON.
+    >>> decode_bone_params({'position': [1, 2], 'length': 3})
+    {'position': (1, 2), 'length': 3}
+    """
+    return {key: tuple(value) if isinstance(value, list) else value for key, value in params.items()}
+
+
+def decode_updates(updates: dict):
+    """
+    Restores tuples of the updates of a state, see SkeletonState, updates are keyed by identifiers of the bones.
+    >>> decode_updates({'1': {'position': [1, 2]}})
+    {'1': {'position': (1, 2)}}
+    """
+    return {bone_id: decode_bone_params(update) for bone_id, update in updates.items()}
+
+
+def apply_record(model, record: dict):
+    """
+    Repeats the change described by journal_record() of a command.
+    :param model: Project in the same state as the one where the record was made
+    :param record: dictionary made by journal_record(), possibly passed through JSON
+    >>> from model import Project
+    >>> project = Project()
+    >>> command_list = CommandList(project)
+    >>> records = list()
+    >>> class Journal:
+    ...     def record(self, command, reverted):
+    ...         records.append(command.journal_record(project, reverted))
+    >>> command_list.journal = Journal()
+    >>> command_list.add_command(AddSkeletonCommand(Skeleton(name='Vasiliy')))
+    >>> command_list.add_command(SelectCommand(project.get_skeleton(0)))
+    >>> command_list.add_command(PatchCommand(dict(name='Ivan')))
+    >>> command_list.undo()
+    >>> [record['action'] for record in records]
+    ['add_skeleton', 'select', 'patch', 'patch']
+    >>> replica = Project()
+    >>> for record in records:
+    ...     apply_record(replica, record)
+    >>> replica.get_skeleton(0).name, replica.address_of(replica.active_element)
+    ('Vasiliy', ['skeleton', 0])
+    """
+    action = record["action"]
+    target = model.editable(model.element_at(record.get("target")))
+    if action == "patch":
+        if isinstance(target, SkeletonState):
+            opts = decode_updates(record["opts"])
+        else:
+            opts = decode_bone_params(record["opts"])
+            if "skeleton" in opts:
+                opts["skeleton"] = model.element_at(record["opts"]["skeleton"])
+            if "transitions" in opts:
+                opts["transitions"] = list(opts["transitions"])
+            if "easings" in opts:
+                opts["easings"] = list(opts["easings"])
+        target.process_patch(opts)
+    elif action == "add_bone":
+        target.add_bone(bone_from_dict(decode_bone_params(record["bone"])))
+    elif action == "remove_bone":
+        target.remove_bone(record["idx"])
+    elif action == "add_skeleton":
+        skeleton = Skeleton(name=record["skeleton"]["name"])
+        skeleton.load_dict(dict(
+            record["skeleton"], bones=[decode_bone_params(bone) for bone in record["skeleton"]["bones"]]
+        ))
+        model.add_skeleton(skeleton)
+    elif action == "remove_skeleton":
+        model.remove_skeleton(record["idx"])
+    elif action == "add_state":
+        target.add_state(SkeletonState(updates=decode_updates(record["updates"])))
+    elif action == "remove_state":
+        target.remove_state(record["idx"])
+    elif action == "add_animation":
+        animation = Animation()
+        skeleton_name = animation.load_dict(record["animation"])
+        animation.set_skeleton(model.get_skeleton(skeleton_name))
+        model.add_animation(animation)
+    elif action == "remove_animation":
+        model.remove_animation(record["idx"])
+    elif action == "reduce_keyframes":
+        keyframes.reduce_keyframes(target, record["tolerances"])
+    elif action == "restore_keyframes":
+        keyframes.restore_keyframes(target, [
+            (idx, SkeletonState(updates=decode_updates(updates)), *rest)
+            for idx, updates, *rest in record["removed"]
+        ])
+    elif action == "select":
+        model.active_element = model.element_at(record["element"])
+    else:
+        raise ValueError('Unknown action of the record "{}".'.format(action))
@@ -0,0 +1,218 @@
+"""
+This is the crowd of characters: many instances of animations placed in a grid, every one with a random phase.
+Phases are rounded to buckets, so instances of the same animation in the same bucket share the evaluated pose
+and the pose is evaluated once per frame for all of them.
+The crowd is a scaling test of the rendering path: measure_fps() renders frames of crowds of growing size.
+
+Usage: python crowd.py PROJECT_DIR [--counts 10 100 1000] [--frames 10] [--no-sharing] [--size 320 240]
+"""
+
+import argparse
+import math
+import random
+import time
+from collections import deque
+
+import numpy
+
+from model import LOOP, Project
+from numpy_raster import bone_arrays, render_arrays, to_frame
+from raster import skeleton_bounds
+from settings import ProjectSettings
+
+
+class FpsCounter:
+    """
+    Sustained frame rate over the last frames.
+    >>> counter = FpsCounter(window=3)
+    >>> [counter.tick(t) for t in (0.0, 0.1, 0.2, 0.5)]
+    [0.0, 10.0, 10.0, 5.0]
+    """
+    def __init__(self, window=ProjectSettings.crowd_fps_window):
+        """
+        :param window: number of frames to average
+        """
+        self.__times = deque(maxlen=window)
+
+    def tick(self, now=None):
+        """
+        Registers the shown frame.
+        :param now: time of the frame in seconds, time.perf_counter() by default
+        :return: frames per second
+        """
+        self.__times.append(time.perf_counter() if now is None else now)
+        return self.fps
+
+    @property
+    def fps(self):
+        if len(self.__times) < 2 or self.__times[-1] == self.__times[0]:
+            return 0.0
+        return (len(self.__times) - 1) / (self.__times[-1] - self.__times[0])
+
+
+class Crowd:
+    """
+    Instances of animations in cells of a grid.
+    >>> from model import Animation, Skeleton, SkeletonState, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (10, 10), thickness=2.0))
+    >>> animation = Animation(skeleton, 'Breathing')
+    >>> animation.add_state(SkeletonState(skeleton))
+    >>> animation.add_state(SkeletonState(skeleton, [dict(radius=8)]), 1.0)
+    >>> crowd = Crowd([animation], 100, phase_buckets=4, spacing=2.0, seed=1)
+    >>> crowd.cell_size, crowd.size
+    ((24.0, 24.0), (240.0, 240.0))
+    >>> len(crowd.poses_at(0.5)), crowd.evaluations
+    (100, 4)
+    >>> unshared = Crowd([animation], 100, phase_buckets=None, seed=1)
+    >>> _ = unshared.poses_at(0.5)
+    >>> unshared.evaluations
+    100
+    >>> crowd.render(0.5, scale=0.5).size
+    (120, 120)
+    >>> Crowd([Animation(skeleton, 'Standing')], 100)
+    Traceback (most recent call last):
+    ...
+    ValueError: The crowd needs animations with states, got 1 animations and 1 of them without states.
+    """
+    def __init__(self, animations: list, count: int, phase_buckets=ProjectSettings.crowd_phase_buckets,
+                 spacing=ProjectSettings.crowd_spacing, seed=None):
+        """
+        :param animations: animations with states, instances use them in turn
+        :param count: number of instances
+        :param phase_buckets: number of different phases of every animation, phases are not rounded if it is None
+        :param spacing: size of the cell relative to the largest first pose of the animations
+        :param seed: seed of random phases
+        """
+        empty = sum(1 for animation in animations if not animation.number_of_states)
+        if not animations or empty:
+            raise ValueError('The crowd needs animations with states, got {} animations and {} of them without states.'
+                             .format(len(animations), empty))
+        self.__animations = animations
+        self.__phase_buckets = phase_buckets
+        boxes = [skeleton_bounds(animation.pose_at(0)) or (0, 0, 1, 1) for animation in animations]
+        width = max(box[2] - box[0] for box in boxes) * spacing
+        height = max(box[3] - box[1] for box in boxes) * spacing
+        self.__cell_size = width, height
+        self.__columns = max(int(math.ceil(math.sqrt(count))), 1)
+        self.__rows = int(math.ceil(count / self.__columns))
+
+        generator = random.Random(seed)
+        self.__instances = list()
+        for idx in range(count):
+            animation = idx % len(animations)
+            phase = generator.random()
+            if phase_buckets:
+                phase = math.floor(phase * phase_buckets) / phase_buckets
+            box = boxes[animation]
+            # the first pose of the instance is centered in its cell
+            offset = (
+                (idx % self.__columns + 0.5) * width - (box[0] + box[2]) / 2,
+                (idx // self.__columns + 0.5) * height - (box[1] + box[3]) / 2,
+            )
+            self.__instances.append((animation, phase, offset))
+        self.evaluations = 0
+
+    @property
+    def cell_size(self):
+        return self.__cell_size
+
+    @property
+    def size(self):
+        """
+        :return: (width, height) of the grid in the model coordinates
+        """
+        return self.__columns * self.__cell_size[0], self.__rows * self.__cell_size[1]
+
+    @property
+    def number_of_instances(self):
+        return len(self.__instances)
+
+    def poses_at(self, time_point: float):
+        """
+        Evaluates poses of all instances, instances with the same animation and phase share the pose.
+        The number of evaluated poses is kept in evaluations.
+        :param time_point: time in seconds
+        :return: list of (parameters of the bones, offset of the instance in the model coordinates)
+        """
+        poses = dict()
+        result = list()
+        for idx, (animation_idx, phase, offset) in enumerate(self.__instances):
+            key = (animation_idx, phase) if self.__phase_buckets else idx
+            if key not in poses:
+                animation = self.__animations[animation_idx]
+                # phases of an animation without a loop do not shift it
+                shift = phase * animation.loop_duration if animation.loop_duration > 0 else 0.0
+                skeleton = animation.pose_at(time_point + shift, LOOP)
+                poses[key] = [skeleton.get_bone(i).to_dict() for i in range(skeleton.number_of_bones)]
+            result.append((poses[key], offset))
+        self.evaluations = len(poses)
+        return result
+
+    def render(self, time_point: float, scale=1.0, background=(255, 255, 255)):
+        """
+        Renders the whole crowd without anti-aliasing, bones of all instances are rasterized at once.
+        Arrays of a shared pose are made once and shifted to every instance, see numpy_raster.bone_arrays().
+        :param time_point: time in seconds
+        :param scale: number of pixels in the unit of the model
+        :param background: color of the frame
+        :return: opaque FrameBuffer
+        """
+        width, height = self.size
+        size = max(int(math.ceil(width * scale)), 1), max(int(math.ceil(height * scale)), 1)
+        shared = dict()
+        instances = list()
+        for pose, offset in self.poses_at(time_point):
+            if id(pose) not in shared:
+                shared[id(pose)] = bone_arrays(pose, scale)
+            arrays = shared[id(pose)]
+            shift = numpy.array(offset) * scale
+            instances.append(dict(arrays, start=arrays['start'] + shift, end=arrays['end'] + shift))
+        instances = instances or [bone_arrays([], scale)]
+        arrays = {key: numpy.concatenate([instance[key] for instance in instances]) for key in instances[0]}
+        return to_frame(render_arrays(arrays, size, background, antialias=False))
+
+
+def measure_fps(crowd, frames=10, size=(320, 240), fps=ProjectSettings.playback_fps):
+    """
+    Renders frames of the crowd fitted into the size, as the preview plays it.
+    :param crowd: Crowd to render
+    :param frames: number of frames
+    :param size: (width, height) of the frame in pixels
+    :param fps: number of frames per second of the animation time
+    :return: tuple (rendered frames per second, evaluated poses per frame)
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> rate, evaluations = measure_fps(Crowd([project.get_animation('Sertaki')], 9, seed=0), frames=2, size=(64, 64))
+    >>> rate > 0, evaluations <= 9
+    (True, True)
+    """
+    scale = min(size[0] / crowd.size[0], size[1] / crowd.size[1])
+    counter = FpsCounter(window=frames + 1)
+    counter.tick()
+    evaluations = 0
+    for frame in range(frames):
+        crowd.render(frame / fps, scale)
+        evaluations += crowd.evaluations
+        counter.tick()
+    return counter.fps, evaluations / frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure rendering speed of crowds of animated characters.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000], help='numbers of instances')
+    parser.add_argument('--frames', type=int, default=10, help='number of rendered frames for every count')
+    parser.add_argument('--no-sharing', dest='sharing', action='store_false',
+                        help='evaluate the pose of every instance separately')
+    parser.add_argument('--size', type=int, nargs=2, default=[320, 240], help='width and height of frames')
+    args = parser.parse_args()
+
+    project = Project()
+    project.load(args.project)
+    animations = [project.get_animation(i) for i in range(project.number_of_animations)
+                  if project.get_animation(i).number_of_states]
+    for count in args.counts:
+        crowd = Crowd(animations, count, ProjectSettings.crowd_phase_buckets if args.sharing else None, seed=0)
+        rate, evaluations = measure_fps(crowd, args.frames, tuple(args.size))
+        print('{} instances: {:.1f} FPS, {:.0f} poses per frame'.format(count, rate, evaluations))
@@ -0,0 +1,59 @@
+"""
+This is the window of the crowd preview: instances of the animations of the project are played on the canvas
+as fast as it can draw them, the sustained frame rate is shown in the title.
+"""
+
+import gettext
+import tkinter
+
+from canvas import create_primitive
+from crowd import Crowd, FpsCounter
+from model import draw_pose
+from settings import ProjectSettings
+
+gettext.install('app', '.')
+
+
+class CrowdPreview(tkinter.Toplevel):
+    def __init__(self, master, animations, count=ProjectSettings.crowd_size):
+        """
+        :param animations: animations with states to play
+        :param count: number of instances
+        """
+        tkinter.Toplevel.__init__(self, master)
+        self.__crowd = Crowd(animations, count)
+        self.__counter = FpsCounter()
+        self.__time = 0.0
+        self.__last_frame = None
+        self.__clock = None
+
+        self.__canvas = tkinter.Canvas(self, background="white", width=640, height=480)
+        self.__canvas.pack(fill=tkinter.BOTH, expand=True)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.__clock = self.after(1, self.update_clock)
+
+    def close(self):
+        if self.__clock:
+            self.after_cancel(self.__clock)
+        self.destroy()
+
+    def update_clock(self):
+        """
+        Draws the next frame at once, animation time follows the real time, so slow frames skip time.
+        """
+        now = self.__counter.tick()
+        fps = self.__counter.fps
+        if self.__last_frame is not None:
+            self.__time += min(now - self.__last_frame, 1.0)
+        self.__last_frame = now
+
+        width, height = max(self.__canvas.winfo_width(), 1), max(self.__canvas.winfo_height(), 1)
+        scale = min(width / self.__crowd.size[0], height / self.__crowd.size[1])
+        self.__canvas.delete("crowd")
+        for pose, offset in self.__crowd.poses_at(self.__time):
+            for primitive in draw_pose(pose, scale, (offset[0] * scale, offset[1] * scale)):
+                create_primitive(self.__canvas, primitive, "crowd")
+        self.title(_("Crowd preview: {} instances, {:.1f} FPS, {} poses per frame").format(
+            self.__crowd.number_of_instances, fps, self.__crowd.evaluations
+        ))
+        self.__clock = self.after(1, self.update_clock)
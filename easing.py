@@ -0,0 +1,189 @@
+"""
+This is the module with easing curves of transitions.
+Curves are described by CSS-like strings, for example "ease-in",
+"cubic-bezier(0.1, 0.7, 1.0, 0.1)" or "steps(4, end)".
+Cubic Bezier curves are solved once into a lookup table, so evaluation
+is a table lookup with linear interpolation.
+"""
+
+import math
+import re
+
+from settings import ProjectSettings
+
+
+class Linear:
+    """
+    >>> Linear()(0.25)
+    0.25
+    """
+    spec = 'linear'
+
+    def __call__(self, t: float):
+        return t
+
+
+class Steps:
+    """
+    Stepwise curve, value jumps at the start or at the end of each of n intervals.
+    >>> [Steps(2)(t) for t in (0, 0.25, 0.5, 0.75, 1)]
+    [0.0, 0.0, 0.5, 0.5, 1.0]
+    >>> [Steps(2, 'start')(t) for t in (0, 0.25, 0.5, 0.75, 1)]
+    [0.5, 0.5, 1.0, 1.0, 1.0]
+    """
+    def __init__(self, number: int, position='end'):
+        """
+        :param number: number of steps
+        :param position: "start" or "end" - moment of the jump inside the interval
+        """
+        if number < 1 or position not in ('start', 'end'):
+            raise ValueError('Wrong steps easing: steps({}, {}).'.format(number, position))
+        self.__number = number
+        self.__shift = 1 if position == 'start' else 0
+        self.spec = 'steps({}, {})'.format(number, position)
+
+    def __call__(self, t: float):
+        if t >= 1:
+            return 1.0
+        return min(math.floor(t * self.__number) + self.__shift, self.__number) / self.__number
+
+
+class CubicBezier:
+    """
+    Cubic Bezier curve from (0, 0) to (1, 1) with control points (x1, y1) and (x2, y2).
+    y(x) is tabulated on a uniform grid of x when the curve is created.
+    >>> curve = CubicBezier(0.42, 0, 0.58, 1)
+    >>> curve(0), curve(1)
+    (0.0, 1.0)
+    >>> round(curve(0.5), 6)
+    0.5
+    >>> round(curve(0.25), 3)
+    0.129
+    >>> CubicBezier(1.5, 0, 0, 1)
+    Traceback (most recent call last):
+    ...
+    ValueError: X coordinates of cubic-bezier control points should be in [0, 1].
+    """
+    def __init__(self, x1: float, y1: float, x2: float, y2: float, table_size=ProjectSettings.easing_table_size):
+        """
+        :param x1, y1: first control point
+        :param x2, y2: second control point
+        :param table_size: number of intervals in the lookup table
+        """
+        if not (0 <= x1 <= 1 and 0 <= x2 <= 1):
+            raise ValueError('X coordinates of cubic-bezier control points should be in [0, 1].')
+        self.spec = 'cubic-bezier({}, {}, {}, {})'.format(x1, y1, x2, y2)
+        self.__size = table_size
+        self.__table = [self.__solve(x1, y1, x2, y2, i / table_size) for i in range(table_size + 1)]
+
+    @staticmethod
+    def __solve(x1, y1, x2, y2, x):
+        def bezier(p1, p2, u):
+            return 3 * (1 - u) ** 2 * u * p1 + 3 * (1 - u) * u ** 2 * p2 + u ** 3
+
+        low, high, u = 0.0, 1.0, x
+        for _ in range(8):
+            error = bezier(x1, x2, u) - x
+            slope = 3 * (1 - u) ** 2 * x1 + 6 * (1 - u) * u * (x2 - x1) + 3 * u ** 2 * (1 - x2)
+            if abs(error) < 1e-9 or abs(slope) < 1e-9:
+                break
+            u -= error / slope
+            if not 0 <= u <= 1:
+                break
+        if abs(bezier(x1, x2, u) - x) >= 1e-9 or not 0 <= u <= 1:
+            u = x
+            while high - low > 1e-9:
+                if bezier(x1, x2, u) < x:
+                    low = u
+                else:
+                    high = u
+                u = (low + high) / 2
+        return bezier(y1, y2, u)
+
+    def __call__(self, t: float):
+        if t <= 0:
+            return 0.0
+        if t >= 1:
+            return 1.0
+        position = t * self.__size
+        idx = int(position)
+        return self.__table[idx] + (self.__table[idx + 1] - self.__table[idx]) * (position - idx)
+
+
+PRESETS = {
+    'ease': (0.25, 0.1, 0.25, 1.0),
+    'ease-in': (0.42, 0.0, 1.0, 1.0),
+    'ease-out': (0.0, 0.0, 0.58, 1.0),
+    'ease-in-out': (0.42, 0.0, 0.58, 1.0),
+}
+
+_cache = dict()
+
+
+def _arguments(spec: str, text: str, types: tuple):
+    """
+    :param spec: description of the curve for messages
+    :param text: arguments of the curve separated by commas
+    :param types: type of every argument
+    :return: list of converted arguments, raises ValueError if they do not match the types
+    >>> _arguments('steps(2, start)', '2, start', (int, str))
+    [2, 'start']
+    """
+    values = [value.strip() for value in text.split(',')]
+    if len(values) != len(types):
+        raise ValueError('Bad easing "{}": {} arguments are expected.'.format(spec, len(types)))
+    result = list()
+    for value, kind in zip(values, types):
+        try:
+            result.append(kind(value))
+        except ValueError:
+            raise ValueError('Bad easing "{}": argument "{}" is not {}.'.format(spec, value, kind.__name__))
+    return result
+
+
+def get_easing(spec: str):
+    """
+    Parses the description of the curve. Curves are cached, so tables are built once per description.
+    :param spec: description of the curve
+    :return: callable which maps time fraction of the transition to interpolation factor
+    >>> get_easing('ease-in') is get_easing('ease-in')
+    True
+    >>> get_easing('steps(3)').spec
+    'steps(3, end)'
+    >>> get_easing('step-start')(0)
+    1.0
+    >>> round(get_easing('cubic-bezier(0, 0, 1, 1)')(0.3), 6)
+    0.3
+    >>> get_easing('bounce')
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown easing "bounce".
+    >>> get_easing('cubic-bezier(1, 2)')
+    Traceback (most recent call last):
+    ...
+    ValueError: Bad easing "cubic-bezier(1, 2)": 4 arguments are expected.
+    >>> get_easing('steps(two)')
+    Traceback (most recent call last):
+    ...
+    ValueError: Bad easing "steps(two)": argument "two" is not int.
+    """
+    if spec not in _cache:
+        name = spec.strip()
+        args = re.fullmatch(r'([a-z-]+)\s*\((.*)\)', name)
+        if name == 'linear':
+            easing = Linear()
+        elif name in PRESETS:
+            easing = CubicBezier(*PRESETS[name])
+        elif name == 'step-start':
+            easing = Steps(1, 'start')
+        elif name == 'step-end':
+            easing = Steps(1, 'end')
+        elif args and args.group(1) == 'cubic-bezier':
+            easing = CubicBezier(*_arguments(spec, args.group(2), (float, float, float, float)))
+        elif args and args.group(1) == 'steps':
+            values = args.group(2).split(',')
+            easing = Steps(*_arguments(spec, args.group(2), (int, str) if len(values) > 1 else (int,)))
+        else:
+            raise ValueError('Unknown easing "{}".'.format(spec))
+        _cache[spec] = easing
+    return _cache[spec]
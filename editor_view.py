@@ -1,7 +1,8 @@
 import tkinter
+from tkinter.messagebox import showerror
 
 import command
-from model import Skeleton, SegmentBone, CircleBone, Animation, SkeletonState
+from model import Skeleton, Bone, Animation, SkeletonState
 import gettext
 
 gettext.install('app', '.')
@@ -35,7 +36,7 @@ class ResourceEditorViewer(tkinter.Canvas):
             def save_command():
                 self.__command_list.add_command(command.PatchCommand({"name": name.get()}))
 
-        if isinstance(model.active_element, CircleBone):
+        if isinstance(model.active_element, Bone):
             lb = tkinter.Label(self.interior, text=_("Name:"))
             lb.grid(row=0, column=0)
             name = tkinter.Entry(self.interior, bg="white")
@@ -45,104 +46,50 @@ class ResourceEditorViewer(tkinter.Canvas):
             lb = tkinter.Label(self.interior, text=_("Position:"))
             lb.grid(row=1, column=0)
             pos_x = tkinter.Entry(self.interior, bg="white")
-            pos_x.insert("end", model.active_element.to_dict()["position"][0])
+            pos_x.insert("end", model.active_element.position[0])
             pos_x.grid(row=1, column=1)
             pos_y = tkinter.Entry(self.interior, bg="white")
-            pos_y.insert("end", model.active_element.to_dict()["position"][1])
+            pos_y.insert("end", model.active_element.position[1])
             pos_y.grid(row=1, column=2)
 
             lb = tkinter.Label(self.interior, text=_("Thickness:"))
             lb.grid(row=2, column=0)
             thickness = tkinter.Entry(self.interior, bg="white")
-            thickness.insert("end", model.active_element.to_dict()["thickness"])
-            thickness.grid(row=2, column=1)
-
-            lb = tkinter.Label(self.interior, text="Color:")
-            lb.grid(row=3, column=0)
-            col_r = tkinter.Entry(self.interior, bg="white")
-            col_r.insert("end", model.active_element.to_dict()["color"][0])
-            col_r.grid(row=3, column=1)
-            col_g = tkinter.Entry(self.interior, bg="white")
-            col_g.insert("end", model.active_element.to_dict()["color"][1])
-            col_g.grid(row=3, column=2)
-            col_b = tkinter.Entry(self.interior, bg="white")
-            col_b.insert("end", model.active_element.to_dict()["color"][2])
-            col_b.grid(row=3, column=3)
-
-            lb = tkinter.Label(self.interior, text=_("Radius:"))
-            lb.grid(row=4, column=0)
-            radius = tkinter.Entry(self.interior, bg="white")
-            radius.insert("end", model.active_element.to_dict()["radius"])
-            radius.grid(row=4, column=1)
-
-            last_row = 5
-
-            def save_command():
-                self.__command_list.add_command(command.PatchCommand({
-                    "name": name.get(),
-                    "position": (int(pos_x.get()), int(pos_y.get())),
-                    "thickness": float(thickness.get()),
-                    "color": (int(col_r.get()), int(col_g.get()), int(col_b.get())),
-                    "radius": float(radius.get()),
-                }))
-
-        if isinstance(model.active_element, SegmentBone):
-            lb = tkinter.Label(self.interior, text=_("Name:"))
-            lb.grid(row=0, column=0)
-            name = tkinter.Entry(self.interior, bg="white")
-            name.insert("end", model.active_element.name)
-            name.grid(row=0, column=1)
-
-            lb = tkinter.Label(self.interior, text=_("Position:"))
-            lb.grid(row=1, column=0)
-            pos_x = tkinter.Entry(self.interior, bg="white")
-            pos_x.insert("end", model.active_element.to_dict()["position"][0])
-            pos_x.grid(row=1, column=1)
-            pos_y = tkinter.Entry(self.interior, bg="white")
-            pos_y.insert("end", model.active_element.to_dict()["position"][1])
-            pos_y.grid(row=1, column=2)
-
-            lb = tkinter.Label(self.interior, text=_("Thickness:"))
-            lb.grid(row=2, column=0)
-            thickness = tkinter.Entry(self.interior, bg="white")
-            thickness.insert("end", model.active_element.to_dict()["thickness"])
+            thickness.insert("end", model.active_element.thickness)
             thickness.grid(row=2, column=1)
 
             lb = tkinter.Label(self.interior, text=_("Color:"))
             lb.grid(row=3, column=0)
             col_r = tkinter.Entry(self.interior, bg="white")
-            col_r.insert("end", model.active_element.to_dict()["color"][0])
+            col_r.insert("end", model.active_element.color[0])
             col_r.grid(row=3, column=1)
             col_g = tkinter.Entry(self.interior, bg="white")
-            col_g.insert("end", model.active_element.to_dict()["color"][1])
+            col_g.insert("end", model.active_element.color[1])
             col_g.grid(row=3, column=2)
             col_b = tkinter.Entry(self.interior, bg="white")
-            col_b.insert("end", model.active_element.to_dict()["color"][2])
+            col_b.insert("end", model.active_element.color[2])
             col_b.grid(row=3, column=3)
 
-            lb = tkinter.Label(self.interior, text=_("Length:"))
-            lb.grid(row=4, column=0)
-            length = tkinter.Entry(self.interior, bg="white")
-            length.insert("end", model.active_element.to_dict()["length"])
-            length.grid(row=4, column=1)
-
-            lb = tkinter.Label(self.interior, text=_("Rotation:"))
-            lb.grid(row=5, column=0)
-            rotate = tkinter.Entry(self.interior, bg="white")
-            rotate.insert("end", model.active_element.to_dict()["rotation"])
-            rotate.grid(row=5, column=1)
-
-            last_row = 6
+            last_row = 4
+            # own parameters of the type of the bone, see Bone.FIELDS
+            fields = dict()
+            for key, label in type(model.active_element).FIELDS:
+                lb = tkinter.Label(self.interior, text=_(label))
+                lb.grid(row=last_row, column=0)
+                fields[key] = tkinter.Entry(self.interior, bg="white")
+                fields[key].insert("end", getattr(model.active_element, key))
+                fields[key].grid(row=last_row, column=1)
+                last_row += 1
 
             def save_command():
-                self.__command_list.add_command(command.PatchCommand({
+                patch = {
                     "name": name.get(),
                     "position": (int(pos_x.get()), int(pos_y.get())),
                     "thickness": float(thickness.get()),
                     "color": (int(col_r.get()), int(col_g.get()), int(col_b.get())),
-                    "length": float(length.get()),
-                    "rotation": float(rotate.get()),
-                }))
+                }
+                patch.update({key: float(entry.get()) for key, entry in fields.items()})
+                self.__command_list.add_command(command.PatchCommand(patch))
 
         if isinstance(model.active_element, Animation):
             lb = tkinter.Label(self.interior, text=_("Name:"))
@@ -159,8 +106,10 @@ class ResourceEditorViewer(tkinter.Canvas):
 
             last_row = 2
 
-            trans = model.active_element.to_dict()["transitions"]
+            trans = model.active_element.transitions
+            easings = model.active_element.easings
             trans_vals = list()
+            easing_vals = list()
 
             for i in range(len(trans)):
                 lb = tkinter.Label(self.interior, text=_("Transition:"))
@@ -168,8 +117,21 @@ class ResourceEditorViewer(tkinter.Canvas):
                 trans_vals.append(tkinter.Entry(self.interior, bg="white"))
                 trans_vals[-1].insert("end", trans[i])
                 trans_vals[-1].grid(row=last_row, column=1)
+                easing_vals.append(tkinter.Entry(self.interior, bg="white"))
+                easing_vals[-1].insert("end", easings[i])
+                easing_vals[-1].grid(row=last_row, column=2)
                 last_row += 1
 
+            lb = tkinter.Label(self.interior, text=_("Loop transition:"))
+            lb.grid(row=last_row, column=0)
+            loop_time = tkinter.Entry(self.interior, bg="white")
+            loop_time.insert("end", model.active_element.loop_transition)
+            loop_time.grid(row=last_row, column=1)
+            loop_easing = tkinter.Entry(self.interior, bg="white")
+            loop_easing.insert("end", model.active_element.loop_easing or "")
+            loop_easing.grid(row=last_row, column=2)
+            last_row += 1
+
             def save_command():
                 trans = list()
                 for i in range(len(trans_vals)):
@@ -179,6 +141,9 @@ class ResourceEditorViewer(tkinter.Canvas):
                     "name": name.get(),
                     "skeleton": model.get_skeleton(skeleton.get()),
                     "transitions": trans,
+                    "easings": [easing.get().strip() for easing in easing_vals],
+                    "loop_transition": float(loop_time.get()),
+                    "loop_easing": loop_easing.get().strip() or None,
                 }))
 
         if isinstance(model.active_element, SkeletonState):
@@ -190,9 +155,8 @@ class ResourceEditorViewer(tkinter.Canvas):
             positions = dict()
             thickness = dict()
             colors = dict()
-            radiuses = dict()
-            lengthes = dict()
-            rotates = dict()
+            # index of the bone -> own parameters of its type, see Bone.FIELDS
+            fields = dict()
 
             if model.active_element.skeleton_name:
                 skeleton = model.active_element.get_skeleton() or model.get_skeleton(model.active_element.skeleton_name)
@@ -207,14 +171,14 @@ class ResourceEditorViewer(tkinter.Canvas):
                     lb.grid(row=last_row, column=0)
                     positions[i] = [tkinter.Entry(self.interior, bg="white"), tkinter.Entry(self.interior, bg="white")]
                     for j in range(len(positions[i])):
-                        positions[i][j].insert("end", bone.to_dict()["position"][j])
+                        positions[i][j].insert("end", bone.position[j])
                         positions[i][j].grid(row=last_row, column=j + 1)
                     last_row += 1
 
                     lb = tkinter.Label(self.interior, text=_("Thickness:"))
                     lb.grid(row=last_row, column=0)
                     thickness[i] = tkinter.Entry(self.interior, bg="white")
-                    thickness[i].insert("end", bone.to_dict()["thickness"])
+                    thickness[i].insert("end", bone.thickness)
                     thickness[i].grid(row=last_row, column=1)
                     last_row += 1
 
@@ -226,30 +190,17 @@ class ResourceEditorViewer(tkinter.Canvas):
                         tkinter.Entry(self.interior, bg="white"),
                     ]
                     for j in range(len(colors[i])):
-                        colors[i][j].insert("end", bone.to_dict()["color"][j])
+                        colors[i][j].insert("end", bone.color[j])
                         colors[i][j].grid(row=last_row, column=j + 1)
                     last_row += 1
 
-                    if isinstance(bone, CircleBone):
-                        lb = tkinter.Label(self.interior, text=_("Radius:"))
+                    fields[i] = dict()
+                    for key, label in type(bone).FIELDS:
+                        lb = tkinter.Label(self.interior, text=_(label))
                         lb.grid(row=last_row, column=0)
-                        radiuses[i] = tkinter.Entry(self.interior, bg="white")
-                        radiuses[i].insert("end", bone.to_dict()["radius"])
-                        radiuses[i].grid(row=last_row, column=1)
-                        last_row += 1
-                    elif isinstance(bone, SegmentBone):
-                        lb = tkinter.Label(self.interior, text=_("Length:"))
-                        lb.grid(row=last_row, column=0)
-                        lengthes[i] = tkinter.Entry(self.interior, bg="white")
-                        lengthes[i].insert("end", bone.to_dict()["length"])
-                        lengthes[i].grid(row=last_row, column=1)
-                        last_row += 1
-
-                        lb = tkinter.Label(self.interior, text=_("Rotation:"))
-                        lb.grid(row=last_row, column=0)
-                        rotates[i] = tkinter.Entry(self.interior, bg="white")
-                        rotates[i].insert("end", bone.to_dict()["rotation"])
-                        rotates[i].grid(row=last_row, column=1)
+                        fields[i][key] = tkinter.Entry(self.interior, bg="white")
+                        fields[i][key].insert("end", getattr(bone, key))
+                        fields[i][key].grid(row=last_row, column=1)
                         last_row += 1
 
             def save_command():
@@ -261,16 +212,22 @@ class ResourceEditorViewer(tkinter.Canvas):
                     patch[bone_name]["thickness"] = float(t.get())
                 for bone_name, c in colors.items():
                     patch[bone_name]["color"] = (int(c[0].get()), int(c[1].get()), int(c[2].get()))
-                for bone_name, r in radiuses.items():
-                    patch[bone_name]["radius"] = float(r.get())
-                for bone_name, l in lengthes.items():
-                    patch[bone_name]["length"] = float(l.get())
-                for bone_name, r in rotates.items():
-                    patch[bone_name]["rotation"] = float(r.get())
+                for bone_name, entries in fields.items():
+                    patch[bone_name].update({key: float(entry.get()) for key, entry in entries.items()})
 
-                self.__command_list.add_command(command.PatchCommand(patch))
+                self.__command_list.add_command(command.PatchCommand({
+                    skeleton.get_bone(i).id: update for i, update in enumerate(patch)
+                }))
+
+        def save_checked():
+            if save_command is None:
+                return
+            try:
+                save_command()
+            except ValueError as error:
+                showerror(_("Invalid value"), str(error))
 
-        save = tkinter.Button(self.interior, text=_("Save"), command=save_command)
+        save = tkinter.Button(self.interior, text=_("Save"), command=save_checked)
         save.grid(row=last_row, column=0)
 
         self.configure(scrollregion=self.bbox('all'))
@@ -37,7 +37,8 @@ skeleton_update_bone_fixture = {
             'thickness': 1.0,
             'name': 'Head',
             'radius': 10,
-            'type': 'CIRCLE'
+            'type': 'CIRCLE',
+            'id': '0'
         },
         {
             'position': (1, 1),
@@ -46,9 +47,11 @@ skeleton_update_bone_fixture = {
             'name': 'Leg',
             'length': 10,
             'rotation': 1,
-            'type': 'SEGMENT'
+            'type': 'SEGMENT',
+            'id': '1'
         }
-    ]
+    ],
+    'next_bone_id': 2
 }
 
 skeleton_to_dict_fixture = {
@@ -60,7 +63,8 @@ skeleton_to_dict_fixture = {
             'thickness': 1.0,
             'name': 'Head',
             'radius': 10,
-            'type': 'CIRCLE'
+            'type': 'CIRCLE',
+            'id': '0'
         },
         {
             'position': (1, 1),
@@ -69,9 +73,11 @@ skeleton_to_dict_fixture = {
             'name': 'Vasiliy_bone_1',
             'length': 10,
             'rotation': 1,
-            'type': 'SEGMENT'
+            'type': 'SEGMENT',
+            'id': '1'
         }
-    ]
+    ],
+    'next_bone_id': 2
 }
 
 skeleton_loaded_fixture = {
@@ -91,7 +97,8 @@ skeleton_loaded_fixture = {
       "name": "Left_arm",
       "length": 50.0,
       "rotation": 1.0,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "0"
     },
     {
       "position": [
@@ -107,7 +114,8 @@ skeleton_loaded_fixture = {
       "name": "Right_arm",
       "length": 50.0,
       "rotation": 2.14,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "1"
     },
     {
       "position": [
@@ -123,7 +131,8 @@ skeleton_loaded_fixture = {
       "name": "Right_plecho",
       "length": 50.0,
       "rotation": 0.0,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "2"
     },
     {
       "position": [
@@ -139,7 +148,8 @@ skeleton_loaded_fixture = {
       "name": "Left_Plecho",
       "length": 50.0,
       "rotation": 3.14,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "3"
     },
     {
       "position": [
@@ -155,7 +165,8 @@ skeleton_loaded_fixture = {
       "name": "Spina",
       "length": 100.0,
       "rotation": 1.57,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "4"
     },
     {
       "position": [
@@ -171,7 +182,8 @@ skeleton_loaded_fixture = {
       "name": "Spina_2",
       "length": 50.0,
       "rotation": 1.57,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "5"
     },
     {
       "position": [
@@ -187,7 +199,8 @@ skeleton_loaded_fixture = {
       "name": "Left Leg",
       "length": 140.0,
       "rotation": 1.0,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "6"
     },
     {
       "position": [
@@ -203,7 +216,8 @@ skeleton_loaded_fixture = {
       "name": "Right_leg",
       "length": 140.0,
       "rotation": 2.14,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "7"
     },
     {
       "position": [
@@ -219,7 +233,8 @@ skeleton_loaded_fixture = {
       "name": "Sheya",
       "length": 20.0,
       "rotation": 1.57,
-      "type": "SEGMENT"
+      "type": "SEGMENT",
+      "id": "8"
     },
     {
       "position": [
@@ -234,9 +249,11 @@ skeleton_loaded_fixture = {
       "thickness": 1.0,
       "name": "Head",
       "radius": 30.0,
-      "type": "CIRCLE"
+      "type": "CIRCLE",
+      "id": "9"
     }
-  ]
+  ],
+  "next_bone_id": 10
 }
 
 animation_with_one_state_fixture = {
@@ -248,7 +265,10 @@ animation_with_one_state_fixture = {
             'bone_updates': {}
         }
     ],
-    'transitions': []
+    'transitions': [],
+    'easings': [],
+    'loop_transition': 1.0,
+    'loop_easing': None
 }
 
 animation_with_two_states_fixture = {
@@ -266,7 +286,12 @@ animation_with_two_states_fixture = {
     ],
     'transitions': [
         1.0
-    ]
+    ],
+    'easings': [
+        'linear'
+    ],
+    'loop_transition': 1.0,
+    'loop_easing': None
 }
 
 animation_with_changed_transition = {
@@ -284,5 +309,10 @@ animation_with_changed_transition = {
     ],
     'transitions': [
         10
-    ]
+    ],
+    'easings': [
+        'linear'
+    ],
+    'loop_transition': 1.0,
+    'loop_easing': None
 }
@@ -0,0 +1,228 @@
+"""
+This is the parallel export of animations into sequences of PNG images.
+Worker processes render frames straight into a ring of frame buffers in shared memory,
+so pixels are never pickled between processes: a worker gets (frame, slot) and answers with the same pair.
+The encoding process takes finished slots in order of frames and encodes images right from the shared memory.
+A slot is given to the next frame only after its image is encoded,
+so at most ring_size frames exist at once whatever the length of the animation is.
+
+Usage: python frame_export.py PROJECT_DIR ANIMATION OUTPUT_DIR [--fps 24] [--workers 3] [--ring 8]
+"""
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+from atlas import sample_times
+from bounds import pose_bounds
+from model import LOOP, Project
+import numpy_raster
+import render_worker
+from raster import FrameBuffer
+from settings import ProjectSettings
+
+
+def frame_count(animation, fps: int):
+    """
+    :return: number of frames of the loop of the animation, see atlas.sample_times()
+    >>> from model import Project
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> animation = project.get_animation('Sertaki')
+    >>> frame_count(animation, 10) == len(sample_times(animation, 10))
+    True
+    """
+    if not animation.number_of_states:
+        return 0
+    return int(math.ceil(animation.loop_duration * fps - 1e-9))
+
+
+def animation_view(animation, times, scale=1.0, padding=ProjectSettings.atlas_padding,
+                   chunk_size=ProjectSettings.export_chunk_frames):
+    """
+    Poses are sampled in chunks, so memory does not depend on the number of frames.
+    :param animation: Animation to export
+    :param times: iterable with time in seconds of every frame
+    :param scale: number of pixels in the unit of the model
+    :param padding: number of empty pixels around the bones
+    :return: tuple (size, offset) of the view which contains every frame of the animation, see render_view()
+    >>> from model import Animation, Skeleton, SkeletonState, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (10, 10), thickness=2.0))
+    >>> animation = Animation(skeleton, 'Breathing')
+    >>> animation.add_state(SkeletonState(skeleton))
+    >>> animation.add_state(SkeletonState(skeleton, [dict(radius=8)]), 1.0)
+    >>> animation_view(animation, [0, 1])
+    ((20, 20), (0, 0))
+    """
+    box = None
+    poses = list()
+    for time_point in itertools.chain(times, [None]):
+        if time_point is not None:
+            skeleton = animation.pose_at(time_point, LOOP)
+            poses.append([skeleton.get_bone(i).to_dict() for i in range(skeleton.number_of_bones)])
+        if poses and (len(poses) == chunk_size or time_point is None):
+            boxes, _ = pose_bounds(poses)
+            poses = list()
+            if boxes is not None:
+                chunk = (boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max())
+                box = chunk if box is None else (
+                    min(box[0], chunk[0]), min(box[1], chunk[1]), max(box[2], chunk[2]), max(box[3], chunk[3])
+                )
+    if box is None:
+        return (1, 1), (0, 0)
+    left = math.floor(box[0] * scale) - padding
+    top = math.floor(box[1] * scale) - padding
+    right = math.ceil(box[2] * scale) + padding
+    bottom = math.ceil(box[3] * scale) + padding
+    return (int(right - left), int(bottom - top)), (-int(left), -int(top))
+
+
+def _render_frames(animation, fps, view, antialias, memory_name, tasks, finished):
+    """
+    Work of the render process: renders frames of tasks into slots of the shared memory until None is received.
+    """
+    render_view = numpy_raster.render_view if antialias else render_worker.render_view
+    memory = shared_memory.SharedMemory(name=memory_name)
+    # the process may exit while its answers are not taken, when the export is stopped early
+    finished.cancel_join_thread()
+    width, height = view['size']
+    slot_size = width * height * 4
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            frame_idx, slot = task
+            pixels = memory.buf[slot * slot_size:(slot + 1) * slot_size]
+            render_view(animation.pose_at(frame_idx / fps, LOOP), frame=FrameBuffer(width, height, pixels), **view)
+            # views of the buffer have to be released before the memory is closed
+            pixels.release()
+            finished.put((frame_idx, slot))
+    finally:
+        memory.close()
+
+
+def render_frames(animation, fps=ProjectSettings.export_fps, scale=1.0, workers=ProjectSettings.export_workers,
+                  ring_size=ProjectSettings.export_ring_size, background=(255, 255, 255),
+                  antialias=ProjectSettings.export_antialias):
+    """
+    Renders the loop of the animation in worker processes.
+    Frames are generated in order of atlas.sample_times(), every frame is a FrameBuffer over the shared memory
+    which is valid only until the next frame is requested, copy it to keep it.
+    :param animation: Animation to render
+    :param fps: number of frames per second
+    :param scale: number of pixels in the unit of the model
+    :param workers: number of render processes
+    :param ring_size: number of frame buffers in the shared memory
+    :param background: color of frames
+    :param antialias: render with anti-aliasing, otherwise as the canvas, see render_worker.render_view()
+    :return: generator of tuples (index of the frame, FrameBuffer)
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> animation = project.get_animation('Sertaki')
+    >>> frames = [(idx, frame.to_png()) for idx, frame in render_frames(animation, fps=10, workers=2, ring_size=2)]
+    >>> [idx for idx, _ in frames]
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
+    >>> size, offset = animation_view(animation, sample_times(animation, 10))
+    >>> frames[3][1] == numpy_raster.render_view(animation.pose_at(0.3, LOOP), size, offset=offset).to_png()
+    True
+    >>> generator = render_frames(animation, fps=10, workers=1, antialias=False)
+    >>> frame = next(generator)[1]
+    >>> frame.to_png() == render_worker.render_view(animation.pose_at(0, LOOP), size, offset=offset).to_png()
+    True
+    >>> generator.close()
+    >>> next(render_frames(animation, fps=100, workers=2, ring_size=4))[0]
+    0
+    """
+    count = frame_count(animation, fps)
+    if not count:
+        return
+    size, offset = animation_view(animation, (frame / fps for frame in range(count)), scale)
+    view = dict(size=size, scale=scale, offset=offset, background=background)
+    slot_size = size[0] * size[1] * 4
+    ring_size = max(min(ring_size, count), 1)
+    memory = shared_memory.SharedMemory(create=True, size=slot_size * ring_size)
+    tasks, finished = multiprocessing.Queue(), multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_render_frames, args=(animation, fps, view, antialias, memory.name, tasks, finished),
+            daemon=True
+        )
+        for _ in range(max(workers, 1))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        free = list(range(ring_size))
+        # index of the frame -> slot with its image, frames which are rendered before the previous ones
+        ready = dict()
+        next_task = next_frame = 0
+        while next_frame < count:
+            while free and next_task < count:
+                tasks.put((next_task, free.pop()))
+                next_task += 1
+            frame_idx, slot = finished.get()
+            ready[frame_idx] = slot
+            while next_frame in ready:
+                slot = ready.pop(next_frame)
+                pixels = memory.buf[slot * slot_size:(slot + 1) * slot_size]
+                try:
+                    yield next_frame, FrameBuffer(size[0], size[1], pixels)
+                finally:
+                    pixels.release()
+                free.append(slot)
+                next_frame += 1
+    finally:
+        for _ in processes:
+            tasks.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        memory.close()
+        memory.unlink()
+
+
+def export_frames(animation, path_to_dir, fps=ProjectSettings.export_fps, scale=1.0,
+                  workers=ProjectSettings.export_workers, ring_size=ProjectSettings.export_ring_size):
+    """
+    Exports the loop of the animation into files "{name}_{frame}.png" inside the directory.
+    :return: number of exported frames
+    >>> import tempfile
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     export_frames(project.get_animation('Sertaki'), path, fps=5, workers=2, ring_size=3)
+    ...     sorted(os.listdir(path))[:2]
+    8
+    ['Sertaki_0000.png', 'Sertaki_0001.png']
+    """
+    count = 0
+    for frame_idx, frame in render_frames(animation, fps, scale, workers, ring_size):
+        frame.save_png(os.path.join(path_to_dir, '{}_{:04d}.png'.format(animation.name, frame_idx)))
+        count += 1
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the animation into PNG images rendered in parallel.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('animation', help='name of the animation')
+    parser.add_argument('output', help='path to the output directory')
+    parser.add_argument('--fps', type=int, default=ProjectSettings.export_fps, help='number of frames per second')
+    parser.add_argument('--scale', type=float, default=1.0, help='number of pixels in the unit of the model')
+    parser.add_argument('--workers', type=int, default=ProjectSettings.export_workers, help='number of processes')
+    parser.add_argument('--ring', type=int, default=ProjectSettings.export_ring_size,
+                        help='number of frame buffers in shared memory')
+    args = parser.parse_args()
+
+    project = Project()
+    project.load(args.project)
+    os.makedirs(args.output, exist_ok=True)
+    print('{} frames'.format(export_frames(
+        project.get_animation(args.animation), args.output, args.fps, args.scale, args.workers, args.ring
+    )))
@@ -0,0 +1,171 @@
+"""
+This is the keyframe reduction pass.
+It removes states of an animation which can be reproduced
+by interpolation of their neighbours and merges transition times.
+
+Usage: python keyframes.py PROJECT_DIR [--tolerance rotation=0.02 ...]
+"""
+
+import argparse
+
+from easing import get_easing
+from model import Project, interpolate_params
+from settings import ProjectSettings
+
+
+def is_reproducible(state, first, last, t: float, tolerances: dict):
+    """
+    Checks that the state can be replaced by interpolation between two other states.
+    :param state: SkeletonState to check
+    :param first: SkeletonState before the checked one
+    :param last: SkeletonState after the checked one
+    :param t: position of the checked state between first and last, from 0 to 1
+    :param tolerances: maximal difference for every parameter, parameters without tolerance must match exactly
+    :return: True if every parameter of every bone is within its tolerance
+    """
+    skeleton, first_skeleton, last_skeleton = state.get_skeleton(), first.get_skeleton(), last.get_skeleton()
+    for i in range(skeleton.number_of_bones):
+        params = skeleton.get_bone(i).to_dict()
+        expected = interpolate_params(first_skeleton.get_bone(i).to_dict(), last_skeleton.get_bone(i).to_dict(), t)
+        for key, value in params.items():
+            tolerance = tolerances.get(key, 0)
+            if isinstance(value, (tuple, list)):
+                if any(abs(a - b) > tolerance for a, b in zip(value, expected[key])):
+                    return False
+            elif isinstance(value, (int, float)):
+                if abs(value - expected[key]) > tolerance:
+                    return False
+            elif value != expected[key]:
+                return False
+    return True
+
+
+def find_keyframes(animation, tolerances=None):
+    """
+    Finds states which have to be kept in the animation.
+    The span between two kept states grows while all states inside it are reproducible
+    with easing of the first transition of the span, so transitions with other easings are never merged.
+    :param animation: Animation to analyze
+    :param tolerances: maximal difference for every parameter, see ProjectSettings.keyframe_tolerances
+    :return: list with indexes of the states to keep
+    """
+    tolerances = ProjectSettings.keyframe_tolerances if tolerances is None else tolerances
+    if animation.number_of_states < 3:
+        return list(range(animation.number_of_states))
+
+    times = [0]
+    for transition in animation.transitions:
+        times.append(times[-1] + transition)
+
+    easings = animation.easings
+    keyframes = [0]
+    for end in range(2, animation.number_of_states):
+        start, span = keyframes[-1], times[end] - times[keyframes[-1]]
+        easing = get_easing(easings[start])
+        if easings[end - 1] != easings[start] or not all(
+            is_reproducible(
+                animation.get_state(i), animation.get_state(start), animation.get_state(end),
+                easing((times[i] - times[start]) / span) if span else 0, tolerances
+            )
+            for i in range(start + 1, end)
+        ):
+            keyframes.append(end - 1)
+    keyframes.append(animation.number_of_states - 1)
+    return keyframes
+
+
+def reduce_keyframes(animation, tolerances=None):
+    """
+    Removes states which can be reproduced by interpolation of their neighbours.
+    Transition time of removed state is added to the transition after it.
+    :param animation: Animation to reduce
+    :param tolerances: maximal difference for every parameter, see ProjectSettings.keyframe_tolerances
+    :return: list of removed (index, state, transitions before and after, easings before and after)
+    in order of removal
+    >>> from model import Animation, Skeleton, SkeletonState, SegmentBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(SegmentBone(10, 0, (0, 0), name='Leg'))
+    >>> animation = Animation(skeleton, 'Walking')
+    >>> for length, time in [(10, 1), (20, 1), (30, 1), (40, 1), (40, 2)]:
+    ...     animation.add_state(SkeletonState(skeleton, {0: dict(length=length)}), time)
+    >>> removed = reduce_keyframes(animation)
+    >>> [removal[0] for removal in removed]
+    [2, 1]
+    >>> animation.number_of_states, animation.transitions
+    (3, (3, 2))
+    >>> animation.get_state(1).get_skeleton().get_bone(0).to_dict()['length']
+    40
+    >>> restore_keyframes(animation, removed)
+    >>> animation.number_of_states, animation.transitions
+    (5, (1, 1, 1, 2))
+    """
+    keyframes = set(find_keyframes(animation, tolerances))
+    removed = list()
+    for idx in reversed(range(animation.number_of_states)):
+        if idx in keyframes:
+            continue
+        before, after = animation.transitions[idx - 1], animation.transitions[idx]
+        easing_before, easing_after = animation.easings[idx - 1], animation.easings[idx]
+        removed.append((idx, animation.get_state(idx), before, after, easing_before, easing_after))
+        animation.remove_state(idx)
+        animation.change_transition_time(idx, before + after)
+        animation.change_easing(idx, easing_before)
+    return removed
+
+
+def restore_keyframes(animation, removed):
+    """
+    Reverts reduce_keyframes().
+    :param animation: reduced Animation
+    :param removed: result of reduce_keyframes()
+    """
+    for idx, state, before, after, easing_before, easing_after in reversed(removed):
+        animation.insert_state(idx, state, before, easing_before)
+        animation.change_transition_time(idx + 1, after)
+        animation.change_easing(idx + 1, easing_after)
+
+
+def reduce_project(path_to_project_dir, tolerances=None):
+    """
+    Reduces keyframes of every animation in the project and saves changed animations.
+    :param path_to_project_dir: path to the directory where project was saved
+    :param tolerances: maximal difference for every parameter, see ProjectSettings.keyframe_tolerances
+    :return: dictionary with (states before, states after) for every animation
+    >>> import shutil, tempfile
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     _ = shutil.copytree('Vasilich', path, dirs_exist_ok=True)
+    ...     reduce_project(path)
+    {'Sertaki': (3, 2)}
+    """
+    project = Project()
+    project.load(path_to_project_dir)
+    report = dict()
+    for i in range(project.number_of_animations):
+        animation = project.get_animation(i)
+        before = animation.number_of_states
+        if reduce_keyframes(animation, tolerances):
+            animation.save(path_to_project_dir)
+        report[animation.name] = (before, animation.number_of_states)
+    return report
+
+
+def parse_tolerance(value: str):
+    """
+    >>> parse_tolerance('rotation=0.02')
+    ('rotation', 0.02)
+    """
+    key, _, tolerance = value.partition('=')
+    return key, float(tolerance)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Remove states which are reproducible by interpolation.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('--tolerance', action='append', type=parse_tolerance, default=list(),
+                        help='tolerance of the parameter as NAME=VALUE, can be repeated')
+    args = parser.parse_args()
+
+    for name, (before, after) in reduce_project(
+        args.project, dict(ProjectSettings.keyframe_tolerances, **dict(args.tolerance))
+    ).items():
+        print('{}: {} -> {} states'.format(name, before, after))
@@ -0,0 +1,91 @@
+"""
+This is the shared library of skeletons.
+Skeletons are stored as <library>/<id>/<version> files, published versions are never changed.
+Projects refer to the skeletons by id and version, every version is loaded once
+and the same Skeleton object is shared by all projects opened in the process.
+Shared skeletons are read-only: a project changes its own copy, see model.Project.editable().
+"""
+
+import copy
+import json
+import os
+
+import model
+from settings import ProjectSettings
+
+_cache = dict()
+
+
+class SkeletonLibrary:
+    """
+    Directory with versions of skeletons.
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     skeleton_library = SkeletonLibrary(path)
+    ...     skeleton = model.Skeleton(name='Vasiliy')
+    ...     skeleton_library.publish(skeleton), skeleton_library.publish(skeleton)
+    ...     skeleton_library.versions('Vasiliy')
+    ...     skeleton_library.get_skeleton('Vasiliy', 1) is SkeletonLibrary(path).get_skeleton('Vasiliy', 1)
+    (1, 2)
+    [1, 2]
+    True
+    """
+    def __init__(self, path_to_library_dir=ProjectSettings.skeleton_library_dir):
+        """
+        :param path_to_library_dir: directory of the library
+        """
+        self.__path = os.path.abspath(path_to_library_dir)
+
+    @property
+    def path(self):
+        return self.__path
+
+    def versions(self, skeleton_id: str):
+        """
+        :return: sorted list of published versions of the skeleton
+        """
+        try:
+            names = os.listdir(os.path.join(self.__path, skeleton_id))
+        except FileNotFoundError:
+            return list()
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def get_skeleton(self, skeleton_id: str, version=None, shared=True):
+        """
+        :param skeleton_id: id of the skeleton in the library
+        :param version: version of the skeleton, the latest one is used if it is None
+        :param shared: return the cached object which is shared by all projects, otherwise its copy
+        :return: Skeleton, raises FileNotFoundError if there is no such version
+        """
+        if version is None:
+            versions = self.versions(skeleton_id)
+            if not versions:
+                raise FileNotFoundError('Skeleton "{}" was not found in the library.'.format(skeleton_id))
+            version = versions[-1]
+        key = (self.__path, skeleton_id, version)
+        if key not in _cache:
+            try:
+                with open(os.path.join(self.__path, skeleton_id, str(version)), 'r') as file:
+                    data = json.load(file)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    'Version {} of skeleton "{}" was not found in the library.'.format(version, skeleton_id)
+                )
+            skeleton = model.Skeleton(name=data['name'])
+            skeleton.load_dict(data)
+            _cache[key] = skeleton
+        return _cache[key] if shared else copy.deepcopy(_cache[key])
+
+    def publish(self, skeleton, skeleton_id=None):
+        """
+        Saves the skeleton as a new version.
+        :param skeleton: Skeleton to save
+        :param skeleton_id: id of the skeleton in the library, name of the skeleton by default
+        :return: number of the new version
+        """
+        skeleton_id = skeleton_id or skeleton.name
+        version = (self.versions(skeleton_id) or [0])[-1] + 1
+        os.makedirs(os.path.join(self.__path, skeleton_id), exist_ok=True)
+        with open(os.path.join(self.__path, skeleton_id, str(version)), 'x') as file:
+            json.dump(skeleton.to_dict(), file, indent=2)
+        return version
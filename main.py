@@ -5,17 +5,30 @@ Animation creator is a simple tools for create the
 2D skeleton animation and export it to GIF or atlas.
 """
 
+import copy
 import tkinter
 import tkinter.ttk
 import gettext
+import threading
 
 from tkinter.filedialog import askdirectory
+from tkinter.messagebox import askyesno, showerror, showinfo
+from tkinter.simpledialog import askinteger
 
 from model import Project, CircleBone, SegmentBone, Skeleton, Animation, SkeletonState
+from settings import ProjectSettings
+import atlas
+import autosave
 import canvas
 import command
+import crowd_view
 import editor_view
+import frame_export
+import overview
+import sequence_export
+import timeline
 import tree
+import watcher
 
 gettext.install('app', '.')
 
@@ -27,25 +40,66 @@ class MainWindow(tkinter.Tk):
         self.title(_("Animation creator"))
         self.__command_list = command_list
         self.__project = project
+        self.__watcher = None
+        self.__export_thread = None
         self._init_menu()
         self._init_work_area()
-        self.geometry("950x550+300+300")
+        self.geometry("950x650+300+300")
+        self.after(ProjectSettings.watch_interval, self.watch_files)
+        self.protocol("WM_DELETE_WINDOW", self.quit)
+        self.__start_autosave()
+
+    def __start_autosave(self):
+        """
+        Offers to restore the session which was not finished properly and starts a new autosave session.
+        """
+        recovered = autosave.needs_recovery() and askyesno(
+            _("Animation creator"), _("Previous session was not finished. Restore unsaved changes?")
+        )
+        if recovered:
+            autosave.recover(self.__project)
+            if self.__project.path:
+                self.__watcher = watcher.ProjectWatcher(self.__project)
+            self.__project.update_views()
+        self.__autosave = autosave.Autosave(self.__project)
+        self.__command_list.journal = self.__autosave
+        self.__autosave.start(recovered)
+
+    def quit(self):
+        """
+        Finishes the autosave session in its thread and closes the window when the journal is written.
+        """
+        self.__autosave.stop(clean=True, wait=False)
+        self.title(_("Finishing autosave..."))
+        self.__quit_when_saved()
+
+    def __quit_when_saved(self):
+        if self.__autosave.running or self.__export_thread is not None:
+            self.after(ProjectSettings.autosave_poll_interval, self.__quit_when_saved)
+        else:
+            tkinter.Tk.quit(self)
 
     def _init_menu(self):
         self.main_menu = tkinter.Menu(self)
         self.config(menu=self.main_menu)
 
-        file_menu = tkinter.Menu(self.main_menu)
-        file_menu.add_command(label=_("Open Project"), command=self.load_project)
-        file_menu.add_command(label=_("Save Project"), command=self.save_project)
-        file_menu.add_command(label=_("Exit"), command=self.quit)
-        self.main_menu.add_cascade(label=_("File"), menu=file_menu)
+        self.file_menu = tkinter.Menu(self.main_menu)
+        self.file_menu.add_command(label=_("Open Project"), command=self.load_project)
+        self.file_menu.add_command(label=_("Save Project"), command=self.save_project)
+        self.file_menu.add_command(label=_("Export atlas"), command=self.export_atlas)
+        self.file_menu.add_command(label=_("Export frames"), command=self.export_frames)
+        self.file_menu.add_command(label=_("Export SVG frames"), command=self.export_svg)
+        self.file_menu.add_command(label=_("Exit"), command=self.quit)
+        self.main_menu.add_cascade(label=_("File"), menu=self.file_menu)
 
-        edit_menu = tkinter.Menu(self.main_menu)
-        edit_menu.add_command(label=_("Redo"), command=self.__command_list.redo)
-        edit_menu.add_command(label=_("Undo"), command=self.__command_list.undo)
+        self.edit_menu = tkinter.Menu(self.main_menu)
+        self.edit_menu.add_command(label=_("Redo"), command=self.__command_list.redo)
+        self.edit_menu.add_command(label=_("Undo"), command=self.__command_list.undo)
+        self.edit_menu.add_command(label=_("Reduce keyframes"), command=lambda: self.__command_list.add_command(
+            command.ReduceKeyframesCommand()
+        ))
 
-        self.add_menu = tkinter.Menu(edit_menu)
+        self.add_menu = tkinter.Menu(self.edit_menu)
         self.add_menu.add_command(label=_("Animation"), command=lambda: self.__command_list.add_command(
             command.AddAnimationCommand(Animation())
         ))
@@ -62,8 +116,27 @@ class MainWindow(tkinter.Tk):
             command.AddBoneCommand(CircleBone(50, (100, 100)))
         ))
 
-        edit_menu.add_cascade(label=_("Add"), menu=self.add_menu)
-        self.main_menu.add_cascade(label=_("Edit"), menu=edit_menu)
+        self.edit_menu.add_cascade(label=_("Add"), menu=self.add_menu)
+        self.main_menu.add_cascade(label=_("Edit"), menu=self.edit_menu)
+
+        view_menu = tkinter.Menu(self.main_menu)
+        self.onion_skin = tkinter.BooleanVar(value=ProjectSettings.onion_skin_enabled)
+        view_menu.add_checkbutton(label=_("Onion skin"), variable=self.onion_skin, command=self.toggle_onion_skin)
+        self.level_of_detail = tkinter.BooleanVar(value=ProjectSettings.lod_enabled)
+        view_menu.add_checkbutton(
+            label=_("Level of detail"), variable=self.level_of_detail, command=self.toggle_level_of_detail
+        )
+        self.background_rendering = tkinter.BooleanVar(value=ProjectSettings.background_rendering)
+        view_menu.add_checkbutton(
+            label=_("Background rendering"), variable=self.background_rendering,
+            command=lambda: self.canvas.set_background_rendering(self.background_rendering.get())
+        )
+        view_menu.add_command(label=_("Reset view"), command=lambda: self.canvas.reset_view())
+        view_menu.add_command(label=_("Project overview"), command=lambda: overview.ProjectOverview(
+            self, self.__project, self.__command_list
+        ))
+        view_menu.add_command(label=_("Crowd preview"), command=self.show_crowd)
+        self.main_menu.add_cascade(label=_("View"), menu=view_menu)
 
         help_menu = tkinter.Menu(self.main_menu)
         help_menu.add_command(label=_("Help"))
@@ -81,26 +154,129 @@ class MainWindow(tkinter.Tk):
         self.canvas.grid(row=0, column=0, sticky=tkinter.N+tkinter.E+tkinter.S+tkinter.W)
         self.__project.register_view(self.canvas)
 
+        self.timeline = timeline.TimelineView(self, self.__command_list, scrub=self.canvas.seek)
+        self.timeline.grid(row=1, column=0, sticky=tkinter.E+tkinter.W)
+        timeline_scroll = tkinter.Scrollbar(self, orient=tkinter.HORIZONTAL, command=self.timeline.xview)
+        timeline_scroll.grid(row=2, column=0, sticky=tkinter.E+tkinter.W)
+        self.timeline.configure(xscrollcommand=timeline_scroll.set)
+        self.canvas.time_listener = self.timeline.show_time
+        self.__project.register_view(self.timeline)
+
         self.options = editor_view.ResourceEditorViewer(self, self.__command_list)
-        self.options.grid(row=0, column=1, sticky=tkinter.N+tkinter.E+tkinter.S+tkinter.W)
+        self.options.grid(row=0, column=1, rowspan=3, sticky=tkinter.N+tkinter.E+tkinter.S+tkinter.W)
         self.__project.register_view(self.options)
 
         self.project_view = tree.ProjectHierarchyView(self.__command_list)
-        self.project_view.grid(row=0, column=3, sticky=tkinter.N+tkinter.E+tkinter.S+tkinter.W)
+        self.project_view.grid(row=0, column=3, rowspan=3, sticky=tkinter.N+tkinter.E+tkinter.S+tkinter.W)
         self.__project.register_view(self.project_view)
 
     def load_project(self):
         path_to_project_dir = askdirectory()
         if path_to_project_dir:
             self.__project.load(path_to_project_dir)
+            self.__watcher = watcher.ProjectWatcher(self.__project)
+            # the previous session writes the rest of its journal in its thread, the new one waits for it there
+            previous = self.__autosave
+            previous.stop(wait=False)
+            self.__autosave = autosave.Autosave(self.__project)
+            self.__command_list.journal = self.__autosave
+            self.__autosave.start(previous=previous)
         self.__command_list.reset()
 
     def save_project(self):
         path_to_project_dir = askdirectory()
         if path_to_project_dir:
             self.__project.save(path_to_project_dir)
+            self.__watcher = watcher.ProjectWatcher(self.__project)
+            self.__autosave.saved(path_to_project_dir)
+
+    def watch_files(self):
+        """
+        Reloads files of the project changed by other programs.
+        History of commands is cleared because reloaded elements are not the ones the commands refer to.
+        """
+        if self.__watcher and self.__watcher.poll():
+            self.__command_list.reset()
+            self.__autosave.reloaded()
+        self.after(ProjectSettings.watch_interval, self.watch_files)
+
+    def toggle_onion_skin(self):
+        self.canvas.onion_skin = self.onion_skin.get()
+        self.canvas.on_model_changed(self.__project)
+
+    def toggle_level_of_detail(self):
+        self.canvas.set_level_of_detail(self.level_of_detail.get())
+
+    def show_crowd(self):
+        """
+        Plays many instances of the active animation or of all animations of the project.
+        """
+        active = self.__project.active_element
+        animations = [active] if isinstance(active, Animation) else [
+            self.__project.get_animation(i) for i in range(self.__project.number_of_animations)
+        ]
+        animations = [animation for animation in animations if animation.number_of_states]
+        if not animations:
+            showinfo(_("Crowd preview"), _("There are no animations with states to play."), parent=self)
+            return
+        count = askinteger(_("Crowd preview"), _("Number of instances:"), parent=self,
+                           initialvalue=ProjectSettings.crowd_size, minvalue=1)
+        if count:
+            crowd_view.CrowdPreview(self, animations, count)
+
+    def export_atlas(self):
+        path_to_dir = askdirectory()
+        if path_to_dir:
+            self.__export(atlas.export_atlas, path_to_dir)
+
+    def export_frames(self):
+        path_to_dir = askdirectory()
+        if path_to_dir:
+            self.__export(frame_export.export_frames, path_to_dir)
+
+    def export_svg(self):
+        path_to_dir = askdirectory()
+        if path_to_dir:
+            self.__export(sequence_export.export_sequence, path_to_dir, sequence_export.SVG)
+
+    def __export(self, export, *args):
+        """
+        Exports a copy of the active animation in a thread, so the window is not blocked by the export,
+        the title shows that the export is running until it is finished.
+        :param export: function which is called with the animation and args
+        """
+        if self.__export_thread is not None:
+            showinfo(_("Export"), _("The previous export is not finished yet."), parent=self)
+            return
+        animation = copy.deepcopy(self.__project.active_element)
+        errors = list()
+
+        def work():
+            try:
+                export(animation, *args)
+            except (OSError, ValueError) as error:
+                errors.append(error)
+
+        self.__export_thread = threading.Thread(target=work, daemon=True)
+        self.__export_thread.start()
+        self.title(_("Exporting..."))
+        self.__finish_export(errors)
+
+    def __finish_export(self, errors):
+        if self.__export_thread.is_alive():
+            self.after(ProjectSettings.export_poll_interval, self.__finish_export, errors)
+            return
+        self.__export_thread = None
+        self.title(_("Animation creator"))
+        if errors:
+            showerror(_("Export"), str(errors[0]), parent=self)
 
     def on_model_changed(self, model):
+        animation_state = "normal" if isinstance(model.active_element, Animation) else "disabled"
+        self.file_menu.entryconfig(_("Export atlas"), state=animation_state)
+        self.file_menu.entryconfig(_("Export frames"), state=animation_state)
+        self.file_menu.entryconfig(_("Export SVG frames"), state=animation_state)
+        self.edit_menu.entryconfig(_("Reduce keyframes"), state=animation_state)
         TYPES_TO_ADD = 6
         for i in range(TYPES_TO_ADD):
             self.add_menu.entryconfig(i, state="disabled")
@@ -3,22 +3,38 @@ This is the Model's file in our MVC framework.
 It contains data structure and data managing.
 """
 
+import bisect
 import copy
+import itertools
 import json
+import math
 import os
 import shutil
 from abc import ABC, abstractmethod
 from time import time
 
-import fixtures
+import numpy
+
+import library
+from easing import get_easing
+from player.playback import interpolate_params
 from settings import ProjectSettings
 
+# modes of Animation.pose_at() for time outside of the animation
+CLAMP, LOOP, PINGPONG = 'clamp', 'loop', 'pingpong'
+# versions of bones and skeletons, every change takes the next number, see Skeleton.version
+_versions = itertools.count(1)
+
 
 class Bone(ABC):
     """
     Abstract bone class.
-    Any new bone class in the project should be inherited from this class
-    and implement process_patch() and to_dict() methods.
+    Any new bone class in the project should be inherited from this class,
+    implement process_patch(), to_dict(), compute_bounds(), shape_batch() and draw_batch() methods
+    and be registered with register_bone_type().
+    TYPE is the name of the type in dictionaries of bones, FIELDS are pairs (attribute, label in the editor)
+    of the own parameters of the type in order of arguments of its constructor, all of them are numbers.
+    HIT_SHAPE is the shape which runtimes use to hit the bone, see bounds.animation_bounds().
     Position is the coordinates of the bone - (float, float) tuple.
     What is position of the bone depends on the type of the bone.
     Bone also can change color and thickness.
@@ -26,9 +42,24 @@ class Bone(ABC):
     >>> Bone((0, 0), (0, 0, 0), 10, 'Head')
     Traceback (most recent call last):
     ...
-    TypeError: Can't instantiate abstract class Bone with abstract methods process_patch, to_dict
+    TypeError: Can't instantiate abstract class Bone with abstract methods compute_bounds, draw_batch, process_patch, \
+shape_batch, to_dict
     >>> bone = SegmentBone(10, 1, (0, 0), name='Leg')
+
+    Bones are compact records with __slots__, renderers and editors read parameters
+    through the properties, to_dict() is used for serialization.
+    >>> bone.thickness, bone.position
+    (1.0, (0, 0))
+    >>> bone.scale = 2
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'SegmentBone' object has no attribute 'scale'
     """
+    __slots__ = ('__position', '__color', '__thickness', '__name', '__bounds', '__id', '__version')
+    TYPE = None
+    FIELDS = ()
+    HIT_SHAPE = 'box'
+
     def __init__(self, position: tuple, color: tuple, thickness: float, name=None):
         """
         :param position: position of the bone
@@ -44,6 +75,9 @@ class Bone(ABC):
         self.__color = color
         self.__thickness = thickness
         self.__name = name
+        self.__bounds = None
+        self.__id = None
+        self.__version = next(_versions)
 
     @property
     def name(self):
@@ -55,6 +89,56 @@ class Bone(ABC):
         """
         return self.__name
 
+    @property
+    def id(self):
+        """
+        :return: string identifier of the bone which is unique inside its skeleton and is never changed,
+        states refer to bones by their identifiers, see Skeleton.add_bone()
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.add_bone(SegmentBone(10, 1, (0, 0), name='Leg'))
+        >>> skeleton.get_bone(0).id
+        '0'
+        """
+        return self.__id
+
+    @id.setter
+    def id(self, bone_id: str):
+        self.__id = bone_id
+
+    @property
+    def position(self) -> tuple:
+        return self.__position
+
+    @property
+    def color(self) -> tuple:
+        return self.__color
+
+    @property
+    def thickness(self) -> float:
+        return self.__thickness
+
+    @property
+    def bounds(self):
+        """
+        :return: (left, top, right, bottom) box which contains the bone with its thickness.
+        The box is cached until the bone is changed.
+        >>> bone = CircleBone(10, (0, 0), thickness=2.0)
+        >>> bone.bounds
+        (-11.0, -11.0, 11.0, 11.0)
+        >>> _ = bone.process_patch(dict(radius=1))
+        >>> bone.bounds
+        (-2.0, -2.0, 2.0, 2.0)
+        """
+        if self.__bounds is None:
+            self.__bounds = self.compute_bounds()
+        return self.__bounds
+
+    @abstractmethod
+    def compute_bounds(self):
+        """
+        :return: (left, top, right, bottom) box of the bone with its thickness which is cached by Bone.bounds
+        """
+
     @abstractmethod
     def process_patch(self, opts):
         """
@@ -73,8 +157,30 @@ class Bone(ABC):
             if key in opts:
                 old_values[key] = getattr(self, '_Bone__{}'.format(key))
                 setattr(self, '_Bone__{}'.format(key), opts[key])
+        self.mark_changed()
         return old_values
 
+    def mark_changed(self):
+        """
+        Drops the cached box of the bone and gives the bone a new version.
+        It has to be called after the bone is changed, not before,
+        otherwise the box computed between them from the old parameters stays in the cache.
+        """
+        self.__bounds = None
+        self.__version = next(_versions)
+
+    @property
+    def version(self):
+        """
+        :return: number which is changed every time the bone is changed
+        >>> bone = CircleBone(10, (0, 0))
+        >>> version = bone.version
+        >>> _ = bone.process_patch(dict(radius=20))
+        >>> bone.version > version
+        True
+        """
+        return self.__version
+
     @abstractmethod
     def to_dict(self):
         """
@@ -92,6 +198,45 @@ class Bone(ABC):
             res['name'] = self.__name
         return res
 
+    @classmethod
+    def from_dict(cls, params: dict):
+        """
+        :param params: dictionary with attributes of the bone, see Bone.to_dict()
+        :return: bone of the class without identifier
+        >>> SegmentBone.from_dict(fixtures.segment_bone_fixture).to_dict() == fixtures.segment_bone_fixture
+        True
+        """
+        return cls(
+            *(params[key] for key, _ in cls.FIELDS), params['position'], params['color'], params['thickness'],
+            name=params.get('name'),
+        )
+
+    @staticmethod
+    @abstractmethod
+    def shape_batch(position, params: dict):
+        """
+        Computes outlines of bones of the type by array operations over all of them, see pose_shapes().
+        The outline is the segment from start to end or the ring of the radius around start,
+        it is stroked with the thickness of the bone.
+        :param position: array of shape (..., 2) with positions of the bones
+        :param params: dictionary with an array of shape (...) for every attribute of FIELDS
+        :return: tuple (start, end, radius, ring) of arrays of shapes (..., 2), (..., 2), (...) and (...),
+        radius is zero and ring is False for segments
+        """
+
+    @staticmethod
+    @abstractmethod
+    def draw_batch(bones: list, scale=1.0, offset=(0, 0), threshold=0):
+        """
+        Makes drawing primitives of bones of the type for the canvas, see draw_bones().
+        :param bones: bones of the type
+        :param scale: number of pixels in the unit of the model
+        :param offset: position of the origin of the model on the screen, screen = model * scale + offset
+        :param threshold: minimal size of the bone in pixels
+        :return: list with a primitive or None for every bone:
+        ('line', start, end, color, width), ('circle', center, radius, color, width) or ('point', position, color)
+        """
+
 
 class SegmentBone(Bone):
     """
@@ -102,6 +247,11 @@ class SegmentBone(Bone):
     >>> bone = SegmentBone(10, 1, (0, 0), name='Leg')
     >>> assert bone.to_dict() == fixtures.segment_bone_fixture
     """
+    __slots__ = ('__length', '__rotation')
+    TYPE = 'SEGMENT'
+    FIELDS = (('length', 'Length:'), ('rotation', 'Rotation:'))
+    HIT_SHAPE = 'capsule'
+
     def __init__(self, length: float, rotation: float, position: tuple,
                  color=ProjectSettings.default_bone_color, thickness=ProjectSettings.default_bone_thickness, name=None):
         """
@@ -119,6 +269,26 @@ class SegmentBone(Bone):
         self.__rotation = rotation
         super().__init__(position, color, thickness, name)
 
+    @property
+    def length(self) -> float:
+        return self.__length
+
+    @property
+    def rotation(self) -> float:
+        return self.__rotation
+
+    @property
+    def end(self) -> tuple:
+        """
+        :return: coordinates of the second end of the segment
+        >>> SegmentBone(10, 0, (1, 2)).end
+        (11.0, 2.0)
+        """
+        return (
+            self.position[0] + self.__length * math.cos(self.__rotation),
+            self.position[1] + self.__length * math.sin(self.__rotation),
+        )
+
     def to_dict(self):
         """
         :return: dictionary with attributes of the bone.
@@ -128,9 +298,53 @@ class SegmentBone(Bone):
         res = super().to_dict()
         res['length'] = self.__length
         res['rotation'] = self.__rotation
-        res['type'] = 'SEGMENT'
+        res['type'] = self.TYPE
         return res
 
+    def compute_bounds(self):
+        """
+        >>> SegmentBone(10, 0, (0, 0), thickness=2.0).compute_bounds()
+        (-1.0, -1.0, 11.0, 1.0)
+        """
+        half = self.thickness / 2
+        x, y = self.position
+        end_x, end_y = self.end
+        return min(x, end_x) - half, min(y, end_y) - half, max(x, end_x) + half, max(y, end_y) + half
+
+    @staticmethod
+    def shape_batch(position, params: dict):
+        """
+        >>> start, end, radius, ring = SegmentBone.shape_batch(
+        ...     numpy.array([[1.0, 2.0], [0.0, 0.0]]), dict(length=numpy.array([10.0, 2.0]), rotation=numpy.zeros(2)))
+        >>> end.tolist(), radius.tolist(), ring.tolist()
+        ([[11.0, 2.0], [2.0, 0.0]], [0.0, 0.0], [False, False])
+        """
+        length, rotation = params['length'], params['rotation']
+        end = position + numpy.stack((numpy.cos(rotation), numpy.sin(rotation)), axis=-1) * length[..., None]
+        return position, end, numpy.zeros(length.shape), numpy.zeros(length.shape, dtype=bool)
+
+    @staticmethod
+    def draw_batch(bones: list, scale=1.0, offset=(0, 0), threshold=0):
+        """
+        Segments smaller than the threshold are skipped.
+        >>> SegmentBone.draw_batch([SegmentBone(10, 0, (0, 0)), SegmentBone(1, 0, (0, 0))], 2, (1, 1), threshold=3)
+        [('line', (1, 1), (21.0, 1.0), (0, 0, 0), 2.0), None]
+        """
+        result = list()
+        for bone in bones:
+            if max(bone.length, bone.thickness) * scale < threshold:
+                result.append(None)
+                continue
+            (start_x, start_y), (end_x, end_y) = bone.position, bone.end
+            result.append((
+                'line',
+                (start_x * scale + offset[0], start_y * scale + offset[1]),
+                (end_x * scale + offset[0], end_y * scale + offset[1]),
+                bone.color,
+                bone.thickness * scale,
+            ))
+        return result
+
     def process_patch(self, opts):
         """
         Method to proceed update on the bone.
@@ -149,6 +363,7 @@ class SegmentBone(Bone):
         if "rotation" in opts:
             old_values["rotation"] = self.__rotation
             self.__rotation = opts["rotation"]
+        self.mark_changed()
         return old_values
 
 
@@ -162,6 +377,11 @@ class CircleBone(Bone):
     {'position': (0, 0), 'color': (0, 0, 0), 'thickness': 1.0, 'name': 'Leg', 'radius': 10, 'type': 'CIRCLE'}
 
     """
+    __slots__ = ('__radius',)
+    TYPE = 'CIRCLE'
+    FIELDS = (('radius', 'Radius:'),)
+    HIT_SHAPE = 'circle'
+
     def __init__(self, radius: float, position: tuple,
                  color=ProjectSettings.default_bone_color, thickness=ProjectSettings.default_bone_thickness, name=None):
         """
@@ -177,6 +397,10 @@ class CircleBone(Bone):
         self.__radius = radius
         super().__init__(position, color, thickness, name)
 
+    @property
+    def radius(self) -> float:
+        return self.__radius
+
     def to_dict(self):
         """
         :return: dictionary with attributes of the bone.
@@ -186,9 +410,44 @@ class CircleBone(Bone):
         """
         res = super().to_dict()
         res['radius'] = self.__radius
-        res['type'] = 'CIRCLE'
+        res['type'] = self.TYPE
         return res
 
+    def compute_bounds(self):
+        """
+        >>> CircleBone(10, (0, 0), thickness=2.0).compute_bounds()
+        (-11.0, -11.0, 11.0, 11.0)
+        """
+        reach = self.__radius + self.thickness / 2
+        x, y = self.position
+        return x - reach, y - reach, x + reach, y + reach
+
+    @staticmethod
+    def shape_batch(position, params: dict):
+        """
+        >>> start, end, radius, ring = CircleBone.shape_batch(numpy.array([[1.0, 2.0]]), dict(radius=numpy.ones(1) * 5))
+        >>> end.tolist(), radius.tolist(), ring.tolist()
+        ([[1.0, 2.0]], [5.0], [True])
+        """
+        radius = params['radius']
+        return position, position, radius, numpy.ones(radius.shape, dtype=bool)
+
+    @staticmethod
+    def draw_batch(bones: list, scale=1.0, offset=(0, 0), threshold=0):
+        """
+        Circles smaller than the threshold are drawn as points.
+        >>> CircleBone.draw_batch([CircleBone(10, (0, 0)), CircleBone(1, (5, 5))], 2, (1, 1), threshold=3)
+        [('circle', (1, 1), 20, (0, 0, 0), 2.0), ('point', (11, 11), (0, 0, 0))]
+        """
+        result = list()
+        for bone in bones:
+            center = bone.position[0] * scale + offset[0], bone.position[1] * scale + offset[1]
+            if bone.radius * scale < threshold:
+                result.append(('point', center, bone.color))
+            else:
+                result.append(('circle', center, bone.radius * scale, bone.color, bone.thickness * scale))
+        return result
+
     def process_patch(self, opts):
         """
         Method to proceed update on the bone.
@@ -205,9 +464,135 @@ class CircleBone(Bone):
         if "radius" in opts:
             old_values["radius"] = self.__radius
             self.__radius = opts["radius"]
+        self.mark_changed()
         return old_values
 
 
+# type of the bone in its dictionary -> class of the bone
+BONE_TYPES = dict()
+
+
+def register_bone_type(cls):
+    """
+    Makes the class of bones known to serialization, editors and renderers, can be used as a class decorator.
+    :param cls: class inherited from Bone with TYPE and FIELDS
+    :return: the class
+    >>> register_bone_type(CircleBone) is CircleBone, sorted(BONE_TYPES)
+    (True, ['CIRCLE', 'SEGMENT'])
+    """
+    BONE_TYPES[cls.TYPE] = cls
+    return cls
+
+
+register_bone_type(SegmentBone)
+register_bone_type(CircleBone)
+
+
+def bone_class(bone_type: str):
+    """
+    :param bone_type: type of the bone in its dictionary, see Bone.TYPE
+    :return: registered class of bones, raises ValueError for unknown type of the bone
+    >>> bone_class('CIRCLE') is CircleBone
+    True
+    >>> bone_class('SPLINE')
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown type of the bone "SPLINE".
+    """
+    if bone_type not in BONE_TYPES:
+        raise ValueError('Unknown type of the bone "{}".'.format(bone_type))
+    return BONE_TYPES[bone_type]
+
+
+def bone_from_dict(params: dict):
+    """
+    Creates a bone from its dictionary, see Bone.to_dict().
+    :param params: dictionary with attributes of the bone and optionally its identifier
+    :return: bone of the registered type, raises ValueError for unknown type of the bone
+    >>> bone_from_dict(fixtures.segment_bone_fixture).to_dict() == fixtures.segment_bone_fixture
+    True
+    """
+    bone = bone_class(params['type']).from_dict(params)
+    bone.id = params.get('id')
+    return bone
+
+
+def pose_shapes(poses: list):
+    """
+    Packs parameters of the bones into arrays and computes their outlines, see Bone.shape_batch().
+    The kernel of every type is called once for the bones of the type in all frames.
+    :param poses: list with parameters of the bones of every frame, see Bone.to_dict(),
+    types of the bones are the same in all frames
+    :return: dictionary of arrays with shapes (frames, bones, ...): start, end, radius, ring, thickness and color,
+    raises ValueError for unknown type of the bone
+    >>> shapes = pose_shapes([
+    ...     [{'position': (0, 0), 'color': (0, 0, 0), 'thickness': 2.0, 'length': 10, 'rotation': 0, 'type': 'SEGMENT'},
+    ...      {'position': (5, 5), 'color': (255, 0, 0), 'thickness': 0.0, 'radius': 2, 'type': 'CIRCLE'}],
+    ... ])
+    >>> shapes['end'].tolist(), shapes['radius'].tolist(), shapes['ring'].tolist(), shapes['color'][0, 1].tolist()
+    ([[[10.0, 0.0], [5.0, 5.0]]], [[0.0, 2.0]], [[False, True]], [255.0, 0.0, 0.0])
+    """
+    frames, count = len(poses), len(poses[0]) if poses else 0
+
+    def column(bones, key, *shape):
+        return numpy.array([[params[key] for params in pose] for pose in bones], dtype=float).reshape(
+            frames, len(bones[0]) if bones else 0, *shape
+        )
+
+    shapes = dict(
+        start=numpy.zeros((frames, count, 2)),
+        end=numpy.zeros((frames, count, 2)),
+        radius=numpy.zeros((frames, count)),
+        ring=numpy.zeros((frames, count), dtype=bool),
+        thickness=column(poses, 'thickness'),
+        color=column(poses, 'color', 3),
+    )
+    groups = dict()
+    for idx, params in enumerate(poses[0] if poses else ()):
+        groups.setdefault(bone_class(params['type']), list()).append(idx)
+    for cls, indexes in groups.items():
+        bones = [[pose[idx] for idx in indexes] for pose in poses]
+        outline = cls.shape_batch(column(bones, 'position', 2), {key: column(bones, key) for key, _ in cls.FIELDS})
+        for key, value in zip(('start', 'end', 'radius', 'ring'), outline):
+            shapes[key][:, indexes] = value
+    return shapes
+
+
+def draw_bones(bones: list, scale=1.0, offset=(0, 0), threshold=0):
+    """
+    Makes drawing primitives of the bones for the canvas, bones are grouped by type
+    and draw_batch() of every type is called once for its group.
+    :param bones: list of bones
+    :param scale: number of pixels in the unit of the model
+    :param offset: position of the origin of the model on the screen, screen = model * scale + offset
+    :param threshold: minimal size of the bone in pixels
+    :return: list with a primitive or None for every bone in order of bones, see Bone.draw_batch()
+    >>> primitives = draw_bones([CircleBone(2, (0, 0)), SegmentBone(4, 0, (0, 0)), CircleBone(3, (1, 1))], scale=2)
+    >>> [primitive[0] for primitive in primitives], primitives[2]
+    (['circle', 'line', 'circle'], ('circle', (2, 2), 6, (0, 0, 0), 2.0))
+    """
+    groups = dict()
+    for idx, bone in enumerate(bones):
+        groups.setdefault(type(bone), list()).append(idx)
+    result = [None] * len(bones)
+    for cls, indexes in groups.items():
+        for idx, primitive in zip(indexes, cls.draw_batch([bones[idx] for idx in indexes], scale, offset, threshold)):
+            result[idx] = primitive
+    return result
+
+
+def draw_pose(pose: list, scale=1.0, offset=(0, 0), threshold=0):
+    """
+    Makes drawing primitives of the pose given by dictionaries of the bones, see draw_bones().
+    :param pose: list with parameters of the bones, see Bone.to_dict()
+    :return: list with a primitive or None for every bone, raises ValueError for unknown type of the bone
+    >>> draw_pose([{'position': (0, 0), 'color': (0, 0, 0), 'thickness': 1.0, 'length': 10, 'rotation': 0,
+    ...             'type': 'SEGMENT'}], scale=2, offset=(1, 1))
+    [('line', (1, 1), (21.0, 1.0), (0, 0, 0), 2.0)]
+    """
+    return draw_bones([bone_from_dict(params) for params in pose], scale, offset, threshold)
+
+
 class Skeleton:
     """
     Skeleton is a named set of bones.
@@ -222,17 +607,21 @@ class Skeleton:
         - load from the hard drive
     >>> skeleton = Skeleton(name='Vasiliy')
     >>> skeleton.to_dict()
-    {'name': 'Vasiliy', 'bones': []}
+    {'name': 'Vasiliy', 'bones': [], 'next_bone_id': 0}
     """
     def __init__(self, name=None):
         """
         :param name: name of the skeleton
         >>> skeleton = Skeleton(name='Vasiliy')
         >>> skeleton.to_dict()
-        {'name': 'Vasiliy', 'bones': []}
+        {'name': 'Vasiliy', 'bones': [], 'next_bone_id': 0}
         """
         self.__name = name if name else 'skeleton_{}'.format(str(int(time())))
         self.__bones = list()
+        # index of every bone by its identifier
+        self.__indexes = dict()
+        self.__next_id = 0
+        self.__version = next(_versions)
 
     @property
     def number_of_bones(self):
@@ -258,8 +647,28 @@ class Skeleton:
         """
         return self.__name
 
+    @property
+    def version(self):
+        """
+        Versions let caches skip unchanged skeletons without comparing their content.
+        :return: number which is changed every time the skeleton or one of its bones is changed
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.add_bone(CircleBone(10, (0, 0), name='Head'))
+        >>> versions = [skeleton.version]
+        >>> skeleton.update_bone(0, dict(radius=20))
+        >>> versions.append(skeleton.version)
+        >>> skeleton.remove_bone(0)
+        >>> versions.append(skeleton.version)
+        >>> versions == sorted(set(versions))
+        True
+        """
+        return max([self.__version] + [bone.version for bone in self.__bones])
+
     def add_bone(self, bone: Bone):
         """
+        Adds the bone to the end of the skeleton.
+        The bone keeps its identifier if it is not used by other bones, otherwise it gets a new one.
+        Identifiers are never reused, so states keep updates of removed bones without applying them to new bones.
         :param bone: bone that should be added
         >>> skeleton = Skeleton(name='Vasiliy')
         >>> bone = CircleBone(10, (0, 0), name='Leg')
@@ -268,10 +677,20 @@ class Skeleton:
         >>> skeleton.add_bone(bone)
         >>> skeleton.number_of_bones
         2
+        >>> skeleton.remove_bone(1)
+        >>> skeleton.add_bone(SegmentBone(10, 1, (1, 1)))
+        >>> skeleton.get_bone(1).id, skeleton.index_of('2'), skeleton.index_of('1')
+        ('2', 1, None)
         """
         if not bone.name:
             bone.process_patch(dict(name='{}_bone_{}'.format(self.name, self.number_of_bones)))
+        if bone.id is None or bone.id in self.__indexes:
+            bone.id = str(self.__next_id)
+        if bone.id.isdigit():
+            self.__next_id = max(self.__next_id, int(bone.id) + 1)
+        self.__indexes[bone.id] = len(self.__bones)
         self.__bones.append(bone)
+        self.__version = next(_versions)
 
     def remove_bone(self, idx: int):
         """
@@ -296,7 +715,11 @@ class Skeleton:
         0
         """
         if idx < self.number_of_bones:
-            self.__bones.pop(idx)
+            bone = self.__bones.pop(idx)
+            del self.__indexes[bone.id]
+            for i in range(idx, len(self.__bones)):
+                self.__indexes[self.__bones[i].id] = i
+            self.__version = next(_versions)
         else:
             raise IndexError(
                 'Skeleton does not have a bone with index {}. It has only {} bones.'.format(idx, self.number_of_bones)
@@ -326,6 +749,13 @@ class Skeleton:
                 'Skeleton does not have a bone with index {}. It has only {} bones.'.format(idx, self.number_of_bones)
             )
 
+    def index_of(self, bone_id: str):
+        """
+        :param bone_id: identifier of the bone, see Bone.id
+        :return: index of the bone, None if the skeleton has no such bone
+        """
+        return self.__indexes.get(bone_id)
+
     def get_bone(self, idx):
         """
         :param idx: index of the bone
@@ -364,7 +794,8 @@ class Skeleton:
         """
         return dict(
             name=self.__name,
-            bones=[bone.to_dict() for bone in self.__bones],
+            bones=[dict(bone.to_dict(), id=bone.id) for bone in self.__bones],
+            next_bone_id=self.__next_id,
         )
 
     def process_patch(self, opts):
@@ -378,12 +809,13 @@ class Skeleton:
         {'name': 'Vasiliy'}
 
         >>> skeleton.to_dict()
-        {'name': 'Ivan', 'bones': []}
+        {'name': 'Ivan', 'bones': [], 'next_bone_id': 0}
         """
         old_values = dict()
         if "name" in opts:
             old_values["name"] = self.__name
             self.__name = opts["name"]
+            self.__version = next(_versions)
         return old_values
 
     def load(self, path_to_project_dir):
@@ -403,37 +835,51 @@ class Skeleton:
         """
         try:
             with open(os.path.join(path_to_project_dir, ProjectSettings.skeletons_dir, self.name), 'r') as file:
-                data = json.load(file)
-                self.__name = data['name']
-                self.__bones = list()
-                for bone in data['bones']:
-                    if bone['type'] == 'SEGMENT':
-                        self.__bones.append(SegmentBone(
-                            bone['length'],
-                            bone['rotation'],
-                            bone['position'],
-                            bone['color'],
-                            bone['thickness'],
-                            name=bone['name'] if 'name' in bone else '{}_bone_{}'.format(
-                                self.name,
-                                self.number_of_bones
-                            ),
-                        ))
-                    elif bone['type'] == 'CIRCLE':
-                        self.__bones.append(CircleBone(
-                            bone['radius'],
-                            bone['position'],
-                            bone['color'],
-                            bone['thickness'],
-                            name=bone['name'] if 'name' in bone else '{}_bone_{}'.format(
-                                self.name,
-                                self.number_of_bones
-                            ),
-                        ))
-
+                self.load_dict(json.load(file))
         except FileNotFoundError:
             raise FileNotFoundError('File for skeleton "{}" was not found.'.format(self.__name))
 
+    def load_dict(self, data: dict):
+        """
+        Replaces the skeleton with the one described by the dictionary.
+        Bones of files saved before identifiers were introduced get their indexes as identifiers,
+        so positional updates of old states refer to the same bones.
+        :param data: dictionary with attributes of the skeleton, see Skeleton.to_dict()
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.load_dict(fixtures.skeleton_to_dict_fixture)
+        >>> assert skeleton.to_dict() == fixtures.skeleton_to_dict_fixture
+        >>> skeleton.load_dict({'name': 'Vasiliy', 'bones': [dict(fixtures.segment_bone_fixture)]})
+        >>> skeleton.get_bone(0).id, skeleton.to_dict()['next_bone_id']
+        ('0', 1)
+        """
+        self.__name = data['name']
+        self.__bones = list()
+        self.__indexes = dict()
+        self.__next_id = data.get('next_bone_id', 0)
+        self.__version = next(_versions)
+        for idx, bone in enumerate(data['bones']):
+            self.add_bone(bone_from_dict(dict(bone, id=bone.get('id', str(idx)))))
+
+    def interpolate(self, other, t: float):
+        """
+        Creates a skeleton with bones interpolated between this skeleton and other one.
+        :param other: skeleton with the same bones
+        :param t: interpolation factor, 0 gives this skeleton and 1 gives other one
+        :return: new Skeleton
+        >>> first = Skeleton(name='Vasiliy')
+        >>> first.add_bone(CircleBone(10, (0, 0), name='Head'))
+        >>> second = Skeleton(name='Vasiliy')
+        >>> second.add_bone(CircleBone(20, (10, 0), name='Head'))
+        >>> first.interpolate(second, 0.25).to_dict()
+        {'name': 'Vasiliy', 'bones': [{'position': (2.5, 0.0), 'color': (0, 0, 0), 'thickness': 1.0, \
+'name': 'Head', 'radius': 12.5, 'type': 'CIRCLE', 'id': '0'}], 'next_bone_id': 1}
+        """
+        result = Skeleton(name=self.__name)
+        for first, second in zip(self.__bones, other.__bones):
+            result.add_bone(bone_from_dict(dict(interpolate_params(first.to_dict(), second.to_dict(), t), id=first.id)))
+        result.__next_id = self.__next_id
+        return result
+
     def save(self, path_to_project_dir):
         """
         Saves a skeleton to the file inside "skeletons" directory inside the project directory.
@@ -454,15 +900,28 @@ class Skeleton:
 class SkeletonState:
     """
     Update for a skeleton.
-    Updates is a dict of update for bones of the skeleton. Keys are indexes of the bones.
+    Updates is a dict of update for bones of the skeleton. Keys are identifiers of the bones, see Bone.id,
+    so adding and removing bones of the skeleton does not change the states.
     Update for the bone is a dictionary with parameters to change as keys and parameter's new values as values.
     >>> SkeletonState().to_dict()
     {'skeleton_name': None, 'bone_updates': {}}
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> for name in ('Head', 'Body', 'Leg'):
+    ...     skeleton.add_bone(CircleBone(10, (0, 0), name=name))
+    >>> state = SkeletonState()
+    >>> state.set_skeleton(skeleton)
+    >>> _ = state.process_patch({2: dict(radius=20)})
+    >>> skeleton.remove_bone(0)
+    >>> state.set_skeleton(skeleton)
+    >>> state.get_skeleton().get_bone(1).to_dict()['radius'], state.to_dict()['bone_updates']
+    (20, {'2': {'radius': 20}})
     """
     def __init__(self, skeleton=None, updates=None):
         """
         :param skeleton: skeleton for which updates are for
-        :param updates: list of dictionaries with updates, see Skeleton.update_bone()
+        :param updates: dictionary with updates by identifiers of the bones, see Skeleton.update_bone().
+        Updates can also be given by indexes of the bones: as a list or as a dictionary with integer keys,
+        such updates are bound to the identifiers when the state gets its skeleton.
         >>> SkeletonState().to_dict()
         {'skeleton_name': None, 'bone_updates': {}}
         >>> skeleton = Skeleton(name='Vasiliy')
@@ -470,10 +929,32 @@ class SkeletonState:
         >>> SkeletonState(skeleton).to_dict()
         {'skeleton_name': 'Vasiliy', 'bone_updates': {}}
         >>> SkeletonState(skeleton, {0: dict(length=20)}).to_dict()
-        {'skeleton_name': 'Vasiliy', 'bone_updates': {0: {'length': 20}}}
+        {'skeleton_name': 'Vasiliy', 'bone_updates': {'0': {'length': 20}}}
+        >>> SkeletonState(updates=[dict(), dict(length=20)]).to_dict()
+        {'skeleton_name': None, 'bone_updates': {1: {'length': 20}}}
         """
-        self.__updates = updates if updates else dict()
         self.__skeleton = skeleton
+        self.__updates = self.__bind_updates(updates)
+        self.__version = 0
+
+    def __bind_updates(self, updates):
+        """
+        :param updates: updates by identifiers or by indexes of the bones
+        :return: dictionary with updates by identifiers, indexes are kept if there is no skeleton
+        """
+        if not updates:
+            return dict()
+        items = updates.items() if isinstance(updates, dict) else enumerate(updates)
+        result = dict()
+        for key, update in items:
+            if not isinstance(key, int):
+                result[key] = update
+            elif update:
+                if self.__skeleton is None:
+                    result[key] = update
+                elif key < self.__skeleton.number_of_bones:
+                    result[self.__skeleton.get_bone(key).id] = update
+        return result
 
     @property
     def skeleton_name(self):
@@ -486,6 +967,25 @@ class SkeletonState:
         """
         return self.__skeleton.name if self.__skeleton else None
 
+    @property
+    def skeleton(self):
+        """
+        :return: skeleton of the animation, states have their own copies of it
+        """
+        return self.__skeleton
+
+    @property
+    def version(self):
+        """
+        :return: number which is changed every time the skeleton of the state is changed
+        >>> state = SkeletonState()
+        >>> version = state.version
+        >>> state.set_skeleton(Skeleton(name='Vasiliy'))
+        >>> state.version != version
+        True
+        """
+        return self.__version
+
     def set_skeleton(self, skeleton: Skeleton):
         """
         Sets a skeleton for the state
@@ -497,6 +997,7 @@ class SkeletonState:
         'Vasiliy'
         """
         self.__skeleton = copy.deepcopy(skeleton)
+        self.__updates = self.__bind_updates(self.__updates)
         self.apply()
 
     def get_skeleton(self):
@@ -511,6 +1012,7 @@ class SkeletonState:
     def apply(self):
         """
         Applies updates of that state to the skeleton.
+        Updates of bones which are not in the skeleton are kept, but not applied.
         :return: None
         >>> skeleton = Skeleton(name="Ivan_Vasil'evich")
         >>> skeleton.load('TestProject')
@@ -520,8 +1022,11 @@ class SkeletonState:
         >>> fixture['bones'][9]['radius'] = 100
         >>> assert fixture == state.get_skeleton().to_dict()
         """
-        for bone_idx in range(len(self.__updates)):
-            self.__skeleton.update_bone(bone_idx, self.__updates[bone_idx])
+        for bone_id, update in self.__updates.items():
+            idx = self.__skeleton.index_of(bone_id)
+            if idx is not None:
+                self.__skeleton.update_bone(idx, update)
+        self.__version += 1
 
     def to_dict(self):
         """
@@ -529,7 +1034,7 @@ class SkeletonState:
         >>> skeleton = Skeleton(name='Vasiliy')
         >>> skeleton.add_bone(SegmentBone(10, 1, (0, 0), name='Leg'))
         >>> SkeletonState(skeleton, {0: dict(length=20)}).to_dict()
-        {'skeleton_name': 'Vasiliy', 'bone_updates': {0: {'length': 20}}}
+        {'skeleton_name': 'Vasiliy', 'bone_updates': {'0': {'length': 20}}}
         """
         return dict(
             skeleton_name=self.skeleton_name,
@@ -538,7 +1043,7 @@ class SkeletonState:
 
     def process_patch(self, opts):
         old_values = self.__updates
-        self.__updates = opts
+        self.__updates = self.__bind_updates(opts)
         self.apply()
         return old_values
 
@@ -564,13 +1069,43 @@ class Animation:
         >>> skeleton = Skeleton(name='Vasiliy')
         >>> animation = Animation(skeleton, 'Dancing')
         >>> animation.to_dict()
-        {'name': 'Dancing', 'skeleton_name': 'Vasiliy', 'states': [], 'transitions': []}
+        {'name': 'Dancing', 'skeleton_name': 'Vasiliy', 'states': [], 'transitions': [], 'easings': [], \
+'loop_transition': 1.0, 'loop_easing': None}
         """
         self.__name = name if name else 'animation_{}'.format(str(int(time())))
         self.__skeleton = skeleton
-        self.__states, self.__transitions = list(), list()
+        self.__states, self.__transitions, self.__easings = list(), list(), list()
+        self.__loop_transition = ProjectSettings.loop_transition_time
+        self.__loop_easing = None
+        # start times of the states, see Animation.timeline
+        self.__timeline = None
 
     def process_patch(self, opts):
+        """
+        Changes the animation, timing is checked before anything is changed.
+        :param opts: dictionary with new values of the attributes
+        :return: old values as dictionary, raises ValueError if the animation could not be played with new timing
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, 'Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.process_patch(dict(name='Walking', loop_transition=0))
+        Traceback (most recent call last):
+        ...
+        ValueError: Time of the loop transition has to be positive, got 0.
+        >>> animation.process_patch(dict(transitions=[1.0], easings=['linear', 'linear']))
+        Traceback (most recent call last):
+        ...
+        ValueError: Animation has 1 transitions, but 2 easings.
+        >>> animation.name, animation.process_patch(dict(transitions=[2.0], easings=['steps(2)']))['transitions']
+        ('Dancing', [1.0])
+        """
+        self.__check_timing(
+            len(self.__states),
+            opts.get("transitions", self.__transitions),
+            opts.get("easings", self.__easings),
+            opts.get("loop_transition", self.__loop_transition),
+        )
         old_values = dict()
         if "name" in opts:
             old_values["name"] = self.__name
@@ -581,8 +1116,40 @@ class Animation:
         if "transitions" in opts:
             old_values["transitions"] = self.__transitions
             self.__transitions = opts["transitions"]
+            self.__timeline = None
+        if "easings" in opts:
+            for spec in opts["easings"]:
+                get_easing(spec)
+            old_values["easings"] = self.__easings
+            self.__easings = opts["easings"]
+        if "loop_transition" in opts:
+            old_values["loop_transition"] = self.__loop_transition
+            self.__loop_transition = opts["loop_transition"]
+        if "loop_easing" in opts:
+            if opts["loop_easing"] is not None:
+                get_easing(opts["loop_easing"])
+            old_values["loop_easing"] = self.__loop_easing
+            self.__loop_easing = opts["loop_easing"]
         return old_values
 
+    @staticmethod
+    def __check_timing(number_of_states: int, transitions, easings, loop_transition):
+        """
+        Raises ValueError if the animation with the timing could not be played:
+        playback divides by the time of the loop and takes the easing of every transition.
+        """
+        if len(transitions) != max(number_of_states - 1, 0):
+            raise ValueError('Animation with {} states needs {} transitions, got {}.'.format(
+                number_of_states, max(number_of_states - 1, 0), len(transitions)
+            ))
+        if len(easings) != len(transitions):
+            raise ValueError('Animation has {} transitions, but {} easings.'.format(len(transitions), len(easings)))
+        for transition in transitions:
+            if transition < 0:
+                raise ValueError('Time of the transition can not be negative, got {}.'.format(transition))
+        if loop_transition <= 0:
+            raise ValueError('Time of the loop transition has to be positive, got {}.'.format(loop_transition))
+
     @property
     def name(self):
         """
@@ -601,6 +1168,16 @@ class Animation:
         """
         return self.__skeleton.name if self.__skeleton else None
 
+    @property
+    def skeleton(self):
+        """
+        :return: skeleton which is the animation for, states have their own copies of it
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> Animation(skeleton=skeleton).skeleton is skeleton
+        True
+        """
+        return self.__skeleton
+
     @property
     def number_of_states(self):
         """
@@ -629,10 +1206,12 @@ class Animation:
         for state in self.__states:
             state.set_skeleton(skeleton)
 
-    def add_state(self, state: SkeletonState, transition_time=ProjectSettings.default_transition_time):
+    def add_state(self, state: SkeletonState, transition_time=ProjectSettings.default_transition_time,
+                  easing=ProjectSettings.default_easing):
         """
         :param state: state to be added
         :param transition_time: transition time before state if state is not first
+        :param easing: easing curve of the transition before state, see easing.get_easing()
         :return: None
         >>> skeleton = Skeleton(name='Vasiliy')
         >>> state_1 = SkeletonState(skeleton)
@@ -649,6 +1228,63 @@ class Animation:
         else:
             self.__states.append(state)
             self.__transitions.append(transition_time)
+            self.__easings.append(easing)
+        self.__timeline = None
+
+    @property
+    def transitions(self):
+        """
+        :return: tuple with transition times, i-th transition leads to the state with index i + 1
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 0.5)
+        >>> animation.transitions
+        (0.5,)
+        """
+        return tuple(self.__transitions)
+
+    @property
+    def easings(self):
+        """
+        :return: tuple with easing curves of the transitions, see easing.get_easing()
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 0.5, 'ease-in')
+        >>> animation.easings
+        ('ease-in',)
+        """
+        return tuple(self.__easings)
+
+    def insert_state(self, idx: int, state: SkeletonState, transition_time=ProjectSettings.default_transition_time,
+                     easing=ProjectSettings.default_easing):
+        """
+        :param idx: index which the state will have after insertion
+        :param state: state to be inserted
+        :param transition_time: transition time before state if state is not first
+        :param easing: easing curve of the transition before state
+        :return: raises IndexError if idx > number of states
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 3)
+        >>> animation.insert_state(1, SkeletonState(skeleton), 2)
+        >>> animation.number_of_states, animation.transitions
+        (3, (2, 3))
+        >>> animation.insert_state(12, SkeletonState(skeleton))
+        Traceback (most recent call last):
+        ...
+        IndexError: Animation does not have a state with index 12.
+        """
+        if idx > len(self.__states):
+            raise IndexError('Animation does not have a state with index {}.'.format(idx))
+        state.set_skeleton(self.__skeleton)
+        self.__states.insert(idx, state)
+        if len(self.__states) > 1:
+            self.__transitions.insert(max(idx - 1, 0), transition_time)
+            self.__easings.insert(max(idx - 1, 0), easing)
+        self.__timeline = None
 
     def update_state(self, idx: int, state: SkeletonState):
         """
@@ -695,6 +1331,11 @@ class Animation:
             self.__states.pop(idx)
             if idx > 0:
                 self.__transitions.pop(idx - 1)
+                self.__easings.pop(idx - 1)
+            elif self.__transitions:
+                self.__transitions.pop(0)
+                self.__easings.pop(0)
+            self.__timeline = None
         else:
             raise IndexError('Animation does not have a state with index {}.'.format(idx))
 
@@ -734,11 +1375,197 @@ class Animation:
         >>> assert animation.to_dict() == fixtures.animation_with_changed_transition
         """
         if state_id < len(self.__states) and state_id != 0:
+            if transition_time < 0:
+                raise ValueError('Time of the transition can not be negative, got {}.'.format(transition_time))
             self.__transitions.pop(state_id - 1)
             self.__transitions.insert(state_id - 1, transition_time)
+            self.__timeline = None
+        else:
+            raise IndexError('Animation does not have a state with index {}.'.format(state_id))
+
+    def change_easing(self, state_id: int, easing=ProjectSettings.default_easing):
+        """
+        :param state_id: index of the state which is the end of the transition
+        :param easing: easing curve of the transition, see easing.get_easing()
+        :return: raises IndexError if idx >= number of states
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.change_easing(1, 'steps(4)')
+        >>> animation.easings
+        ('steps(4)',)
+        >>> animation.change_easing(1, 'wobble')
+        Traceback (most recent call last):
+        ...
+        ValueError: Unknown easing "wobble".
+        """
+        if state_id < len(self.__states) and state_id != 0:
+            get_easing(easing)
+            self.__easings[state_id - 1] = easing
         else:
             raise IndexError('Animation does not have a state with index {}.'.format(state_id))
 
+    @property
+    def duration(self):
+        """
+        :return: time in seconds from the first state to the last one
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 0.5)
+        >>> animation.add_state(SkeletonState(skeleton), 0.25)
+        >>> animation.duration
+        0.75
+        """
+        return self.timeline[-1]
+
+    @property
+    def timeline(self):
+        """
+        :return: tuple with start times of the states in seconds, it is cached until transitions are changed
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 0.5)
+        >>> animation.add_state(SkeletonState(skeleton), 0.25)
+        >>> animation.timeline
+        (0, 0.5, 0.75)
+        """
+        if self.__timeline is None:
+            self.__timeline = tuple(itertools.accumulate(self.__transitions, initial=0))
+        return self.__timeline
+
+    @property
+    def loop_transition(self):
+        """
+        :return: time in seconds from the last state to the first one during the loop playback
+        """
+        return self.__loop_transition
+
+    @property
+    def loop_easing(self):
+        """
+        :return: easing curve from the last state to the first one during the loop playback,
+        None if the last state is kept until the animation starts again
+        """
+        return self.__loop_easing
+
+    def seek(self, time_point: float):
+        """
+        Finds the transition at the moment by binary search in the timeline.
+        :param time_point: time in seconds from the first state
+        :return: tuple (index of the state, linear progress of the transition after the state from 0 to 1),
+        progress is 0 at the moments of the states and outside of the animation
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 0.5)
+        >>> animation.add_state(SkeletonState(skeleton), 0)
+        >>> animation.add_state(SkeletonState(skeleton), 1.0)
+        >>> [animation.seek(t) for t in (-1, 0.25, 0.5, 1.0, 2)]
+        [(0, 0.0), (0, 0.5), (2, 0.0), (2, 0.5), (3, 0.0)]
+        """
+        timeline = self.timeline
+        idx = bisect.bisect_right(timeline, time_point) - 1
+        if idx < 0:
+            return 0, 0.0
+        if idx >= len(timeline) - 1:
+            return len(timeline) - 1, 0.0
+        return idx, (time_point - timeline[idx]) / self.__transitions[idx]
+
+    @property
+    def loop_duration(self):
+        """
+        :return: time in seconds of one loop of playback: the animation and the pause before it starts again
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 0.5)
+        >>> animation.loop_duration
+        1.5
+        """
+        return self.duration + self.__loop_transition
+
+    def local_time(self, time_point: float, mode=CLAMP):
+        """
+        :param time_point: time in seconds from the start of the playback
+        :param mode: CLAMP keeps the time, LOOP repeats the animation with the loop transition,
+        PINGPONG plays the animation forward and backward
+        :return: time in seconds from the first state, it is in the loop transition after the animation for LOOP
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> animation = Animation(skeleton, name='Dancing')
+        >>> animation.add_state(SkeletonState(skeleton))
+        >>> animation.add_state(SkeletonState(skeleton), 2.0)
+        >>> [animation.local_time(t, mode) for mode in (CLAMP, LOOP, PINGPONG) for t in (2.5, 3.5)]
+        [2.5, 3.5, 2.5, 0.5, 1.5, 0.5]
+        >>> animation.local_time(1, 'bounce')
+        Traceback (most recent call last):
+        ...
+        ValueError: Unknown playback mode "bounce".
+        """
+        if mode == CLAMP:
+            return time_point
+        if mode == LOOP:
+            return time_point % self.loop_duration if self.loop_duration > 0 else 0
+        if mode == PINGPONG:
+            if self.duration <= 0:
+                return 0
+            time_point %= 2 * self.duration
+            return time_point if time_point <= self.duration else 2 * self.duration - time_point
+        raise ValueError('Unknown playback mode "{}".'.format(mode))
+
+    def pose_at(self, time_point: float, mode=CLAMP):
+        """
+        Evaluates the skeleton at the moment of the animation.
+        The pose is interpolated between two neighbour states with easing of the transition,
+        the transition is found by Animation.seek().
+        Time outside of the animation is clamped or wrapped according to the mode, see Animation.local_time().
+        Skeleton of the state itself is returned at the moments of the states, so result should not be changed.
+        :param time_point: time in seconds from the first state
+        :param mode: CLAMP, LOOP or PINGPONG
+        :return: Skeleton, None if the animation has no states
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.add_bone(SegmentBone(10, 0, (0, 0), name='Leg'))
+        >>> animation = Animation(skeleton, name='Walking')
+        >>> animation.add_state(SkeletonState(skeleton, {0: dict(length=10)}))
+        >>> animation.add_state(SkeletonState(skeleton, {0: dict(length=20)}), 1.0)
+        >>> animation.add_state(SkeletonState(skeleton, {0: dict(length=40)}), 2.0, 'steps(2)')
+        >>> [animation.pose_at(t).get_bone(0).to_dict()['length'] for t in (-1, 0.5, 1, 1.5, 2.5, 3, 10)]
+        [10, 15.0, 20, 20.0, 30.0, 40, 40]
+        >>> _ = animation.process_patch(dict(loop_transition=2.0, loop_easing='linear'))
+        >>> [animation.pose_at(t, LOOP).get_bone(0).to_dict()['length'] for t in (3.5, 4, 5.5)]
+        [32.5, 25.0, 15.0]
+        """
+        if not self.__states:
+            return None
+        time_point = self.local_time(time_point, mode)
+        if time_point > self.duration and self.__loop_easing is not None and self.__loop_transition > 0:
+            t = get_easing(self.__loop_easing)((time_point - self.duration) / self.__loop_transition)
+            return self.__states[-1].get_skeleton().interpolate(self.__states[0].get_skeleton(), t)
+        idx, progress = self.seek(time_point)
+        if progress <= 0:
+            return self.__states[idx].get_skeleton()
+        t = get_easing(self.__easings[idx])(progress)
+        return self.__states[idx].get_skeleton().interpolate(self.__states[idx + 1].get_skeleton(), t)
+
+    def sample(self, times, mode=CLAMP, rate=1.0):
+        """
+        Evaluates the animation at many moments, for example for scrubbing or export.
+        :param times: iterable with times in seconds from the start of the playback
+        :param mode: CLAMP, LOOP or PINGPONG, see Animation.local_time()
+        :param rate: speed of the playback, negative rate plays the animation backward
+        :return: list of Skeletons, see Animation.pose_at()
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.add_bone(CircleBone(10, (0, 0), name='Head'))
+        >>> animation = Animation(skeleton, name='Breathing')
+        >>> animation.add_state(SkeletonState(skeleton, {0: dict(radius=10)}))
+        >>> animation.add_state(SkeletonState(skeleton, {0: dict(radius=20)}), 1.0)
+        >>> [pose.get_bone(0).radius for pose in animation.sample([0, 0.5, 1, 1.5], PINGPONG, rate=2)]
+        [10, 20, 10, 20]
+        """
+        return [self.pose_at(time_point * rate, mode) for time_point in times]
+
     def to_dict(self):
         """
         :return: dictionary with attributes of the animation.
@@ -756,6 +1583,9 @@ class Animation:
             skeleton_name=self.skeleton_name,
             states=[state.to_dict() for state in self.__states],
             transitions=self.__transitions,
+            easings=self.__easings,
+            loop_transition=self.__loop_transition,
+            loop_easing=self.__loop_easing,
         )
 
     def load(self, path_to_project_dir):
@@ -775,13 +1605,38 @@ class Animation:
         """
         try:
             with open(os.path.join(path_to_project_dir, ProjectSettings.animations_dir, self.name), 'r') as file:
-                data = json.load(file)
-                self.__states = [SkeletonState(updates=state['bone_updates']) for state in data['states']]
-                self.__transitions = data['transitions']
-                return data['skeleton_name']
+                return self.load_dict(json.load(file))
         except FileNotFoundError:
             raise FileNotFoundError('File for animation "{}" was not found.'.format(self.__name))
 
+    def load_dict(self, data: dict):
+        """
+        Replaces states and transitions of the animation with the ones described by the dictionary.
+        States are not bound to a skeleton, see Animation.set_skeleton().
+        :param data: dictionary with attributes of the animation, see Animation.to_dict()
+        :return: name of the skeleton
+        >>> animation = Animation(name='Dancing')
+        >>> animation.load_dict(fixtures.animation_with_one_state_fixture)
+        'Vasiliy'
+        >>> animation.number_of_states
+        1
+        >>> animation.load_dict(dict(fixtures.animation_with_one_state_fixture, loop_transition=-1))
+        Traceback (most recent call last):
+        ...
+        ValueError: Time of the loop transition has to be positive, got -1.
+        """
+        transitions = data['transitions']
+        easings = data.get('easings', [ProjectSettings.default_easing] * len(transitions))
+        loop_transition = data.get('loop_transition', ProjectSettings.loop_transition_time)
+        self.__check_timing(len(data['states']), transitions, easings, loop_transition)
+        self.__states = [SkeletonState(updates=state['bone_updates']) for state in data['states']]
+        self.__transitions = transitions
+        self.__easings = easings
+        self.__loop_transition = loop_transition
+        self.__loop_easing = data.get('loop_easing')
+        self.__timeline = None
+        return data['skeleton_name']
+
     def save(self, path_to_project_dir):
         """
         Saves an animation to the file inside "animations" directory inside the project directory.
@@ -793,8 +1648,12 @@ class Animation:
             json.dump(self.to_dict(), file, indent=2)
 
     def get_transition_time(self, idx):
+        """
+        :param idx: index of the state which is the end of the transition, 0 for the loop transition
+        :return: time of the transition in milliseconds
+        """
         if idx == 0:
-            return 1000
+            return int(self.__loop_transition * 1000)
         return int(self.__transitions[idx - 1] * 1000)
 
 
@@ -802,14 +1661,28 @@ class Project:
     """
     Main class of the project.
     Contains lists of entities (skeletons and animations).
+    Skeletons can be references to the shared library, such skeletons are not saved
+    into the directory of the project, the file with references is saved instead.
+    A shared skeleton of the library is never changed: the project takes its own copy before the first change,
+    see Project.editable(), and publishes the changed copy as a new version of the library when it is saved.
     """
 
-    def __init__(self):
+    def __init__(self, shared_skeletons=True):
+        """
+        :param shared_skeletons: use skeletons of the library shared by all projects, otherwise their copies
+        """
         self.active_element = self
+        self.path = None
 
         self.__skeletons = list()
         self.__animations = list()
         self.__views = list()
+        # list of [skeleton, dictionary with library, id and version of the skeleton,
+        # shared skeleton of the library or None if the skeleton is a copy of the project]
+        self.__references = list()
+        self.__shared_skeletons = shared_skeletons
+        # id of the element -> (element, address), see Project.address_of()
+        self.__addresses = dict()
 
     def has_skeleton(self, name: str):
         return any(name == skeleton.name for skeleton in self.__skeletons)
@@ -843,11 +1716,104 @@ class Project:
 
     def remove_skeleton(self, skeleton_id: int):
         if skeleton_id < self.number_of_skeletons:
-            self.__skeletons.pop(skeleton_id)
+            skeleton = self.__skeletons.pop(skeleton_id)
+            self.__references = [reference for reference in self.__references if reference[0] is not skeleton]
         else:
             raise IndexError('Project does not have a skeleton with index {}. '
                              'It has only {} skeletons.'.format(skeleton_id, self.number_of_skeletons))
 
+    def add_reference(self, skeleton_id: str, version=None, path_to_library_dir=ProjectSettings.skeleton_library_dir):
+        """
+        Adds the skeleton from the shared library.
+        :param skeleton_id: id of the skeleton in the library
+        :param version: version of the skeleton, the latest one is used if it is None
+        :param path_to_library_dir: directory of the library
+        :return: added Skeleton
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as path:
+        ...     version = library.SkeletonLibrary(path).publish(Skeleton(name='Vasiliy'))
+        ...     first, second = Project(), Project()
+        ...     first.add_reference('Vasiliy', path_to_library_dir=path) is second.add_reference('Vasiliy', 1, path)
+        ...     first.reference_of(first.get_skeleton('Vasiliy'))['version']
+        True
+        1
+        """
+        skeleton_library = library.SkeletonLibrary(path_to_library_dir)
+        version = version or skeleton_library.versions(skeleton_id)[-1]
+        skeleton = skeleton_library.get_skeleton(skeleton_id, version, self.__shared_skeletons)
+        self.add_skeleton(skeleton)
+        self.__references.append([
+            skeleton,
+            dict(library=skeleton_library.path, id=skeleton_id, version=version),
+            skeleton if self.__shared_skeletons else None,
+        ])
+        return skeleton
+
+    def reference_of(self, skeleton):
+        """
+        :return: dictionary with library, id and version of the skeleton, None if the skeleton is not from the library
+        """
+        for referenced, reference, _ in self.__references:
+            if referenced is skeleton:
+                return reference
+        return None
+
+    def editable(self, element):
+        """
+        Makes the element safe to change: a shared skeleton of the library is replaced by a copy of the project,
+        so other projects which share it do not see the change.
+        :param element: element of the project which is going to be changed
+        :return: the element or its counterpart in the copy of the skeleton
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as path:
+        ...     skeleton = Skeleton(name='Vasiliy')
+        ...     skeleton.add_bone(CircleBone(10, (0, 0), name='Head'))
+        ...     version = library.SkeletonLibrary(path).publish(skeleton)
+        ...     first, second = Project(), Project()
+        ...     shared = first.add_reference('Vasiliy', path_to_library_dir=path)
+        ...     _ = second.add_reference('Vasiliy', path_to_library_dir=path)
+        ...     bone = first.editable(shared.get_bone(0))
+        ...     _ = bone.process_patch(dict(radius=20))
+        ...     bone is first.get_skeleton('Vasiliy').get_bone(0), first.editable(bone) is bone
+        ...     second.get_skeleton('Vasiliy') is shared, shared.get_bone(0).radius
+        (True, True)
+        (True, 10)
+
+        Animations of the shared skeleton are moved to the copy.
+        >>> with tempfile.TemporaryDirectory() as path:
+        ...     skeleton = Skeleton(name='Vasiliy')
+        ...     skeleton.add_bone(CircleBone(10, (0, 0), name='Head'))
+        ...     version = library.SkeletonLibrary(path).publish(skeleton)
+        ...     project = Project()
+        ...     shared = project.add_reference('Vasiliy', path_to_library_dir=path)
+        ...     animation = Animation(shared, 'Breathing')
+        ...     animation.add_state(SkeletonState(shared, [dict(radius=12)]))
+        ...     project.add_animation(animation)
+        ...     copy_of_shared = project.editable(shared)
+        ...     _ = copy_of_shared.update_bone(0, dict(radius=20))
+        ...     animation.skeleton is copy_of_shared, animation.skeleton is shared, shared.get_bone(0).radius
+        (True, False, 10)
+        """
+        for entry in self.__references:
+            skeleton, _, shared = entry
+            if shared is None:
+                continue
+            if element is shared:
+                idx = None
+            elif isinstance(element, Bone) and shared.index_of(element.id) is not None \
+                    and shared.get_bone(shared.index_of(element.id)) is element:
+                idx = shared.index_of(element.id)
+            else:
+                continue
+            skeleton = copy.deepcopy(shared)
+            entry[0], entry[2] = skeleton, None
+            self.__skeletons = [skeleton if item is shared else item for item in self.__skeletons]
+            for animation in self.__animations:
+                if animation.skeleton is shared:
+                    animation.set_skeleton(skeleton)
+            return skeleton if idx is None else skeleton.get_bone(idx)
+        return element
+
     def add_animation(self, animation: Animation):
         if not self.has_animation(animation.name):
             self.__animations.append(animation)
@@ -867,15 +1833,40 @@ class Project:
             skeleton.load(path_to_project_dir)
             self.add_skeleton(skeleton)
 
+        references_path = os.path.join(path_to_project_dir, ProjectSettings.library_references_file)
+        if os.path.exists(references_path):
+            with open(references_path, 'r') as file:
+                for reference in json.load(file):
+                    self.add_reference(reference['id'], reference['version'], reference['library'])
+
         for filename in os.listdir(os.path.join(path_to_project_dir, ProjectSettings.animations_dir)):
             animation = Animation(name=filename)
             skeleton_name = animation.load(path_to_project_dir)
             animation.set_skeleton(self.get_skeleton(skeleton_name))
             self.add_animation(animation)
 
+        self.path = path_to_project_dir
         self.update_views()
 
-    def save(self, path_to_project_dir):
+    def save(self, path_to_project_dir, publish=True):
+        """
+        :param path_to_project_dir: directory of the project, it is replaced
+        :param publish: publish changed skeletons of the library as their new versions,
+        otherwise they are saved as skeletons of the project
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as path:
+        ...     skeleton_library = library.SkeletonLibrary(os.path.join(path, 'library'))
+        ...     _ = skeleton_library.publish(Skeleton(name='Vasiliy'))
+        ...     project = Project()
+        ...     _ = project.add_reference('Vasiliy', path_to_library_dir=skeleton_library.path)
+        ...     project.save(os.path.join(path, 'project'))
+        ...     skeleton_library.versions('Vasiliy')
+        ...     _ = project.editable(project.get_skeleton('Vasiliy')).add_bone(CircleBone(10, (0, 0)))
+        ...     project.save(os.path.join(path, 'project'))
+        ...     skeleton_library.versions('Vasiliy'), project.reference_of(project.get_skeleton('Vasiliy'))['version']
+        [1]
+        ([1, 2], 2)
+        """
         directories_to_create = [
             path_to_project_dir,
             os.path.join(path_to_project_dir, ProjectSettings.skeletons_dir),
@@ -888,15 +1879,136 @@ class Project:
                 shutil.rmtree(directory)
                 os.mkdir(directory)
 
+        references = list()
+        for skeleton, reference, shared in self.__references:
+            if shared is None:
+                skeleton_library = library.SkeletonLibrary(reference['library'])
+                published = skeleton_library.get_skeleton(reference['id'], reference['version'])
+                if skeleton.to_dict() != published.to_dict():
+                    if not publish:
+                        continue
+                    reference['version'] = skeleton_library.publish(skeleton, reference['id'])
+            references.append(reference)
         for skeleton in self.__skeletons:
-            skeleton.save(path_to_project_dir)
+            reference = self.reference_of(skeleton)
+            if reference is None or not any(reference is item for item in references):
+                skeleton.save(path_to_project_dir)
+        if references:
+            with open(os.path.join(path_to_project_dir, ProjectSettings.library_references_file), 'w') as file:
+                json.dump(references, file, indent=2)
 
         for animation in self.__animations:
             animation.save(path_to_project_dir)
+        self.path = path_to_project_dir
+
+    def find_state(self, state):
+        """
+        :param state: SkeletonState to look for
+        :return: tuple (animation, index of the state) or None if no animation contains the state
+        """
+        for animation in self.__animations:
+            for idx in range(animation.number_of_states):
+                if animation.get_state(idx) is state:
+                    return animation, idx
+        return None
+
+    def address_of(self, element):
+        """
+        :param element: the project, its skeleton, animation, bone of the skeleton or state of the animation
+        :return: list which describes the place of the element in the project by indexes, None if it is not found
+        >>> project = Project()
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.add_bone(CircleBone(10, (0, 0), name='Head'))
+        >>> project.add_skeleton(skeleton)
+        >>> project.address_of(skeleton.get_bone(0))
+        ['bone', 0, 0]
+        >>> project.element_at(['bone', 0, 0]) is skeleton.get_bone(0)
+        True
+        >>> project.address_of(Skeleton(name='Ivan'))
+
+        Addresses are cached and checked by Project.element_at(), so moved elements are found again.
+        >>> project.add_skeleton(Skeleton(name='Ivan'))
+        >>> ivan = project.get_skeleton('Ivan')
+        >>> project.address_of(ivan)
+        ['skeleton', 1]
+        >>> project.remove_skeleton(0)
+        >>> project.address_of(ivan), project.address_of(skeleton)
+        (['skeleton', 0], None)
+        """
+        if element is self:
+            return ['project']
+        cached = self.__addresses.get(id(element))
+        if cached is not None and cached[0] is element:
+            try:
+                if self.element_at(cached[1]) is element:
+                    return list(cached[1])
+            except IndexError:
+                pass
+        # the whole project is indexed again, so addresses of removed elements are dropped
+        self.__addresses = dict()
+        for i, skeleton in enumerate(self.__skeletons):
+            self.__addresses[id(skeleton)] = (skeleton, ['skeleton', i])
+            for j in range(skeleton.number_of_bones):
+                self.__addresses[id(skeleton.get_bone(j))] = (skeleton.get_bone(j), ['bone', i, j])
+        for i, animation in enumerate(self.__animations):
+            self.__addresses[id(animation)] = (animation, ['animation', i])
+            for j in range(animation.number_of_states):
+                self.__addresses[id(animation.get_state(j))] = (animation.get_state(j), ['state', i, j])
+        cached = self.__addresses.get(id(element))
+        return list(cached[1]) if cached is not None and cached[0] is element else None
+
+    def element_at(self, address):
+        """
+        :param address: result of Project.address_of()
+        :return: element of the project, None if address is None
+        """
+        if address is None:
+            return None
+        kind, indexes = address[0], address[1:]
+        if kind == 'project':
+            return self
+        if kind == 'skeleton':
+            return self.__skeletons[indexes[0]]
+        if kind == 'bone':
+            return self.__skeletons[indexes[0]].get_bone(indexes[1])
+        if kind == 'animation':
+            return self.__animations[indexes[0]]
+        if kind == 'state':
+            return self.__animations[indexes[0]].get_state(indexes[1])
+        raise ValueError('Unknown kind of the element "{}".'.format(kind))
 
     def update_views(self):
         for view in self.__views:
             view.on_model_changed(self)
 
+    def notify_reloaded(self, elements: list):
+        """
+        Notifies views about skeletons and animations reloaded from files.
+        All views are updated if the active element or its parent was reloaded,
+        otherwise only views with on_assets_reloaded(model, elements) method are notified.
+        :param elements: list of reloaded skeletons and animations
+        """
+        active = self.active_element
+        affected = any(
+            element is active
+            or isinstance(element, Skeleton) and any(element.get_bone(i) is active
+                                                     for i in range(element.number_of_bones))
+            or isinstance(element, Animation) and any(element.get_state(i) is active
+                                                      for i in range(element.number_of_states))
+            for element in elements
+        )
+        for view in self.__views:
+            if affected:
+                view.on_model_changed(self)
+            elif hasattr(view, 'on_assets_reloaded'):
+                view.on_assets_reloaded(self, elements)
+
     def register_view(self, view):
         self.__views.append(view)
+
+    def unregister_view(self, view):
+        """
+        Stops notifications of the view, for example when its window is closed.
+        """
+        if view in self.__views:
+            self.__views.remove(view)
@@ -0,0 +1,330 @@
+"""
+This is the rasterizer for skeletons on NumPy, every image of bones in the editor and in exports is drawn by it.
+Every pixel gets the coverage of the bone computed from the distance between its center and the bone:
+1 inside, 0 farther than half a pixel from the edge and linear between them.
+Without anti-aliasing the pixel is painted if its center is covered by the bone, as the canvas does.
+Bones are processed in batches: distances of a batch are computed by array operations over the block of pixels
+which contains all its bones, the number of bones in the batch is limited by ProjectSettings.raster_batch_pixels.
+Supersampling renders the frame in a larger size and averages blocks of pixels.
+
+Usage: python numpy_raster.py PROJECT_DIR ANIMATION [--frames 10] [--supersample 1]
+"""
+
+import argparse
+import math
+import time
+
+import numpy
+
+from bounds import shape_boxes
+from model import pose_shapes
+from raster import FrameBuffer, skeleton_bounds
+from settings import ProjectSettings
+
+# sizes of frames of the benchmark
+RESOLUTIONS = ((320, 240), (640, 480), (1280, 720), (1920, 1080))
+
+
+def bone_arrays(pose: list, scale=1.0, offset=(0, 0), threshold=0):
+    """
+    Converts parameters of the bones into the screen coordinates by the kernels of their types, see model.pose_shapes().
+    Lines and outlines of circles thinner than a pixel are drawn one pixel wide, as the canvas does.
+    :param pose: list with parameters of the bones, see Bone.to_dict()
+    :param scale: number of pixels in the unit of the model
+    :param offset: position of the origin of the model on the screen
+    :param threshold: minimal size of the box of the bone in pixels, smaller bones are skipped
+    :return: dictionary of arrays with one element per drawn bone: start and end (x, y) (the same points for circles),
+    radius (zero for lines), half of the width, color (r, g, b) and circle flag,
+    pixels closer than the half of the width to the segment, or to the circle of the radius around it, are covered
+    >>> arrays = bone_arrays([{'position': (1, 1), 'color': (255, 0, 0), 'thickness': 2.0, 'length': 10,
+    ...                        'rotation': 0, 'type': 'SEGMENT'}], scale=2, offset=(1, 0))
+    >>> arrays['start'].tolist(), arrays['end'].tolist(), arrays['half'].tolist()
+    ([[3.0, 2.0]], [[23.0, 2.0]], [2.0])
+    >>> circles = [{'position': (0, 0), 'color': (0, 0, 0), 'thickness': 0.1, 'radius': radius, 'type': 'CIRCLE'}
+    ...            for radius in (1, 5)]
+    >>> arrays = bone_arrays(circles, scale=2, threshold=10)
+    >>> arrays['radius'].tolist(), arrays['half'].tolist(), arrays['circle'].tolist()
+    ([10.0], [0.5], [True])
+    """
+    shapes = {key: value[0] for key, value in pose_shapes([pose]).items()}
+    if threshold:
+        boxes = shape_boxes(shapes)
+        visible = numpy.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]) * scale >= threshold
+        shapes = {key: value[visible] for key, value in shapes.items()}
+    return dict(
+        start=shapes['start'] * scale + offset,
+        end=shapes['end'] * scale + offset,
+        radius=shapes['radius'] * scale,
+        half=numpy.maximum(shapes['thickness'] * scale, 1.0) / 2,
+        color=shapes['color'],
+        circle=shapes['ring'],
+    )
+
+
+def coverage(xs, ys, start, end, radius, half, circle, antialias=True):
+    """
+    Computes coverage of pixels by the bones of the batch.
+    :param xs, ys: coordinates of the centers of the pixels, arrays of shape (height, width)
+    :param start, end, radius, half, circle: parameters of the bones, see bone_arrays()
+    :param antialias: coverage is 1 for pixels with covered centers and 0 for others if it is False
+    :return: array of shape (bones, height, width) with values from 0 to 1
+    >>> ys, xs = numpy.mgrid[0:1, 0:4] + 0.5
+    >>> bone = numpy.array([[0.0, 0.5]]), numpy.array([[2.0, 0.5]]), numpy.array([0.0]), numpy.array([0.5])
+    >>> coverage(xs, ys, *bone, numpy.array([False])).tolist()
+    [[[1.0, 1.0, 0.5, 0.0]]]
+    >>> coverage(xs, ys, *bone, numpy.array([False]), antialias=False).tolist()
+    [[[1.0, 1.0, 1.0, 0.0]]]
+    """
+    px, py = xs[None], ys[None]
+    sx, sy = start[:, 0, None, None], start[:, 1, None, None]
+    dx, dy = (end - start)[:, 0, None, None], (end - start)[:, 1, None, None]
+    squared = dx * dx + dy * dy
+    along = numpy.clip(((px - sx) * dx + (py - sy) * dy) / numpy.where(squared > 0, squared, 1), 0, 1)
+    distance = numpy.hypot(px - sx - along * dx, py - sy - along * dy)
+    # circles are outlines: distance to the ring instead of the center
+    distance = numpy.where(circle[:, None, None], numpy.abs(distance - radius[:, None, None]), distance)
+    if not antialias:
+        return (distance <= half[:, None, None]).astype(distance.dtype)
+    return numpy.clip(half[:, None, None] - distance + 0.5, 0, 1)
+
+
+def batches(boxes, max_pixels: int, overhead=ProjectSettings.raster_batch_overhead):
+    """
+    Groups neighbour bones while the block of pixels of the group multiplied by its size fits into the limit
+    and distances computed in vain for the larger block are cheaper than a separate batch.
+    :param boxes: integer array with (left, top, right, bottom) of every bone
+    :param max_pixels: limit of the number of computed distances of the batch
+    :param overhead: cost of a batch in computed distances
+    :return: list of tuples (first bone, last bone + 1, left, top, right, bottom)
+    >>> batches(numpy.array([[0, 0, 2, 2], [1, 1, 3, 3], [0, 0, 10, 10]]), 20)
+    [(0, 2, 0, 0, 3, 3), (2, 3, 0, 0, 10, 10)]
+    >>> batches(numpy.array([[0, 0, 2, 2], [8, 8, 10, 10]]), 1000, overhead=100)
+    [(0, 1, 0, 0, 2, 2), (1, 2, 8, 8, 10, 10)]
+    """
+    result = list()
+    first = 0
+    while first < len(boxes):
+        left, top, right, bottom = boxes[first]
+        last = first + 1
+        while last < len(boxes):
+            box = boxes[last]
+            merged = min(left, box[0]), min(top, box[1]), max(right, box[2]), max(bottom, box[3])
+            count, area = last - first, (right - left) * (bottom - top)
+            merged_area = (merged[2] - merged[0]) * (merged[3] - merged[1])
+            if (count + 1) * merged_area > max_pixels:
+                break
+            if (count + 1) * merged_area - count * area - (box[2] - box[0]) * (box[3] - box[1]) > overhead:
+                break
+            left, top, right, bottom = merged
+            last += 1
+        result.append((first, last, int(left), int(top), int(right), int(bottom)))
+        first = last
+    return result
+
+
+def render_arrays(arrays: dict, size, background=(255, 255, 255), max_pixels=ProjectSettings.raster_batch_pixels,
+                  antialias=True):
+    """
+    Renders the bones given by arrays in the coordinates of the frame, see bone_arrays().
+    Colors are premultiplied by the coverage, so bones are blended over the transparent background correctly.
+    :param arrays: dictionary of arrays with parameters of the bones in order of drawing
+    :param size: (width, height) of the frame in pixels
+    :param background: color of the frame, the frame is transparent if it is None
+    :param max_pixels: limit of the number of computed distances at once
+    :param antialias: compute coverage of pixels, otherwise paint pixels with covered centers
+    :return: array of shape (height, width, 3) with colors from 0 to 255 over the background,
+    array of shape (height, width, 4) with premultiplied colors and alpha from 0 to 1 without it
+    """
+    width, height = size
+    # alpha of the opaque background stays 1, so only colors are blended
+    channels = 3 if background is not None else 4
+    image = numpy.zeros((height, width, channels), dtype=numpy.float32)
+    if background is not None:
+        image[:] = background
+    arrays = {key: value.astype(numpy.float32) if key != 'circle' else value for key, value in arrays.items()}
+    reach = (arrays['radius'] + arrays['half'] + 1)[:, None]
+    boxes = numpy.concatenate((
+        numpy.floor(numpy.minimum(arrays['start'], arrays['end']) - reach),
+        numpy.ceil(numpy.maximum(arrays['start'], arrays['end']) + reach),
+    ), axis=1)
+    boxes = numpy.clip(boxes, 0, [width, height, width, height]).astype(int)
+    visible = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    arrays = {key: value[visible] for key, value in arrays.items()}
+    colors = numpy.concatenate((arrays['color'], numpy.ones((len(arrays['color']), 1), dtype=numpy.float32)), axis=1)
+    for first, last, left, top, right, bottom in batches(boxes[visible], max_pixels):
+        ys, xs = numpy.mgrid[top:bottom, left:right].astype(numpy.float32) + numpy.float32(0.5)
+        cover = coverage(
+            xs, ys, *(arrays[key][first:last] for key in ('start', 'end', 'radius', 'half', 'circle')), antialias
+        )
+        block = image[top:bottom, left:right]
+        if not antialias:
+            # every covered pixel takes the color of the last bone which covers it
+            covered = cover > 0
+            painted = covered.any(axis=0)
+            upper = len(covered) - 1 - numpy.argmax(covered[::-1], axis=0)
+            block[painted] = colors[first + upper[painted], :channels]
+            continue
+        # bones are blended in order, so later bones are drawn over earlier ones
+        for bone in range(last - first):
+            alpha = cover[bone][..., None]
+            block += (colors[first + bone, :channels] - block) * alpha
+    return image
+
+
+def render_pose(pose: list, size, scale=1.0, offset=(0, 0), background=(255, 255, 255), threshold=0,
+                supersample=ProjectSettings.raster_supersample, max_pixels=ProjectSettings.raster_batch_pixels,
+                antialias=True):
+    """
+    Renders the pose.
+    :param pose: list with parameters of the bones, see Bone.to_dict()
+    :param size: (width, height) of the frame in pixels
+    :param scale: number of pixels in the unit of the model
+    :param offset: position of the origin of the model on the screen, screen = model * scale + offset
+    :param background: color of the frame, the frame is transparent if it is None
+    :param threshold: minimal size of the bone in pixels, see bone_arrays()
+    :param supersample: number of samples along each axis of the pixel
+    :param max_pixels: limit of the number of computed distances at once
+    :param antialias: compute coverage of pixels, otherwise paint pixels with covered centers
+    :return: array of shape (height, width, 3) with colors from 0 to 255 over the background,
+    array of shape (height, width, 4) with colors and alpha from 0 to 255 without it
+    >>> image = render_pose([{'position': (0, 1), 'color': (0, 0, 0), 'thickness': 1.0, 'length': 4,
+    ...                       'rotation': 0, 'type': 'SEGMENT'}], (4, 3))
+    >>> image[:, 1, 0].tolist()
+    [127.5, 127.5, 255.0]
+    >>> image = render_pose([{'position': (0, 1.5), 'color': (0, 0, 0), 'thickness': 1.0, 'length': 4,
+    ...                       'rotation': 0, 'type': 'SEGMENT'}], (4, 3))
+    >>> image[:, 1, 0].tolist()
+    [255.0, 0.0, 255.0]
+    >>> image = render_pose([{'position': (0, 1), 'color': (255, 0, 0), 'thickness': 1.0, 'length': 4,
+    ...                       'rotation': 0, 'type': 'SEGMENT'}], (4, 3), background=None, antialias=False)
+    >>> image[:, 1].tolist()
+    [[255.0, 0.0, 0.0, 255.0], [255.0, 0.0, 0.0, 255.0], [0.0, 0.0, 0.0, 0.0]]
+    >>> render_pose([], (2, 2), supersample=2).shape
+    (2, 2, 3)
+    """
+    arrays = bone_arrays(
+        pose, scale * supersample, (offset[0] * supersample, offset[1] * supersample), threshold * supersample
+    )
+    image = render_arrays(arrays, (size[0] * supersample, size[1] * supersample), background, max_pixels, antialias)
+    if supersample > 1:
+        image = image.reshape(size[1], supersample, size[0], supersample, image.shape[-1]).mean(axis=(1, 3))
+    return image if background is not None else unpremultiply(image)
+
+
+def unpremultiply(image):
+    """
+    :param image: array of shape (height, width, 4) with premultiplied colors and alpha from 0 to 1
+    :return: array of the shape with colors and alpha from 0 to 255
+    >>> unpremultiply(numpy.array([[[0.25, 0.0, 0.0, 0.5], [0.0, 0.0, 0.0, 0.0]]])).tolist()
+    [[[0.5, 0.0, 0.0, 127.5], [0.0, 0.0, 0.0, 0.0]]]
+    """
+    alpha = image[..., 3:]
+    colors = numpy.divide(image[..., :3], alpha, out=numpy.zeros_like(image[..., :3]), where=alpha > 0)
+    return numpy.concatenate((colors, alpha * 255), axis=-1)
+
+
+def to_frame(image, frame=None):
+    """
+    :param image: array of shape (height, width, 3) with colors or (height, width, 4) with colors and alpha
+    from 0 to 255, see render_pose()
+    :param frame: FrameBuffer of the size to write into, a new one is created if it is None
+    :return: FrameBuffer with the image, opaque if there is no alpha
+    >>> to_frame(numpy.array([[[10.4, 20.6, 30.0]]])).get_pixel(0, 0)
+    (10, 21, 30, 255)
+    """
+    height, width, channels = image.shape
+    frame = frame or FrameBuffer(width, height)
+    pixels = numpy.frombuffer(frame.pixels, dtype=numpy.uint8).reshape(height, width, 4)
+    pixels[..., :channels] = numpy.round(image)
+    if channels == 3:
+        pixels[..., 3] = 255
+    return frame
+
+
+def render_view(skeleton, size, scale=1.0, offset=(0, 0), background=(255, 255, 255), threshold=0, frame=None,
+                supersample=ProjectSettings.raster_supersample, antialias=True):
+    """
+    Renders the skeleton, see render_pose().
+    :param threshold: minimal size of the bone in pixels
+    :param frame: FrameBuffer of the size to render into, a new one is created if it is None
+    :return: FrameBuffer, opaque if there is the background
+    >>> from model import Skeleton, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (0, 0), thickness=1.0))
+    >>> frame = render_view(skeleton, (20, 20), scale=2, offset=(10, 10))
+    >>> frame.get_pixel(0, 10), frame.get_pixel(10, 10)
+    ((0, 0, 0, 255), (255, 255, 255, 255))
+    """
+    pose = [skeleton.get_bone(i).to_dict() for i in range(skeleton.number_of_bones)]
+    image = render_pose(pose, size, scale, offset, background, threshold, supersample, antialias=antialias)
+    return to_frame(image, frame)
+
+
+def render_skeleton(skeleton, box=None):
+    """
+    Renders all bones of the skeleton without anti-aliasing over the transparent background.
+    :param skeleton: Skeleton to render
+    :param box: (left, top, right, bottom) part of the model to render, bounds of the skeleton are used by default
+    :return: tuple (FrameBuffer, origin), where origin is the model coordinates of the top left pixel
+    >>> from model import Skeleton, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(10, (20, 20), thickness=2.0))
+    >>> frame, origin = render_skeleton(skeleton)
+    >>> frame.size, origin
+    ((22, 22), (9, 9))
+    >>> frame.content_bounds(), frame.get_pixel(11, 11)
+    ((0, 0, 22, 22), (0, 0, 0, 0))
+    """
+    box = box or skeleton_bounds(skeleton) or (0, 0, 0, 0)
+    origin = int(math.floor(box[0])), int(math.floor(box[1]))
+    size = int(math.ceil(box[2])) - origin[0], int(math.ceil(box[3])) - origin[1]
+    return render_view(skeleton, size, offset=(-origin[0], -origin[1]), background=None, supersample=1,
+                       antialias=False), origin
+
+
+def benchmark(animation, resolutions=RESOLUTIONS, frames=10, supersample=ProjectSettings.raster_supersample):
+    """
+    Renders frames of the animation fitted into every resolution.
+    :return: dictionary with frames per second for every (width, height)
+    >>> from model import Project
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> result = benchmark(project.get_animation('Sertaki'), [(64, 48)], frames=2)
+    >>> list(result), result[(64, 48)] > 0
+    ([(64, 48)], True)
+    """
+    from bounds import animation_bounds
+
+    times = [frame * animation.loop_duration / frames for frame in range(frames)]
+    boxes = [box for box in animation_bounds(animation, times)['bounds'] if box] or [(0, 0, 1, 1)]
+    left, top = min(box[0] for box in boxes), min(box[1] for box in boxes)
+    right, bottom = max(box[2] for box in boxes), max(box[3] for box in boxes)
+    skeletons = [animation.pose_at(time_point) for time_point in times]
+    result = dict()
+    for width, height in resolutions:
+        scale = min(width / max(right - left, 1e-6), height / max(bottom - top, 1e-6))
+        offset = -left * scale, -top * scale
+        start = time.perf_counter()
+        for skeleton in skeletons:
+            render_view(skeleton, (width, height), scale, offset, supersample=supersample)
+        result[(width, height)] = frames / max(time.perf_counter() - start, 1e-9)
+    return result
+
+
+if __name__ == '__main__':
+    from model import Project
+
+    parser = argparse.ArgumentParser(description='Measure the speed of the anti-aliased rasterizer.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('animation', help='name of the animation')
+    parser.add_argument('--frames', type=int, default=10, help='number of rendered frames for every resolution')
+    parser.add_argument('--supersample', type=int, default=ProjectSettings.raster_supersample,
+                        help='number of samples along each axis of the pixel')
+    args = parser.parse_args()
+
+    project = Project()
+    project.load(args.project)
+    for (width, height), fps in benchmark(
+        project.get_animation(args.animation), frames=args.frames, supersample=args.supersample
+    ).items():
+        print('{}x{}: {:.1f} FPS'.format(width, height, fps))
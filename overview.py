@@ -0,0 +1,69 @@
+"""
+This is the overview of the project: a grid with previews of all skeletons and animations.
+Previews are taken from preview_cache, so only new and changed assets are rendered.
+"""
+
+import base64
+import gettext
+import tkinter
+
+import command
+import preview_cache
+from settings import ProjectSettings
+
+gettext.install('app', '.')
+
+
+class ProjectOverview(tkinter.Toplevel):
+    def __init__(self, master, project, command_list):
+        tkinter.Toplevel.__init__(self, master)
+        self.title(_("Project overview"))
+        self.__project = project
+        self.__command_list = command_list
+        # PNG image of the preview -> PhotoImage, PhotoImage has to be referenced while it is shown
+        self.__images = dict()
+
+        self.__canvas = tkinter.Canvas(self, background="white")
+        scroll = tkinter.Scrollbar(self, orient=tkinter.VERTICAL, command=self.__canvas.yview)
+        self.__canvas.configure(yscrollcommand=scroll.set)
+        self.__canvas.grid(row=0, column=0, sticky=tkinter.N+tkinter.E+tkinter.S+tkinter.W)
+        scroll.grid(row=0, column=1, sticky=tkinter.N+tkinter.S)
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.__grid = tkinter.Frame(self.__canvas, background="white")
+        self.__canvas.create_window(0, 0, window=self.__grid, anchor="nw")
+        self.__grid.bind("<Configure>", lambda event: self.__canvas.configure(
+            scrollregion=self.__canvas.bbox("all")
+        ))
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.__project.register_view(self)
+        self.on_model_changed(self.__project)
+
+    def close(self):
+        self.__project.unregister_view(self)
+        self.destroy()
+
+    def on_model_changed(self, model):
+        for child in self.__grid.winfo_children():
+            child.destroy()
+        cache = preview_cache.get_cache()
+        elements = [model.get_animation(i) for i in range(model.number_of_animations)] + \
+                   [model.get_skeleton(i) for i in range(model.number_of_skeletons)]
+        images = dict()
+        for idx, element in enumerate(elements):
+            data = cache.get(element, ProjectSettings.overview_preview_size)
+            if data not in images:
+                images[data] = self.__images.get(data) or tkinter.PhotoImage(
+                    data=base64.b64encode(data), format="PNG"
+                )
+            tkinter.Button(
+                self.__grid, image=images[data], text=element.name, compound="top",
+                relief="sunken" if element is model.active_element else "flat",
+                command=lambda element=element: self.__command_list.add_command(command.SelectCommand(element)),
+            ).grid(row=idx // ProjectSettings.overview_columns, column=idx % ProjectSettings.overview_columns,
+                   padx=4, pady=4)
+        self.__images = images
+
+    def on_assets_reloaded(self, model, elements):
+        self.on_model_changed(model)
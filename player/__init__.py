@@ -0,0 +1,10 @@
+"""
+This is the lightweight player of animations.
+It loads animations from project directories or from files of the runtime export,
+samples poses at any moment and makes draw lists of them.
+The package does not import tkinter, gettext or the model of the editor,
+other heavy modules are imported on the first use, see player.benchmark.
+"""
+
+from player.playback import Player, interpolate_params, draw_list
+from player.runtime import decode_animation
@@ -0,0 +1,64 @@
+"""
+This is the benchmark of the import time of the player.
+Every measurement runs a new interpreter, so modules cached by the current process do not matter.
+
+Usage: python -m player.benchmark [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# modules which should never be imported with the player
+FORBIDDEN_MODULES = ('tkinter', 'gettext', 'model', 'fixtures', 'library', 'numpy')
+# the best import time of the player in seconds which is still fine, it is checked only by the command line
+# because the time depends on the load of the machine
+IMPORT_TIME_LIMIT = 0.05
+
+SCRIPT = (
+    'import sys, time\n'
+    'modules = set(sys.modules)\n'
+    'start = time.perf_counter()\n'
+    'import {}\n'
+    'print(time.perf_counter() - start)\n'
+    'print(" ".join(sorted(set(sys.modules) - modules)))\n'
+)
+
+
+def import_time(module='player', repeat=5):
+    """
+    :param module: name of the module to import
+    :param repeat: number of measurements
+    :return: tuple (the best time in seconds, sorted list of modules imported with the module)
+    >>> seconds, modules = import_time(repeat=1)
+    >>> [name for name in modules if name.split('.')[0] in FORBIDDEN_MODULES]
+    []
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best, modules = None, list()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', SCRIPT.format(module)], cwd=root, check=True, stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.splitlines()
+        seconds = float(output[0])
+        best = seconds if best is None else min(best, seconds)
+        modules = output[1].split() if len(output) > 1 else list()
+    return best, modules
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the import time of the player.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements')
+    args = parser.parse_args()
+
+    for name in ('player', 'model'):
+        seconds, modules = import_time(name, args.repeat)
+        print('{}: {:.1f} ms, {} modules'.format(name, seconds * 1000, len(modules)))
+    seconds, modules = import_time('player', args.repeat)
+    forbidden = [name for name in modules if name.split('.')[0] in FORBIDDEN_MODULES]
+    if forbidden or seconds >= IMPORT_TIME_LIMIT:
+        sys.exit('Player is too heavy: {:.1f} ms, forbidden modules: {}'.format(
+            seconds * 1000, ', '.join(forbidden) or 'none'
+        ))
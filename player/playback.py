@@ -0,0 +1,283 @@
+"""
+This is the playback of animations without the model of the editor.
+Poses are lists of dictionaries with parameters of the bones, see Bone.to_dict().
+"""
+
+import bisect
+import math
+import os
+
+from settings import ProjectSettings
+
+LINEAR = 'linear'
+# transition from the last state to the first one in seconds, see Animation.loop_transition
+LOOP_PAUSE = ProjectSettings.loop_transition_time
+
+
+def interpolate_params(first: dict, second: dict, t: float):
+    """
+    Linear interpolation between two sets of bone parameters, see Bone.to_dict().
+    Numbers and tuples of numbers are interpolated, color is rounded to integers,
+    other parameters (name, type) are taken from the first set.
+    :param first: parameters at t = 0
+    :param second: parameters at t = 1
+    :param t: interpolation factor
+    :return: dictionary with interpolated parameters
+    >>> interpolate_params(
+    ...     {'position': (0, 0), 'color': (0, 0, 0), 'length': 10, 'name': 'Leg'},
+    ...     {'position': (10, 20), 'color': (255, 0, 0), 'length': 20, 'name': 'Leg'},
+    ...     0.5
+    ... )
+    {'position': (5.0, 10.0), 'color': (128, 0, 0), 'length': 15.0, 'name': 'Leg'}
+    """
+    result = dict()
+    for key, value in first.items():
+        other = second.get(key, value)
+        if key == 'color':
+            result[key] = tuple(int(round(a + (b - a) * t)) for a, b in zip(value, other))
+        elif isinstance(value, (tuple, list)):
+            result[key] = tuple(a + (b - a) * t for a, b in zip(value, other))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            result[key] = value + (other - value) * t
+        else:
+            result[key] = value
+    return result
+
+
+def apply_updates(bones: list, indexes: dict, updates):
+    """
+    :param bones: parameters of the bones of the skeleton
+    :param indexes: index of every bone by its identifier
+    :param updates: dictionary with updates by identifiers of the bones or list of updates by indexes, see SkeletonState
+    :return: new list of parameters of the bones
+    >>> apply_updates([{'radius': 1, 'position': (0, 0)}], {'7': 0}, {'7': {'radius': 2, 'position': [1, 1]}, '3': {}})
+    [{'radius': 2, 'position': (1, 1)}]
+    """
+    pose = [dict(bone) for bone in bones]
+    items = updates.items() if isinstance(updates, dict) else enumerate(updates)
+    for key, update in items:
+        idx = indexes.get(key) if isinstance(key, str) else key
+        if idx is None:
+            continue
+        for name, value in (update or dict()).items():
+            pose[idx][name] = tuple(value) if isinstance(value, list) else value
+    return pose
+
+
+def _segment_primitive(bone: dict, x: float, y: float, scale: float):
+    length = bone['length'] * scale
+    end = (x + length * math.cos(bone['rotation']), y + length * math.sin(bone['rotation']))
+    return 'line', (x, y), end, bone['color'], bone['thickness'] * scale
+
+
+def _circle_primitive(bone: dict, x: float, y: float, scale: float):
+    return 'circle', (x, y), bone['radius'] * scale, bone['color'], bone['thickness'] * scale
+
+
+# type of the bone -> function (parameters, x, y, scale) making its drawing primitive.
+# The player draws the built-in types without the model of the editor, other types are drawn by model.draw_pose()
+PRIMITIVES = {
+    'SEGMENT': _segment_primitive,
+    'CIRCLE': _circle_primitive,
+}
+
+
+def draw_list(pose: list, scale=1.0, offset=(0, 0)):
+    """
+    Makes drawing primitives of the pose in the coordinates of the screen, as the canvas of the editor does.
+    :param pose: list with parameters of the bones
+    :param scale: number of pixels in the unit of the model
+    :param offset: position of the origin of the model on the screen
+    :return: list of ('line', start, end, color, width) and ('circle', center, radius, color, width),
+    raises ValueError for types of bones which the player can not draw, see PRIMITIVES
+    >>> draw_list([{'position': (0, 0), 'color': (0, 0, 0), 'thickness': 1.0, 'length': 10, 'rotation': 0,
+    ...             'type': 'SEGMENT'},
+    ...            {'position': (5, 5), 'color': (255, 0, 0), 'thickness': 1.0, 'radius': 2, 'type': 'CIRCLE'}],
+    ...           scale=2, offset=(1, 1))
+    [('line', (1, 1), (21.0, 1.0), (0, 0, 0), 2.0), ('circle', (11, 11), 4, (255, 0, 0), 2.0)]
+    >>> draw_list([{'position': (0, 0), 'color': (0, 0, 0), 'thickness': 1.0, 'type': 'SPLINE'}])
+    Traceback (most recent call last):
+    ...
+    ValueError: The player can not draw bones of type "SPLINE".
+    """
+    result = list()
+    for bone in pose:
+        if bone.get('type') not in PRIMITIVES:
+            raise ValueError('The player can not draw bones of type "{}".'.format(bone.get('type')))
+        x, y = bone['position'][0] * scale + offset[0], bone['position'][1] * scale + offset[1]
+        result.append(PRIMITIVES[bone['type']](bone, x, y, scale))
+    return result
+
+
+class Player:
+    """
+    Poses of the states with transitions between them.
+    >>> player = Player([[{'radius': 10}], [{'radius': 20}], [{'radius': 40}]], [1.0, 2.0], ['linear', 'steps(2)'])
+    >>> [player.sample(t)[0]['radius'] for t in (-1, 0.5, 1, 1.5, 2.5, 3, 10)]
+    [10, 15.0, 20, 20.0, 30.0, 40, 40]
+    >>> player.duration, player.loop_duration, player.sample(4.5, loop=True)[0]['radius']
+    (3.0, 4.0, 15.0)
+    >>> player = Player([[{'radius': 10}], [{'radius': 20}]], [1.0], loop_pause=2.0, loop_easing='linear')
+    >>> player.sample(2.5, loop=True)[0]['radius']
+    12.5
+    """
+    def __init__(self, poses: list, transitions: list, easings=None, name=None, loop_pause=LOOP_PAUSE,
+                 loop_easing=None):
+        """
+        :param poses: list with the pose of every state
+        :param transitions: times in seconds between neighbour states
+        :param easings: easing of every transition, see easing.get_easing(), linear by default
+        :param name: name of the animation
+        :param loop_pause: time in seconds between the last state and the first one during the loop playback
+        :param loop_easing: easing from the last state to the first one, the last state is kept if it is None
+        """
+        self.__poses = poses
+        self.__transitions = list(transitions)
+        self.__easings = [get_easing_function(easing) for easing in easings or [LINEAR] * len(transitions)]
+        self.__starts = [0.0]
+        for transition in self.__transitions:
+            self.__starts.append(self.__starts[-1] + transition)
+        self.name = name
+        self.loop_pause = loop_pause
+        self.__loop_easing = get_easing_function(loop_easing) if loop_easing is not None else None
+
+    @property
+    def duration(self):
+        return self.__starts[-1]
+
+    @property
+    def loop_duration(self):
+        return self.duration + self.loop_pause
+
+    @property
+    def number_of_bones(self):
+        return len(self.__poses[0]) if self.__poses else 0
+
+    def sample(self, time_point: float, loop=False):
+        """
+        Evaluates the pose at the moment, as Animation.pose_at() does.
+        :param time_point: time in seconds from the first state
+        :param loop: time is wrapped by the loop duration, otherwise it is clamped by the animation
+        :return: list with parameters of the bones, None if there are no states
+        """
+        if not self.__poses:
+            return None
+        if loop:
+            time_point = time_point % self.loop_duration if self.loop_duration > 0 else 0
+        if time_point > self.duration and loop and self.__loop_easing and self.loop_pause > 0:
+            t = self.__loop_easing((time_point - self.duration) / self.loop_pause)
+            return [interpolate_params(first, second, t) for first, second in zip(self.__poses[-1], self.__poses[0])]
+        idx = bisect.bisect_right(self.__starts, time_point) - 1
+        if idx < 0:
+            return self.__poses[0]
+        if idx >= len(self.__transitions) or time_point <= self.__starts[idx]:
+            return self.__poses[min(idx, len(self.__poses) - 1)]
+        t = self.__easings[idx]((time_point - self.__starts[idx]) / self.__transitions[idx])
+        return [interpolate_params(first, second, t) for first, second in zip(self.__poses[idx], self.__poses[idx + 1])]
+
+    def draw_list(self, time_point: float, scale=1.0, offset=(0, 0), loop=False):
+        """
+        :return: drawing primitives of the pose at the moment, see draw_list()
+        """
+        pose = self.sample(time_point, loop)
+        return draw_list(pose, scale, offset) if pose else list()
+
+    @staticmethod
+    def from_dicts(skeleton: dict, animation: dict, loop_pause=LOOP_PAUSE):
+        """
+        :param skeleton: dictionary of the skeleton, see Skeleton.to_dict()
+        :param animation: dictionary of the animation, see Animation.to_dict()
+        :return: Player of the animation
+        """
+        bones = [
+            {key: tuple(value) if isinstance(value, list) else value for key, value in bone.items() if key != 'id'}
+            for bone in skeleton['bones']
+        ]
+        # bones of old files have no identifiers, their indexes are used instead, see Skeleton.load_dict()
+        indexes = {bone.get('id', str(idx)): idx for idx, bone in enumerate(skeleton['bones'])}
+        poses = [apply_updates(bones, indexes, state['bone_updates']) for state in animation['states']]
+        return Player(
+            poses, animation['transitions'], animation.get('easings'), animation['name'],
+            animation.get('loop_transition', loop_pause), animation.get('loop_easing'),
+        )
+
+    @staticmethod
+    def from_project(path_to_project_dir: str, name: str):
+        """
+        Loads the animation from the directory of the project, skeletons of the shared library are supported.
+        :param path_to_project_dir: path to the directory of the project
+        :param name: name of the animation
+        :return: Player of the animation
+        >>> player = Player.from_project('Vasilich', 'Sertaki')
+        >>> player.name, player.number_of_bones, player.duration
+        ('Sertaki', 10, 0.6)
+        >>> from model import Project
+        >>> project = Project()
+        >>> project.load('Vasilich')
+        >>> animation = project.get_animation('Sertaki')
+        >>> all(player.sample(t) == [animation.pose_at(t).get_bone(i).to_dict() for i in range(10)]
+        ...     for t in (0.03, 0.17, 0.25, 0.599))
+        True
+        """
+        import json
+
+        with open(os.path.join(path_to_project_dir, ProjectSettings.animations_dir, name), 'r') as file:
+            animation = json.load(file)
+        skeleton_path = os.path.join(path_to_project_dir, ProjectSettings.skeletons_dir, animation['skeleton_name'])
+        if not os.path.exists(skeleton_path):
+            with open(os.path.join(path_to_project_dir, ProjectSettings.library_references_file), 'r') as file:
+                for reference in json.load(file):
+                    path = os.path.join(reference['library'], reference['id'])
+                    version = reference['version'] or max(int(name) for name in os.listdir(path) if name.isdigit())
+                    with open(os.path.join(path, str(version)), 'r') as skeleton_file:
+                        skeleton = json.load(skeleton_file)
+                    if skeleton['name'] == animation['skeleton_name']:
+                        return Player.from_dicts(skeleton, animation)
+            raise FileNotFoundError('Skeleton "{}" was not found.'.format(animation['skeleton_name']))
+        with open(skeleton_path, 'r') as file:
+            return Player.from_dicts(json.load(file), animation)
+
+    @staticmethod
+    def from_runtime(data: bytes, loop_pause=LOOP_PAUSE):
+        """
+        Creates the player of the animation exported by runtime_export, frames are interpolated linearly.
+        :param data: content of the exported file
+        :return: Player of the animation
+        >>> import runtime_export
+        >>> from model import Project
+        >>> project = Project()
+        >>> project.load('Vasilich')
+        >>> animation = project.get_animation('Sertaki')
+        >>> player = Player.from_runtime(runtime_export.export_animation(animation, fps=30))
+        >>> player.duration, abs(player.sample(0.15)[3]['rotation'] - animation.pose_at(0.15).get_bone(3).rotation) < 1e-3
+        (0.6, True)
+        """
+        from player.runtime import bone_type, decode_animation
+
+        decoded = decode_animation(data)
+        poses = list()
+        for frame in decoded['frames']:
+            pose = list()
+            for params in frame:
+                bone = {key: tuple(value) if isinstance(value, list) else value for key, value in params.items()}
+                bone['color'] = tuple(int(round(value)) for value in bone.get('color', (0, 0, 0)))
+                bone['type'] = bone_type(bone)
+                pose.append(bone)
+            poses.append(pose)
+        return Player(poses, [1 / decoded['fps']] * (len(poses) - 1), name=decoded['name'], loop_pause=loop_pause)
+
+
+def get_easing_function(spec: str):
+    """
+    :return: easing function, easing module is imported only for non-linear easings
+    >>> get_easing_function('linear')(0.25)
+    0.25
+    """
+    if spec == LINEAR:
+        return _linear
+    from easing import get_easing
+    return get_easing(spec)
+
+
+def _linear(t: float):
+    return t
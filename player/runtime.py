@@ -0,0 +1,121 @@
+"""
+This is the reference decoder of the runtime format, see runtime_export.
+"""
+
+import struct
+
+MAGIC = b'SKA1'
+FLAG_DELTA = 1
+FLAG_BOUNDS = 2
+FLAG_BONE_BOUNDS = 4
+CHANNELS = [
+    ('position', 0), ('position', 1), ('thickness', None), ('length', None), ('rotation', None),
+    ('radius', None), ('color', 0), ('color', 1), ('color', 2),
+]
+# types of bones which the format can carry with the channel which tells the type of the bone, see bone_type()
+TYPES = (('CIRCLE', 'radius'), ('SEGMENT', 'length'))
+HEADER = '<BHIHH'
+TRACK_HEADER = '<HBfB'
+BOUNDS_HEADER = '<f'
+
+
+def bone_type(params: dict):
+    """
+    The format has no types of bones, they are told by their channels.
+    :param params: channels of the bone
+    :return: type of the bone, raises ValueError if the channels belong to no type of the format
+    >>> bone_type({'radius': 1.0}), bone_type({'length': 2.0, 'rotation': 0.0})
+    ('CIRCLE', 'SEGMENT')
+    >>> bone_type({'thickness': 1.0})
+    Traceback (most recent call last):
+    ...
+    ValueError: Bone with channels thickness has no type of the runtime format.
+    """
+    for name, channel in TYPES:
+        if channel in params:
+            return name
+    raise ValueError('Bone with channels {} has no type of the runtime format.'.format(', '.join(sorted(params))))
+
+
+def read_varint(data: bytes, offset: int):
+    """
+    Reads the signed integer in zigzag LEB128 encoding.
+    :return: tuple (integer, offset after it)
+    >>> read_varint(b'\\xd8\\x04', 0)
+    (300, 2)
+    >>> read_varint(b'\\x00\\x01', 1)
+    (-1, 2)
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    return (value >> 1 if not value & 1 else -(value >> 1) - 1), offset
+
+
+def decode_animation(data: bytes):
+    """
+    :param data: bytes made by runtime_export.export_animation()
+    :return: dictionary with name, skeleton_name, fps, number_of_bones and frames,
+    every frame is a list of dictionaries with channels of the bones,
+    bounds of the skeleton in every frame and bone_bounds with bounds of every bone in every frame
+    are added if they are exported
+    >>> decode_animation(b'SKA1\\x00\\x1e\\x00\\x02\\x00\\x00\\x00\\x01\\x00\\x01\\x00\\x04Walk\\x00'
+    ...                  b'\\x00\\x00\\x05\\x00\\x00\\x80\\x3f\\x00\\x02\\x04')
+    {'name': 'Walk', 'skeleton_name': '', 'fps': 30, 'number_of_bones': 1, 'frames': [[{'radius': 1.0}], \
+[{'radius': 2.0}]]}
+    >>> decode_animation(b'{}')
+    Traceback (most recent call last):
+    ...
+    ValueError: Data is not an animation in the runtime format.
+    """
+    if data[:4] != MAGIC:
+        raise ValueError('Data is not an animation in the runtime format.')
+    offset = 4
+    flags, fps, frame_count, bone_count, track_count = struct.unpack_from(HEADER, data, offset)
+    offset += struct.calcsize(HEADER)
+    names = list()
+    for _ in range(2):
+        length = data[offset]
+        names.append(data[offset + 1:offset + 1 + length].decode('utf-8'))
+        offset += 1 + length
+
+    frames = [[dict() for _ in range(bone_count)] for _ in range(frame_count)]
+    track_header = struct.calcsize(TRACK_HEADER)
+    for _ in range(track_count):
+        bone, channel, step, constant = struct.unpack_from(TRACK_HEADER, data, offset)
+        offset += track_header
+        key, component = CHANNELS[channel]
+        value = 0
+        for frame in range(frame_count):
+            if frame == 0 or not constant:
+                number, offset = read_varint(data, offset)
+                value = value + number if flags & FLAG_DELTA else number
+            params = frames[frame][bone]
+            if component is None:
+                params[key] = value * step
+            else:
+                params.setdefault(key, [0] * (3 if key == 'color' else 2))[component] = value * step
+    result = dict(name=names[0], skeleton_name=names[1], fps=fps, number_of_bones=bone_count, frames=frames)
+
+    if flags & FLAG_BOUNDS:
+        step, = struct.unpack_from(BOUNDS_HEADER, data, offset)
+        offset += struct.calcsize(BOUNDS_HEADER)
+        boxes = list()
+        for _ in range(1 + (bone_count if flags & FLAG_BONE_BOUNDS else 0)):
+            box = [[0.0] * 4 for _ in range(frame_count)]
+            for coordinate in range(4):
+                value = 0
+                for frame in range(frame_count):
+                    number, offset = read_varint(data, offset)
+                    value = value + number if flags & FLAG_DELTA else number
+                    box[frame][coordinate] = value * step
+            boxes.append(box)
+        result['bounds'] = boxes[0]
+        if flags & FLAG_BONE_BOUNDS:
+            result['bone_bounds'] = [[box[frame] for box in boxes[1:]] for frame in range(frame_count)]
+    return result
@@ -0,0 +1,199 @@
+"""
+This is the cache of preview images of skeletons and animations.
+Previews are PNG files named by the hash of the content they show, so an unchanged asset is never rendered again
+and a changed one gets a new file. The hash is computed again only when the version of the content is changed,
+see Skeleton.version. Files are kept in the user's directory ProjectSettings.preview_cache_dir shared by all projects,
+so saving a project, which rewrites its directory, does not drop them,
+the least recently used ones are removed when the cache is larger than ProjectSettings.preview_cache_size.
+"""
+
+import hashlib
+import json
+import os
+import weakref
+
+from model import Animation, Skeleton
+from render_worker import render_thumbnail
+from settings import ProjectSettings
+
+# path to the directory of the cache -> PreviewCache, see get_cache()
+_caches = dict()
+
+
+def preview_content(element):
+    """
+    :param element: Skeleton or Animation
+    :return: Skeleton which is shown by the preview: the skeleton itself or the first state of the animation,
+    None if there is nothing to show
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> preview_content(skeleton) is skeleton
+    True
+    >>> preview_content(Animation(skeleton, name='Dancing'))
+    """
+    if isinstance(element, Skeleton):
+        return element
+    if isinstance(element, Animation) and element.number_of_states:
+        return element.get_state(0).get_skeleton()
+    return None
+
+
+def content_hash(element, size: int):
+    """
+    :param element: Skeleton or Animation
+    :param size: side of the preview in pixels
+    :return: hex digest of the content of the preview
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> first = content_hash(skeleton, 16)
+    >>> first == content_hash(Skeleton(name='Vasiliy'), 16), first == content_hash(skeleton, 32)
+    (True, False)
+    """
+    content = preview_content(element)
+    data = json.dumps(dict(size=size, content=content.to_dict() if content else None), sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class PreviewCache:
+    """
+    Preview images kept in memory and, if there is a directory, in files.
+    >>> import tempfile
+    >>> from model import CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(10, (20, 20), thickness=2.0))
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     cache = PreviewCache(path, max_size=500)
+    ...     image = cache.get(skeleton, 16)
+    ...     files = os.listdir(path)
+    ...     same = PreviewCache(path).get(skeleton, 16) == image
+    ...     skeleton.update_bone(0, dict(radius=5))
+    ...     _ = [cache.get(skeleton, size) for size in (16, 24, 32, 48)]
+    ...     evicted = cache.size <= 500 and len(os.listdir(path)) < 5
+    >>> image[1:4], len(files), same, evicted
+    (b'PNG', 1, True, True)
+
+    The directory is made again if it was removed behind the cache.
+    >>> import shutil
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     cache = PreviewCache(os.path.join(path, 'previews'))
+    ...     _ = cache.get(skeleton, 16)
+    ...     shutil.rmtree(cache.path)
+    ...     skeleton.update_bone(0, dict(radius=7))
+    ...     _ = cache.get(skeleton, 16)
+    ...     cache.size == sum(entry.stat().st_size for entry in os.scandir(cache.path))
+    True
+    """
+    def __init__(self, path_to_cache_dir=None, max_size=ProjectSettings.preview_cache_size):
+        """
+        :param path_to_cache_dir: directory for files of previews, previews are kept only in memory if it is None
+        :param max_size: maximal size of the files in bytes
+        """
+        self.__path = path_to_cache_dir
+        self.__max_size = max_size
+        # hash of the content -> PNG image
+        self.__images = dict()
+        # skeleton shown by previews -> (its version, dictionary with hashes by sizes of previews)
+        self.__keys = weakref.WeakKeyDictionary()
+        self.__size = 0
+        self.__make_dir()
+
+    def __make_dir(self):
+        """
+        Makes the directory of the cache if there is none and counts the size of its files.
+        """
+        if self.__path:
+            os.makedirs(self.__path, exist_ok=True)
+            self.__size = sum(entry.stat().st_size for entry in os.scandir(self.__path) if entry.is_file())
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def size(self):
+        """
+        :return: size of the files of the cache in bytes
+        """
+        return self.__size
+
+    def key(self, element, size=ProjectSettings.preview_size):
+        """
+        :param element: Skeleton or Animation
+        :param size: side of the preview in pixels
+        :return: hash of the content of the preview, see content_hash(),
+        it is computed again only if the version of the content is changed
+        >>> from model import CircleBone
+        >>> cache = PreviewCache()
+        >>> skeleton = Skeleton(name='Vasiliy')
+        >>> skeleton.add_bone(CircleBone(10, (20, 20)))
+        >>> first = cache.key(skeleton)
+        >>> first == cache.key(skeleton) == content_hash(skeleton, ProjectSettings.preview_size)
+        True
+        >>> skeleton.update_bone(0, dict(radius=5))
+        >>> cache.key(skeleton) == first
+        False
+        """
+        content = preview_content(element)
+        if content is None:
+            return content_hash(element, size)
+        version, keys = self.__keys.get(content, (None, None))
+        if version != content.version:
+            keys = dict()
+            self.__keys[content] = (content.version, keys)
+        if size not in keys:
+            keys[size] = content_hash(element, size)
+        return keys[size]
+
+    def get(self, element, size=ProjectSettings.preview_size):
+        """
+        :param element: Skeleton or Animation
+        :param size: side of the preview in pixels
+        :return: PNG image of the preview, it is rendered only if there is no preview of the same content
+        """
+        key = self.key(element, size)
+        image = self.__images.get(key)
+        if image is not None:
+            return image
+        file_path = os.path.join(self.__path, '{}.png'.format(key)) if self.__path else None
+        if file_path and os.path.exists(file_path):
+            with open(file_path, 'rb') as file:
+                image = file.read()
+            # modification time of the file is the time of the last use, see evict()
+            os.utime(file_path)
+        else:
+            content = preview_content(element)
+            image = render_thumbnail(content or Skeleton(name=''), size).to_png()
+            if file_path:
+                if not os.path.isdir(self.__path):
+                    # files counted in the size were removed with the directory
+                    self.__make_dir()
+                with open(file_path, 'wb') as file:
+                    file.write(image)
+                self.__size += len(image)
+                self.evict()
+        self.__images[key] = image
+        return image
+
+    def evict(self):
+        """
+        Removes the least recently used files until the cache fits into the maximal size.
+        """
+        if not self.__path or self.__size <= self.__max_size:
+            return
+        entries = sorted(
+            (entry for entry in os.scandir(self.__path) if entry.is_file()), key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries:
+            if self.__size <= self.__max_size:
+                break
+            self.__size -= entry.stat().st_size
+            os.remove(entry.path)
+            self.__images.pop(entry.name[:-len('.png')], None)
+
+
+def get_cache(path=ProjectSettings.preview_cache_dir):
+    """
+    :param path: path to the directory of the cache, previews are kept only in memory if it is None
+    :return: PreviewCache in the directory shared by all views and projects
+    """
+    if path not in _caches:
+        _caches[path] = PreviewCache(path)
+    return _caches[path]
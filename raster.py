@@ -0,0 +1,207 @@
+"""
+This is the RGBA pixel buffer for rendered frames without any GUI: cropping, pasting and encoding into PNG and PPM.
+Bones are drawn into it by numpy_raster.
+"""
+
+import struct
+import zlib
+
+
+class FrameBuffer:
+    """
+    RGBA image stored row by row in a bytearray.
+    >>> frame = FrameBuffer(2, 1)
+    >>> frame.set_pixel(1, 0, (255, 0, 0))
+    >>> frame.get_pixel(1, 0)
+    (255, 0, 0, 255)
+    >>> frame.content_bounds()
+    (1, 0, 2, 1)
+    """
+    def __init__(self, width: int, height: int, pixels=None):
+        """
+        :param width: width of the image in pixels
+        :param height: height of the image in pixels
+        :param pixels: bytearray or writable memoryview with RGBA pixels,
+        transparent image is created if it is not provided
+        >>> FrameBuffer(3, 2).size
+        (3, 2)
+        """
+        self.__width = width
+        self.__height = height
+        self.__pixels = pixels if pixels is not None else bytearray(width * height * 4)
+
+    @property
+    def width(self):
+        return self.__width
+
+    @property
+    def height(self):
+        return self.__height
+
+    @property
+    def size(self):
+        return self.__width, self.__height
+
+    @property
+    def pixels(self):
+        """
+        :return: bytearray with RGBA pixels
+        """
+        return self.__pixels
+
+    def get_pixel(self, x: int, y: int):
+        """
+        :return: color of the pixel as tuple of 4 (r, g, b, a)
+        >>> FrameBuffer(1, 1).get_pixel(0, 0)
+        (0, 0, 0, 0)
+        """
+        offset = (y * self.__width + x) * 4
+        return tuple(self.__pixels[offset:offset + 4])
+
+    def set_pixel(self, x: int, y: int, color: tuple):
+        """
+        Paints opaque pixel, pixels outside of the image are ignored.
+        :param color: tuple of three (r, g, b)
+        >>> frame = FrameBuffer(1, 1)
+        >>> frame.set_pixel(5, 5, (1, 2, 3))
+        >>> frame.set_pixel(0, 0, (1, 2, 3))
+        >>> frame.get_pixel(0, 0)
+        (1, 2, 3, 255)
+        """
+        if 0 <= x < self.__width and 0 <= y < self.__height:
+            offset = (y * self.__width + x) * 4
+            self.__pixels[offset:offset + 4] = bytes((color[0], color[1], color[2], 255))
+
+    def content_bounds(self):
+        """
+        :return: (left, top, right, bottom) box of non transparent pixels or None if the image is empty.
+        Right and bottom are exclusive.
+        >>> FrameBuffer(4, 4).content_bounds()
+        >>> frame = FrameBuffer(4, 4)
+        >>> frame.set_pixel(1, 2, (0, 0, 0))
+        >>> frame.set_pixel(2, 1, (0, 0, 0))
+        >>> frame.content_bounds()
+        (1, 1, 3, 3)
+        """
+        stride = self.__width * 4
+        rows = [y for y in range(self.__height) if any(self.__pixels[y * stride + 3:(y + 1) * stride:4])]
+        if not rows:
+            return None
+        left, right = self.__width, 0
+        for y in range(rows[0], rows[-1] + 1):
+            alpha = self.__pixels[y * stride + 3:(y + 1) * stride:4]
+            filled = [x for x in range(self.__width) if alpha[x]]
+            if filled:
+                left = min(left, filled[0])
+                right = max(right, filled[-1] + 1)
+        return left, rows[0], right, rows[-1] + 1
+
+    def crop(self, left: int, top: int, right: int, bottom: int):
+        """
+        :return: new FrameBuffer with the pixels of the box, right and bottom are exclusive
+        >>> frame = FrameBuffer(4, 4)
+        >>> frame.set_pixel(2, 1, (9, 9, 9))
+        >>> part = frame.crop(2, 1, 4, 3)
+        >>> part.size, part.get_pixel(0, 0)
+        ((2, 2), (9, 9, 9, 255))
+        """
+        stride = self.__width * 4
+        pixels = bytearray()
+        for y in range(top, bottom):
+            pixels += self.__pixels[y * stride + left * 4:y * stride + right * 4]
+        return FrameBuffer(right - left, bottom - top, pixels)
+
+    def paste(self, other, x: int, y: int):
+        """
+        Copies pixels of other image into this one, top left corner of other image is placed to (x, y).
+        >>> page = FrameBuffer(4, 4)
+        >>> sprite = FrameBuffer(1, 1)
+        >>> sprite.set_pixel(0, 0, (7, 7, 7))
+        >>> page.paste(sprite, 3, 2)
+        >>> page.get_pixel(3, 2)
+        (7, 7, 7, 255)
+        """
+        stride = self.__width * 4
+        other_stride = other.width * 4
+        for row in range(other.height):
+            offset = (y + row) * stride + x * 4
+            self.__pixels[offset:offset + other_stride] = other.pixels[row * other_stride:(row + 1) * other_stride]
+
+    @staticmethod
+    def filled(width: int, height: int, color: tuple):
+        """
+        :return: new opaque FrameBuffer filled with the color
+        >>> FrameBuffer.filled(2, 2, (255, 255, 255)).get_pixel(1, 1)
+        (255, 255, 255, 255)
+        """
+        return FrameBuffer(width, height, bytearray(bytes((color[0], color[1], color[2], 255)) * (width * height)))
+
+    def fill(self, color: tuple):
+        """
+        Paints all pixels opaque in place, so images over shared memory stay there.
+        :param color: tuple of three (r, g, b)
+        >>> frame = FrameBuffer(2, 1, memoryview(bytearray(8)))
+        >>> frame.fill((1, 2, 3))
+        >>> frame.get_pixel(1, 0)
+        (1, 2, 3, 255)
+        """
+        self.__pixels[:] = bytes((color[0], color[1], color[2], 255)) * (self.__width * self.__height)
+
+    def to_ppm(self):
+        """
+        :return: the image encoded as binary PPM file, alpha channel is dropped
+        >>> FrameBuffer.filled(1, 1, (1, 2, 3)).to_ppm()
+        b'P6 1 1 255\\n\\x01\\x02\\x03'
+        """
+        rgb = bytearray(self.__width * self.__height * 3)
+        for channel in range(3):
+            rgb[channel::3] = self.__pixels[channel::4]
+        return 'P6 {} {} 255\n'.format(self.__width, self.__height).encode() + bytes(rgb)
+
+    def to_png(self):
+        """
+        :return: the image encoded as PNG file
+        >>> FrameBuffer(1, 1).to_png()[:8]
+        b'\\x89PNG\\r\\n\\x1a\\n'
+        """
+        def chunk(tag, data):
+            return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+        stride = self.__width * 4
+        raw = b''.join(b'\x00' + bytes(self.__pixels[y * stride:(y + 1) * stride]) for y in range(self.__height))
+        return b''.join([
+            b'\x89PNG\r\n\x1a\n',
+            chunk(b'IHDR', struct.pack('>IIBBBBB', self.__width, self.__height, 8, 6, 0, 0, 0)),
+            chunk(b'IDAT', zlib.compress(raw)),
+            chunk(b'IEND', b''),
+        ])
+
+    def save_png(self, path):
+        """
+        Saves the image to the PNG file.
+        :param path: path to the file
+        """
+        with open(path, 'wb') as file:
+            file.write(self.to_png())
+
+
+def skeleton_bounds(skeleton):
+    """
+    :param skeleton: Skeleton to measure
+    :return: (left, top, right, bottom) box which contains all bones of the skeleton or None if there are no bones
+    >>> from model import Skeleton, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton_bounds(skeleton)
+    >>> skeleton.add_bone(CircleBone(10, (20, 20), thickness=2.0))
+    >>> skeleton_bounds(skeleton)
+    (9.0, 9.0, 31.0, 31.0)
+    """
+    boxes = [skeleton.get_bone(i).bounds for i in range(skeleton.number_of_bones)]
+    if not boxes:
+        return None
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
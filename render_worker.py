@@ -0,0 +1,298 @@
+"""
+This is the background renderer for animation playback and thumbnails of states.
+A worker thread rasterizes frames ahead of the playhead into a bounded queue,
+so the GUI thread only has to show finished images.
+Workers never touch objects of the model which the GUI thread edits: they get copies made on the GUI thread.
+"""
+
+import copy
+import queue
+import threading
+
+import numpy_raster
+from model import LOOP
+from raster import FrameBuffer, skeleton_bounds
+from settings import ProjectSettings
+
+
+def render_view(skeleton, size, scale=1.0, offset=(0, 0), background=(255, 255, 255), threshold=0, frame=None):
+    """
+    Renders the skeleton as it is seen on the canvas: without anti-aliasing, see numpy_raster.render_view().
+    Bones outside of the view and bones smaller than the threshold are skipped.
+    :param skeleton: Skeleton to render
+    :param size: (width, height) of the view in pixels
+    :param scale: number of pixels in the unit of the model
+    :param offset: position of the origin of the model in the view, screen = model * scale + offset
+    :param background: color of the view
+    :param threshold: minimal size of the bone in pixels
+    :param frame: FrameBuffer of the size to render into, a new one is created if it is None
+    :return: opaque FrameBuffer
+    >>> from model import Skeleton, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (0, 0), thickness=1.0))
+    >>> skeleton.add_bone(CircleBone(5, (100, 100), thickness=1.0))
+    >>> frame = render_view(skeleton, (20, 20), scale=2, offset=(10, 10))
+    >>> frame.get_pixel(0, 10), frame.get_pixel(10, 10)
+    ((0, 0, 0, 255), (255, 255, 255, 255))
+    """
+    return numpy_raster.render_view(skeleton, size, scale, offset, background, threshold, frame, supersample=1,
+                                    antialias=False)
+
+
+def render_thumbnail(skeleton, size, padding=2, background=(255, 255, 255)):
+    """
+    Renders the whole skeleton scaled to fit into the square.
+    :param skeleton: Skeleton to render
+    :param size: side of the square in pixels
+    :param padding: free space around the skeleton in pixels
+    :param background: color of the thumbnail
+    :return: opaque FrameBuffer
+    >>> from model import Skeleton, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(50, (100, 100), thickness=10.0))
+    >>> frame = render_thumbnail(skeleton, 16, padding=0)
+    >>> frame.get_pixel(0, 8), frame.get_pixel(8, 8)
+    ((0, 0, 0, 255), (255, 255, 255, 255))
+    >>> render_thumbnail(Skeleton(name='Empty'), 4).get_pixel(2, 2)
+    (255, 255, 255, 255)
+    """
+    bounds = skeleton_bounds(skeleton)
+    if bounds is None:
+        return FrameBuffer.filled(size, size, background)
+    left, top, right, bottom = bounds
+    scale = (size - 2 * padding) / max(right - left, bottom - top, 1e-6)
+    offset = (
+        size / 2 - (left + right) / 2 * scale,
+        size / 2 - (top + bottom) / 2 * scale,
+    )
+    return render_view(skeleton, (size, size), scale, offset, background)
+
+
+class FramePrefetcher:
+    """
+    Renders frames of the animation in a worker thread.
+    Frames are put into the queue in order of playback starting from the given time,
+    the worker waits while the queue is full.
+    Python code of the worker shares the interpreter lock with the GUI thread,
+    but the GUI thread is free between its short blits, so menus and the tree stay responsive.
+    The worker plays a copy of the animation made when the prefetcher is created,
+    the canvas creates a new prefetcher after every change of the model.
+    Changes of the view do not need a new prefetcher: set_view() passes the view to the worker,
+    which starts again from the given time, frames of the old view are dropped.
+    >>> from model import Animation, Skeleton, SkeletonState, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (10, 10), thickness=1.0))
+    >>> animation = Animation(skeleton, 'Standing')
+    >>> animation.add_state(SkeletonState(skeleton, [dict()]))
+    >>> prefetcher = FramePrefetcher(animation, (20, 20), fps=10, queue_size=2)
+    >>> prefetcher.start()
+    >>> [prefetcher.get_frame(timeout=5)[0] for _ in range(3)]
+    [0.0, 0.1, 0.2]
+    >>> prefetcher.set_view((40, 40), scale=2.0, start_time=0.5)
+    >>> time_point, image = prefetcher.get_frame(timeout=5)
+    >>> time_point, image.split()[1:3]
+    (0.5, [b'40', b'40'])
+    >>> prefetcher.stop()
+    >>> prefetcher.running
+    False
+    """
+    def __init__(self, animation, size, scale=1.0, offset=(0, 0), start_time=0.0, fps=ProjectSettings.playback_fps,
+                 queue_size=ProjectSettings.prefetch_frames, background=(255, 255, 255), threshold=0):
+        """
+        :param animation: Animation to render
+        :param size: (width, height) of the view in pixels
+        :param scale: number of pixels in the unit of the model
+        :param offset: position of the origin of the model in the view
+        :param start_time: time of the first frame in seconds
+        :param fps: number of frames per second
+        :param queue_size: maximal number of frames rendered ahead
+        :param background: color of the view
+        :param threshold: minimal size of the bone in pixels, see render_view()
+        """
+        self.__animation = copy.deepcopy(animation)
+        self.__view = dict(size=size, scale=scale, offset=offset, background=background, threshold=threshold)
+        self.__start_time = start_time
+        # the view and the start time are changed together, frames are marked with the version of the view
+        self.__lock = threading.Lock()
+        self.__view_version = 0
+        self.__fps = fps
+        self.__frames = queue.Queue(maxsize=queue_size)
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    @property
+    def running(self):
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self):
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__work, daemon=True)
+        self.__thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stops the worker, frames which are not taken yet are dropped.
+        :param wait: wait until the frame which is being rendered is finished
+        """
+        self.__stopped.set()
+        if self.__thread is not None and wait:
+            self.__thread.join()
+
+    def set_view(self, size, scale=1.0, offset=(0, 0), start_time=0.0, threshold=None):
+        """
+        Makes the worker render the next frames with the new view starting from the time.
+        Parameters are the same as in FramePrefetcher(), the threshold is kept if it is None.
+        """
+        with self.__lock:
+            self.__view = dict(self.__view, size=size, scale=scale, offset=offset)
+            if threshold is not None:
+                self.__view['threshold'] = threshold
+            self.__start_time = start_time
+            self.__view_version += 1
+
+    def get_frame(self, timeout=None):
+        """
+        :param timeout: seconds to wait for the frame, the call does not block if it is None
+        :return: tuple (time, PPM image) of the next frame or None if it is not rendered yet
+        """
+        while True:
+            try:
+                version, time_point, image = \
+                    self.__frames.get(timeout=timeout) if timeout else self.__frames.get_nowait()
+            except queue.Empty:
+                return None
+            if version == self.__view_version:
+                return time_point, image
+
+    def __work(self):
+        loop_duration = self.__animation.loop_duration
+        version = None
+        while not self.__stopped.is_set():
+            with self.__lock:
+                if version != self.__view_version:
+                    version, view, start_time = self.__view_version, self.__view, self.__start_time
+                    frame_idx = 0
+            time_point = start_time + frame_idx / self.__fps
+            # the loop of an animation with one state and no pause has no length
+            time_point = round(time_point % loop_duration, 6) if loop_duration > 0 else 0.0
+            image = render_view(self.__animation.pose_at(time_point, LOOP), **view).to_ppm()
+            # the frame is dropped if the view is changed while the queue is full
+            while not self.__stopped.is_set() and version == self.__view_version:
+                try:
+                    self.__frames.put((version, time_point, image), timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            frame_idx += 1
+
+
+class ThumbnailRenderer:
+    """
+    Renders thumbnails of states in a worker thread.
+    Thumbnails are cached by the state and its version, so the state is rendered again only after it is changed.
+    The GUI thread asks for thumbnails with get() and picks up finished ones with collect(),
+    neither of them waits for the worker.
+    >>> from model import Skeleton, SkeletonState, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (10, 10), thickness=1.0))
+    >>> state = SkeletonState(skeleton, [dict()])
+    >>> renderer = ThumbnailRenderer(size=8)
+    >>> renderer.start()
+    >>> renderer.get(state)
+    >>> renderer.collect(timeout=5) == [state]
+    True
+    >>> renderer.get(state)[:2]
+    b'P6'
+    >>> old_value = state.process_patch([dict(radius=3)])
+    >>> renderer.get(state)
+    >>> renderer.collect(timeout=5) == [state]
+    True
+    >>> renderer.stop()
+    """
+    def __init__(self, size=ProjectSettings.thumbnail_size, background=(255, 255, 255)):
+        """
+        :param size: side of the thumbnail in pixels
+        :param background: color of thumbnails
+        """
+        self.__size = size
+        self.__background = background
+        # id of the state -> (state, version of the state, PPM image)
+        self.__cache = dict()
+        self.__pending = set()
+        self.__requests = queue.Queue()
+        self.__finished = queue.Queue()
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    @property
+    def size(self):
+        return self.__size
+
+    def start(self):
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__work, daemon=True)
+        self.__thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stops the worker, requested thumbnails which are not rendered yet are dropped.
+        :param wait: wait until the thumbnail which is being rendered is finished
+        """
+        self.__stopped.set()
+        if self.__thread is not None and wait:
+            self.__thread.join()
+
+    def get(self, state):
+        """
+        :param state: SkeletonState to show
+        :return: PPM image of the current version of the state or None if it is not rendered yet,
+        in that case the state is queued for rendering
+        """
+        cached = self.__cache.get(id(state))
+        if cached and cached[0] is state and cached[1] == state.version:
+            return cached[2]
+        if (id(state), state.version) not in self.__pending:
+            self.__pending.add((id(state), state.version))
+            self.__requests.put((state, state.version, copy.deepcopy(state.get_skeleton())))
+        return None
+
+    def collect(self, timeout=None):
+        """
+        Moves finished thumbnails into the cache.
+        :param timeout: seconds to wait for the first thumbnail, the call does not block if it is None
+        :return: list of states with new thumbnails
+        """
+        states = list()
+        try:
+            while True:
+                state, version, image = self.__finished.get(timeout=timeout) if timeout and not states \
+                    else self.__finished.get_nowait()
+                self.__pending.discard((id(state), version))
+                if state.version == version:
+                    self.__cache[id(state)] = (state, version, image)
+                    states.append(state)
+        except queue.Empty:
+            pass
+        return states
+
+    def forget(self, states):
+        """
+        Drops cached thumbnails of states which are not in the list.
+        :param states: states to keep
+        """
+        keep = {id(state) for state in states}
+        for key in [key for key in self.__cache if key not in keep]:
+            del self.__cache[key]
+
+    def __work(self):
+        while not self.__stopped.is_set():
+            try:
+                state, version, skeleton = self.__requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # the state has been changed after the request, a new request is made by get()
+            if state.version != version:
+                self.__finished.put((state, version, None))
+                continue
+            image = render_thumbnail(skeleton, self.__size, background=self.__background).to_ppm()
+            self.__finished.put((state, version, image))
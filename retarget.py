@@ -0,0 +1,247 @@
+"""
+This is the retargeting tool.
+It moves animations to another skeleton: bones are matched by names or by a mapping table,
+lengths, radiuses and positions of the bones are rescaled to the proportions of the new skeleton.
+
+Usage: python retarget.py PROJECT_DIR TARGET_SKELETON_FILE OUTPUT_DIR [--map SOURCE=TARGET ...] [--workers N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import library
+from model import Animation, Skeleton, SkeletonState
+from settings import ProjectSettings
+
+# parameters which are scaled by the ratio of the bone sizes
+SIZE_PARAMETERS = ('length', 'radius')
+
+
+def bone_mapping(source, target, table=None):
+    """
+    :param source: Skeleton of the animation
+    :param target: new Skeleton
+    :param table: dictionary with names of target bones by names of source bones, bones are matched by names if None
+    :return: list with index of the source bone for every bone of the target, None for bones without source
+    >>> from model import CircleBone
+    >>> source, target = Skeleton(name='Vasiliy'), Skeleton(name='Ivan')
+    >>> for name in ('Head', 'Leg'):
+    ...     source.add_bone(CircleBone(1, (0, 0), name=name))
+    >>> for name in ('Leg', 'Tail', 'Skull'):
+    ...     target.add_bone(CircleBone(1, (0, 0), name=name))
+    >>> bone_mapping(source, target)
+    [1, None, None]
+    >>> bone_mapping(source, target, {'Head': 'Skull', 'Leg': 'Leg'})
+    [1, None, 0]
+    """
+    source_names = [source.get_bone(i).name for i in range(source.number_of_bones)]
+    if table is None:
+        table = {name: name for name in source_names}
+    source_by_target = {table[name]: i for i, name in enumerate(source_names) if name in table}
+    return [source_by_target.get(target.get_bone(i).name) for i in range(target.number_of_bones)]
+
+
+def skeleton_size(skeleton):
+    """
+    :return: the biggest side of the box of the skeleton, 0 for a skeleton without bones
+    """
+    boxes = [skeleton.get_bone(i).bounds for i in range(skeleton.number_of_bones)]
+    if not boxes:
+        return 0
+    return max(
+        max(box[2] for box in boxes) - min(box[0] for box in boxes),
+        max(box[3] for box in boxes) - min(box[1] for box in boxes),
+    )
+
+
+def retarget_update(update: dict, source_bone, target_bone, scale: float):
+    """
+    :param update: update of the source bone, see SkeletonState
+    :param source_bone: bone of the source skeleton
+    :param target_bone: bone of the target skeleton
+    :param scale: ratio of the sizes of the target and the source skeletons
+    :return: update of the target bone
+    >>> from model import SegmentBone
+    >>> retarget_update({'position': (12, 0), 'length': 20, 'rotation': 1},
+    ...                 SegmentBone(10, 0, (10, 0)), SegmentBone(30, 0, (100, 100)), 2.0)
+    {'position': (104.0, 100.0), 'length': 60.0, 'rotation': 1}
+    """
+    result = dict()
+    for key, value in update.items():
+        if key == 'position':
+            rest, new_rest = source_bone.position, target_bone.position
+            result[key] = tuple(b + (v - a) * scale for v, a, b in zip(value, rest, new_rest))
+        elif key in SIZE_PARAMETERS and hasattr(source_bone, key) and hasattr(target_bone, key):
+            rest = getattr(source_bone, key)
+            result[key] = value * getattr(target_bone, key) / rest if rest else getattr(target_bone, key)
+        elif key == 'name':
+            continue
+        else:
+            result[key] = value
+    return result
+
+
+def retarget_animation(animation, source, target, table=None):
+    """
+    Creates a copy of the animation for another skeleton.
+    :param animation: Animation to retarget
+    :param source: Skeleton of the animation
+    :param target: new Skeleton
+    :param table: names of target bones by names of source bones, see bone_mapping()
+    :return: tuple (new Animation, list with names of target bones which are not animated)
+    >>> from model import SegmentBone
+    >>> source, target = Skeleton(name='Vasiliy'), Skeleton(name='Ivan')
+    >>> source.add_bone(SegmentBone(10, 0, (0, 0), name='Leg'))
+    >>> target.add_bone(SegmentBone(5, 0, (0, 0), name='Tail'))
+    >>> target.add_bone(SegmentBone(20, 0, (0, 0), name='Leg'))
+    >>> animation = Animation(source, 'Walking')
+    >>> animation.add_state(SkeletonState(source, [dict(length=15, rotation=1)]))
+    >>> _ = animation.process_patch(dict(loop_transition=0.25, loop_easing='ease-in'))
+    >>> result, unmapped = retarget_animation(animation, source, target)
+    >>> result.skeleton_name, unmapped, result.get_state(0).to_dict()['bone_updates']
+    ('Ivan', ['Tail'], {'1': {'length': 30.0, 'rotation': 1}})
+    >>> result.loop_transition, result.loop_easing
+    (0.25, 'ease-in')
+    """
+    mapping = bone_mapping(source, target, table)
+    source_size = skeleton_size(source)
+    scale = skeleton_size(target) / source_size if source_size else 1.0
+    data = animation.to_dict()
+
+    result = Animation(target, animation.name)
+    for idx, state in enumerate(data['states']):
+        updates = state['bone_updates']
+        new_updates = dict()
+        for target_idx, source_idx in enumerate(mapping):
+            update = updates.get(source.get_bone(source_idx).id) if source_idx is not None else None
+            if update:
+                target_bone = target.get_bone(target_idx)
+                new_updates[target_bone.id] = retarget_update(update, source.get_bone(source_idx), target_bone, scale)
+        if idx == 0:
+            result.add_state(SkeletonState(target, new_updates))
+        else:
+            result.add_state(SkeletonState(target, new_updates), data['transitions'][idx - 1],
+                             data['easings'][idx - 1])
+    result.process_patch(dict(loop_transition=data['loop_transition'], loop_easing=data['loop_easing']))
+    unmapped = [target.get_bone(i).name for i, source_idx in enumerate(mapping) if source_idx is None]
+    return result, unmapped
+
+
+_skeletons = dict()
+
+
+def load_skeleton(path_to_file):
+    """
+    :return: Skeleton from the file, skeletons are cached by the worker process
+    """
+    if path_to_file not in _skeletons:
+        with open(path_to_file, 'r') as file:
+            data = json.load(file)
+        skeleton = Skeleton(name=data['name'])
+        skeleton.load_dict(data)
+        _skeletons[path_to_file] = skeleton
+    return _skeletons[path_to_file]
+
+
+def load_project_skeleton(path_to_project_dir, name):
+    """
+    Finds the skeleton of the project as Project.load() does: in the project or among its references to the library.
+    :param path_to_project_dir: directory of the project
+    :param name: name of the skeleton
+    :return: Skeleton, raises FileNotFoundError if the project has no such skeleton
+    >>> import tempfile
+    >>> from model import Project
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     version = library.SkeletonLibrary(os.path.join(path, 'library')).publish(Skeleton(name='Vasiliy'))
+    ...     project = Project()
+    ...     _ = project.add_reference('Vasiliy', path_to_library_dir=os.path.join(path, 'library'))
+    ...     project.save(os.path.join(path, 'project'))
+    ...     load_project_skeleton(os.path.join(path, 'project'), 'Vasiliy').name
+    'Vasiliy'
+    """
+    path_to_file = os.path.join(path_to_project_dir, ProjectSettings.skeletons_dir, name)
+    if os.path.exists(path_to_file):
+        return load_skeleton(path_to_file)
+    references_path = os.path.join(path_to_project_dir, ProjectSettings.library_references_file)
+    if os.path.exists(references_path):
+        with open(references_path, 'r') as file:
+            references = json.load(file)
+        for reference in references:
+            skeleton = library.SkeletonLibrary(reference['library']).get_skeleton(reference['id'], reference['version'])
+            if skeleton.name == name:
+                return skeleton
+    raise FileNotFoundError('Skeleton "{}" was not found in the project "{}".'.format(name, path_to_project_dir))
+
+
+def retarget_file(path_to_project_dir, name, path_to_target, path_to_output_dir, table=None):
+    """
+    Retargets one animation of the project and saves it to the output project.
+    :return: tuple (name of the animation, list of not animated bones)
+    """
+    animation = Animation(name=name)
+    skeleton_name = animation.load(path_to_project_dir)
+    source = load_project_skeleton(path_to_project_dir, skeleton_name)
+    animation.set_skeleton(source)
+    result, unmapped = retarget_animation(animation, source, load_skeleton(path_to_target), table)
+    result.save(path_to_output_dir)
+    return name, unmapped
+
+
+def retarget_directory(path_to_project_dir, path_to_target, path_to_output_dir, table=None, workers=None):
+    """
+    Retargets all animations of the project in parallel processes.
+    Output directory becomes a project with the target skeleton and retargeted animations.
+    :param path_to_project_dir: project with animations
+    :param path_to_target: file of the target skeleton
+    :param path_to_output_dir: directory for the new project, existing files with the same names are replaced
+    :param table: names of target bones by names of source bones, see bone_mapping()
+    :param workers: number of processes, number of processors by default
+    :return: dictionary with not animated bones of the target for every animation
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     retarget_directory('Vasilich', 'Vasilich/skeletons/Vasilich', path, workers=2)
+    ...     sorted(os.listdir(os.path.join(path, 'animations')))
+    {'Sertaki': []}
+    ['Sertaki']
+    """
+    target = load_skeleton(path_to_target)
+    for directory in (ProjectSettings.skeletons_dir, ProjectSettings.animations_dir):
+        os.makedirs(os.path.join(path_to_output_dir, directory), exist_ok=True)
+    shutil.copyfile(path_to_target, os.path.join(path_to_output_dir, ProjectSettings.skeletons_dir, target.name))
+
+    names = sorted(os.listdir(os.path.join(path_to_project_dir, ProjectSettings.animations_dir)))
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(retarget_file, path_to_project_dir, name, path_to_target, path_to_output_dir, table)
+            for name in names
+        ]
+        return dict(future.result() for future in futures)
+
+
+def parse_mapping(value: str):
+    """
+    >>> parse_mapping('Head=Skull')
+    ('Head', 'Skull')
+    """
+    source, _, target = value.partition('=')
+    return source, target
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move animations of the project to another skeleton.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('target', help='path to the file of the target skeleton')
+    parser.add_argument('output', help='path to the directory of the new project')
+    parser.add_argument('--map', action='append', type=parse_mapping, default=list(),
+                        help='name of the target bone for the source bone as SOURCE=TARGET, can be repeated, '
+                             'bones are matched by names if it is not provided')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes')
+    args = parser.parse_args()
+
+    for name, unmapped in retarget_directory(
+        args.project, args.target, args.output, dict(args.map) if args.map else None, args.workers
+    ).items():
+        print('{}: {}'.format(name, 'not animated bones: ' + ', '.join(unmapped) if unmapped else 'ok'))
@@ -0,0 +1,229 @@
+"""
+This is the compact runtime format of animations.
+An animation is baked at a fixed frame rate into a track per channel of every bone
+(x, y, thickness, length, rotation, radius, r, g, b). Values are stored as fixed-point integers
+with a step per parameter, optionally as differences between neighbour frames,
+in zigzag variable length encoding. Tracks which do not change are stored as a single value.
+Bounding boxes of the skeleton and, optionally, of every bone in every frame are stored after the tracks,
+they are rounded outwards to the step of positions, so the stored box always contains the bones.
+
+File layout:
+    magic "SKA1", flags (u8), fps (u16), number of frames (u32), number of bones (u16), number of tracks (u16),
+    names of the animation and the skeleton (u8 length + utf-8),
+    every track: bone index (u16), channel (u8), step (f32), constant flag (u8), values (varints),
+    bounds if there is the flag: step (f32), left, top, right and bottom values (varints) of the skeleton
+    and then of every bone if there is the flag of bounds of bones.
+
+The reference decoder is player.runtime.decode_animation().
+
+Usage: python runtime_export.py PROJECT_DIR OUTPUT_DIR [--fps 30] [--no-delta] [--no-bounds] [--bone-bounds]
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+
+import numpy
+
+from blending import flatten
+from bounds import pose_bounds
+from model import Project
+from player.runtime import CHANNELS, FLAG_DELTA, FLAG_BOUNDS, FLAG_BONE_BOUNDS, HEADER, MAGIC, TRACK_HEADER, \
+    BOUNDS_HEADER, TYPES, decode_animation
+from settings import ProjectSettings
+
+
+def write_varint(out: bytearray, value: int):
+    """
+    Appends the signed integer in zigzag LEB128 encoding.
+    >>> out = bytearray()
+    >>> for value in (0, -1, 1, 300):
+    ...     write_varint(out, value)
+    >>> bytes(out)
+    b'\\x00\\x01\\x02\\xd8\\x04'
+    """
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def sample_poses(animation, fps: int):
+    """
+    Evaluates the animation from the first state to the last one.
+    :return: list with parameters of the bones of every frame, see Bone.to_dict()
+    """
+    frame_count = int(math.floor(animation.duration * fps + 1e-9)) + 1
+    poses = list()
+    for frame in range(frame_count):
+        skeleton = animation.pose_at(frame / fps)
+        poses.append([skeleton.get_bone(i).to_dict() for i in range(skeleton.number_of_bones)])
+    return poses
+
+
+def sample_tracks(animation, fps: int, poses=None):
+    """
+    :param poses: poses made by sample_poses(), the animation is sampled if they are not given
+    :return: tuple (layout, frames), layout is a list of (bone index, channel index),
+    frames is a list with values of all channels for every frame,
+    raises ValueError for types of bones which the format can not carry, see player.runtime.TYPES
+    >>> sample_tracks(None, 30, [[{'position': (0, 0), 'thickness': 1.0, 'points': [], 'type': 'SPLINE'}]])
+    Traceback (most recent call last):
+    ...
+    ValueError: Bones of type "SPLINE" can not be exported into the runtime format.
+    """
+    poses = poses if poses is not None else sample_poses(animation, fps)
+    layout = list()
+    for bone, params in enumerate(poses[0]):
+        if params['type'] not in dict(TYPES):
+            raise ValueError('Bones of type "{}" can not be exported into the runtime format.'.format(params['type']))
+        layout.extend((bone, channel) for channel, (key, _) in enumerate(CHANNELS) if key in params)
+    dict_layout = [(bone, CHANNELS[channel]) for bone, channel in layout]
+    return layout, [flatten(params, dict_layout) for params in poses]
+
+
+def quantize_bounds(boxes, step: float):
+    """
+    Rounds boxes outwards to the step.
+    :param boxes: array with (left, top, right, bottom) in the last axis
+    :return: integer array, values of the box are multiplied by the step
+    >>> quantize_bounds(numpy.array([[0.3, -0.3, 1.2, 1.0]]), 0.5).tolist()
+    [[0, -1, 3, 2]]
+    """
+    return numpy.concatenate((
+        numpy.floor(boxes[..., :2] / step + 1e-9), numpy.ceil(boxes[..., 2:] / step - 1e-9)
+    ), axis=-1).astype(int)
+
+
+def export_animation(animation, fps=ProjectSettings.runtime_fps, delta=True, steps=None, bounds=True,
+                     bone_bounds=False):
+    """
+    Bakes the animation into the runtime format.
+    :param animation: Animation with states
+    :param fps: number of frames per second
+    :param delta: store differences between neighbour frames
+    :param steps: quantization step for every parameter, see ProjectSettings.runtime_steps
+    :param bounds: store bounds of the skeleton in every frame
+    :param bone_bounds: store bounds of every bone in every frame too
+    :return: bytes of the file
+    """
+    steps = steps or ProjectSettings.runtime_steps
+    poses = sample_poses(animation, fps)
+    layout, frames = sample_tracks(animation, fps, poses)
+    first = animation.pose_at(0)
+    bounds = bounds and first.number_of_bones > 0
+    flags = (FLAG_DELTA if delta else 0) | (FLAG_BOUNDS if bounds else 0) | \
+        (FLAG_BONE_BOUNDS if bounds and bone_bounds else 0)
+    out = bytearray(MAGIC)
+    out += struct.pack(HEADER, flags, fps, len(frames), first.number_of_bones, len(layout))
+    for name in (animation.name, animation.skeleton_name or ''):
+        encoded = name.encode('utf-8')[:255]
+        out += struct.pack('<B', len(encoded)) + encoded
+
+    for track, (bone, channel) in enumerate(layout):
+        step = steps[CHANNELS[channel][0]]
+        values = [int(round(frame[track] / step)) for frame in frames]
+        constant = all(value == values[0] for value in values)
+        out += struct.pack(TRACK_HEADER, bone, channel, step, constant)
+        previous = 0
+        for value in values[:1] if constant else values:
+            write_varint(out, value - previous if delta else value)
+            if delta:
+                previous = value
+
+    if bounds:
+        step = steps['position']
+        skeleton_boxes, boxes = pose_bounds(poses)
+        out += struct.pack(BOUNDS_HEADER, step)
+        for box in [skeleton_boxes] + ([boxes[:, i] for i in range(boxes.shape[1])] if bone_bounds else []):
+            for values in quantize_bounds(box, step).T.tolist():
+                previous = 0
+                for value in values:
+                    write_varint(out, value - previous if delta else value)
+                    if delta:
+                        previous = value
+    return bytes(out)
+
+
+def measure(animation, fps=ProjectSettings.runtime_fps, delta=True, steps=None, bone_bounds=False):
+    """
+    Exports the animation, decodes it and compares the result with evaluation of the editor.
+    :return: dictionary with size of the runtime file, size of the animation file of the editor,
+    maximal error for every parameter and whether decoded bounds contain the evaluated ones
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> animation = project.get_animation('Sertaki')
+    >>> report = measure(animation, fps=30)
+    >>> report['size'] < report['json_size'] / 2
+    True
+    >>> all(error <= ProjectSettings.runtime_steps[key] / 2 + 1e-6 for key, error in report['errors'].items())
+    True
+    >>> report['bounds_contained'], measure(animation, fps=30, bone_bounds=True)['bounds_contained']
+    (True, True)
+    """
+    data = export_animation(animation, fps, delta, steps, bone_bounds=bone_bounds)
+    decoded = decode_animation(data)
+    poses = sample_poses(animation, fps)
+    layout, frames = sample_tracks(animation, fps, poses)
+    errors = dict()
+    for frame, values in zip(decoded['frames'], frames):
+        for (bone, channel), value in zip(layout, values):
+            key, component = CHANNELS[channel]
+            decoded_value = frame[bone][key] if component is None else frame[bone][key][component]
+            errors[key] = max(errors.get(key, 0.0), abs(decoded_value - value))
+    contained = True
+    if 'bounds' in decoded:
+        skeleton_boxes, boxes = pose_bounds(poses)
+        for exact, stored in [(skeleton_boxes, numpy.array(decoded['bounds']))] + (
+            [(boxes, numpy.array(decoded['bone_bounds']))] if bone_bounds else []
+        ):
+            contained = contained and bool(
+                (stored[..., :2] <= exact[..., :2] + 1e-6).all() and (stored[..., 2:] >= exact[..., 2:] - 1e-6).all()
+            )
+    return dict(
+        size=len(data),
+        json_size=len(json.dumps(animation.to_dict(), indent=2)),
+        errors=errors,
+        bounds_contained=contained,
+    )
+
+
+def export_project(path_to_project_dir, path_to_output_dir, fps=ProjectSettings.runtime_fps, delta=True, bounds=True,
+                   bone_bounds=False):
+    """
+    Exports every animation of the project into <name>.ska files.
+    :return: dictionary with the report of measure() for every animation
+    """
+    project = Project()
+    project.load(path_to_project_dir)
+    os.makedirs(path_to_output_dir, exist_ok=True)
+    reports = dict()
+    for i in range(project.number_of_animations):
+        animation = project.get_animation(i)
+        if not animation.number_of_states:
+            continue
+        with open(os.path.join(path_to_output_dir, '{}.ska'.format(animation.name)), 'wb') as file:
+            file.write(export_animation(animation, fps, delta, bounds=bounds, bone_bounds=bone_bounds))
+        reports[animation.name] = measure(animation, fps, delta, bone_bounds=bounds and bone_bounds)
+    return reports
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export animations of the project into the compact runtime format.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('output', help='path to the output directory')
+    parser.add_argument('--fps', type=int, default=ProjectSettings.runtime_fps, help='number of frames per second')
+    parser.add_argument('--no-delta', dest='delta', action='store_false', help='do not store differences of frames')
+    parser.add_argument('--no-bounds', dest='bounds', action='store_false', help='do not store bounds of frames')
+    parser.add_argument('--bone-bounds', action='store_true', help='store bounds of every bone in every frame')
+    args = parser.parse_args()
+
+    reports = export_project(args.project, args.output, args.fps, args.delta, args.bounds, args.bone_bounds)
+    for name, report in reports.items():
+        print('{}: {} bytes (editor file {} bytes), max errors: {}'.format(
+            name, report['size'], report['json_size'],
+            ', '.join('{} {:.4g}'.format(key, error) for key, error in sorted(report['errors'].items()))
+        ))
@@ -0,0 +1,197 @@
+"""
+This is the streaming export of animations into sequences of frames.
+Frames are generators: sample_frames() evaluates poses of the animation one at a time
+and frame_export.render_frames() renders them, writers consume frames as they are made,
+so memory does not depend on the length of the animation.
+SVG files are written right from the poses, PNG files and raw RGBA frames from rendered images.
+The output "-" streams raw RGBA frames into the standard output, the number and the size of frames
+are printed into the standard error, e.g. for ffmpeg:
+python sequence_export.py Vasilich Sertaki - | ffmpeg -f rawvideo -pix_fmt rgba -s WIDTHxHEIGHT -r 24 -i - out.mp4
+
+Usage: python sequence_export.py PROJECT_DIR ANIMATION OUTPUT_DIR|- [--format png] [--fps 24] [--scale 1.0]
+"""
+
+import argparse
+import os
+import sys
+
+from frame_export import animation_view, frame_count, render_frames
+from model import LOOP, Project
+from numpy_raster import bone_arrays
+from settings import ProjectSettings
+
+SVG, PNG, RGBA = 'svg', 'png', 'rgba'
+FORMATS = (SVG, PNG, RGBA)
+# output which streams frames into the standard output
+STDOUT = '-'
+
+
+def sample_frames(animation, fps=ProjectSettings.export_fps):
+    """
+    Evaluates the loop of the animation frame by frame, the pause before the loop included.
+    :param animation: Animation to sample
+    :param fps: number of frames per second
+    :return: generator of tuples (index of the frame, time in seconds, list with parameters of the bones)
+    >>> from model import Animation, Skeleton, SkeletonState, CircleBone
+    >>> skeleton = Skeleton(name='Vasiliy')
+    >>> skeleton.add_bone(CircleBone(5, (10, 10)))
+    >>> animation = Animation(skeleton, 'Breathing')
+    >>> animation.add_state(SkeletonState(skeleton))
+    >>> animation.add_state(SkeletonState(skeleton, [dict(radius=9)]), 1.0)
+    >>> [(idx, time_point, pose[0]['radius']) for idx, time_point, pose in sample_frames(animation, fps=2)]
+    [(0, 0.0, 5), (1, 0.5, 7.0), (2, 1.0, 9), (3, 1.5, 9)]
+    """
+    for frame_idx in range(frame_count(animation, fps)):
+        time_point = frame_idx / fps
+        skeleton = animation.pose_at(time_point, LOOP)
+        yield frame_idx, time_point, [skeleton.get_bone(i).to_dict() for i in range(skeleton.number_of_bones)]
+
+
+def svg_frame(pose: list, size, scale=1.0, offset=(0, 0), background=(255, 255, 255)):
+    """
+    :param pose: list with parameters of the bones, see Bone.to_dict()
+    :param size: (width, height) of the image in pixels
+    :param scale: number of pixels in the unit of the model
+    :param offset: position of the origin of the model on the image
+    :param background: color of the image, the image is transparent if it is None
+    :return: text of the SVG image
+    >>> print(svg_frame([{'position': (0, 1), 'color': (255, 0, 0), 'thickness': 1.0, 'length': 4,
+    ...                   'rotation': 0, 'type': 'SEGMENT'}], (8, 4), scale=2, background=None))
+    <svg xmlns="http://www.w3.org/2000/svg" width="8" height="4" viewBox="0 0 8 4">
+    <line x1="0" y1="2" x2="8" y2="2" stroke="#ff0000" stroke-width="2" stroke-linecap="round"/>
+    </svg>
+    """
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" viewBox="0 0 {0} {1}">'.format(*size)]
+    if background is not None:
+        lines.append('<rect width="100%" height="100%" fill="#{:02x}{:02x}{:02x}"/>'.format(*background))
+    # bones are stroked as the rasterizer draws them, see numpy_raster.bone_arrays()
+    arrays = bone_arrays(pose, scale, offset)
+    for start, end, radius, half, color, ring in zip(
+        arrays['start'].tolist(), arrays['end'].tolist(), arrays['radius'].tolist(), arrays['half'].tolist(),
+        arrays['color'].astype(int).tolist(), arrays['circle'].tolist(),
+    ):
+        color = '#{:02x}{:02x}{:02x}'.format(*color)
+        if ring:
+            lines.append('<circle cx="{:g}" cy="{:g}" r="{:g}" fill="none" stroke="{}" stroke-width="{:g}"/>'.format(
+                *start, radius, color, half * 2
+            ))
+        else:
+            lines.append(
+                '<line x1="{:g}" y1="{:g}" x2="{:g}" y2="{:g}" stroke="{}" stroke-width="{:g}" '
+                'stroke-linecap="round"/>'.format(*start, *end, color, half * 2)
+            )
+    lines.append('</svg>')
+    return '\n'.join(lines)
+
+
+def write_svg(frames, path_to_dir, name, size, scale=1.0, offset=(0, 0), background=(255, 255, 255)):
+    """
+    Writes every frame into the file "{name}_{frame}.svg" inside the directory.
+    :param frames: iterable of frames, see sample_frames()
+    :return: number of written frames
+    """
+    count = 0
+    for frame_idx, _, pose in frames:
+        with open(os.path.join(path_to_dir, '{}_{:04d}.svg'.format(name, frame_idx)), 'w') as file:
+            file.write(svg_frame(pose, size, scale, offset, background))
+        count += 1
+    return count
+
+
+def write_png(frames, path_to_dir, name):
+    """
+    Writes every frame into the file "{name}_{frame}.png" inside the directory.
+    :param frames: iterable of tuples (index of the frame, FrameBuffer), see frame_export.render_frames()
+    :return: number of written frames
+    """
+    count = 0
+    for frame_idx, frame in frames:
+        frame.save_png(os.path.join(path_to_dir, '{}_{:04d}.png'.format(name, frame_idx)))
+        count += 1
+    return count
+
+
+def write_rgba(frames, stream):
+    """
+    Writes pixels of every frame into the binary stream one after another, rows from top to bottom.
+    :param frames: iterable of tuples (index of the frame, FrameBuffer), see frame_export.render_frames()
+    :return: number of written frames
+    >>> import io
+    >>> from raster import FrameBuffer
+    >>> stream = io.BytesIO()
+    >>> write_rgba([(0, FrameBuffer.filled(2, 1, (255, 0, 0))), (1, FrameBuffer(2, 1))], stream)
+    2
+    >>> stream.getvalue()
+    b'\\xff\\x00\\x00\\xff\\xff\\x00\\x00\\xff\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00'
+    """
+    count = 0
+    for _, frame in frames:
+        stream.write(frame.pixels)
+        count += 1
+    stream.flush()
+    return count
+
+
+def export_sequence(animation, output, fmt=PNG, fps=ProjectSettings.export_fps, scale=1.0,
+                    background=(255, 255, 255), workers=ProjectSettings.export_workers):
+    """
+    Exports the loop of the animation frame by frame.
+    :param animation: Animation to export
+    :param output: path to the output directory or "-" to stream raw RGBA frames into the standard output
+    :param fmt: format of files of frames, see FORMATS, frames are raw RGBA if the output is "-"
+    :param fps: number of frames per second
+    :param scale: number of pixels in the unit of the model
+    :param background: color of frames
+    :param workers: number of render processes for raster formats
+    :return: tuple (number of exported frames, (width, height) of frames)
+    >>> import tempfile
+    >>> project = Project()
+    >>> project.load('Vasilich')
+    >>> animation = project.get_animation('Sertaki')
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     export_sequence(animation, path, SVG, fps=5)
+    ...     sorted(os.listdir(path))[:2]
+    (8, (160, 302))
+    ['Sertaki_0000.svg', 'Sertaki_0001.svg']
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     export_sequence(animation, path, PNG, fps=5, workers=2)[0]
+    ...     len(os.listdir(path))
+    8
+    8
+    """
+    if output == STDOUT:
+        fmt = RGBA
+    elif fmt == RGBA:
+        raise ValueError('Raw RGBA frames are streamed only into the standard output')
+    size, offset = animation_view(animation, (frame / fps for frame in range(frame_count(animation, fps))), scale)
+    if fmt == SVG:
+        count = write_svg(sample_frames(animation, fps), output, animation.name, size, scale, offset, background)
+    else:
+        frames = render_frames(animation, fps, scale, workers, background=background)
+        if fmt == RGBA:
+            count = write_rgba(frames, sys.stdout.buffer)
+        else:
+            count = write_png(frames, output, animation.name)
+    return count, size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the animation frame by frame.')
+    parser.add_argument('project', help='path to the project directory')
+    parser.add_argument('animation', help='name of the animation')
+    parser.add_argument('output', help='path to the output directory, "-" streams raw RGBA frames into stdout')
+    parser.add_argument('--format', choices=(SVG, PNG), default=PNG, help='format of files of frames')
+    parser.add_argument('--fps', type=int, default=ProjectSettings.export_fps, help='number of frames per second')
+    parser.add_argument('--scale', type=float, default=1.0, help='number of pixels in the unit of the model')
+    parser.add_argument('--workers', type=int, default=ProjectSettings.export_workers, help='number of processes')
+    args = parser.parse_args()
+
+    project = Project()
+    project.load(args.project)
+    if args.output != STDOUT:
+        os.makedirs(args.output, exist_ok=True)
+    count, (width, height) = export_sequence(
+        project.get_animation(args.animation), args.output, args.format, args.fps, args.scale, workers=args.workers
+    )
+    # the standard output may be taken by frames
+    print('{} frames {}x{}'.format(count, width, height), file=sys.stderr)
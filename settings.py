@@ -1,3 +1,6 @@
+import os
+
+
 class ProjectSettings:
     """
     Static class with the settings of the project.
@@ -5,6 +8,100 @@ class ProjectSettings:
     default_bone_color = (0, 0, 0)
     default_bone_thickness = 1.0
     default_transition_time = 1.0
+    default_easing = 'linear'
+    # time in seconds from the last state to the first one during the loop playback
+    loop_transition_time = 1.0
+    easing_table_size = 256
+    playback_fps = 30
+    background_rendering = False
+    prefetch_frames = 8
+    # milliseconds without changes of the view before the background rendering gets the new view
+    prefetch_view_delay = 100
+
+    onion_skin_enabled = True
+    onion_skin_frames = 2
+    onion_skin_previous_color = (255, 0, 0)
+    onion_skin_next_color = (0, 160, 0)
+
+    # timeline under the canvas: minimal scale, snap of dragged states in seconds, side of thumbnails in pixels
+    timeline_pixels_per_second = 200
+    timeline_snap = 0.01
+    thumbnail_size = 48
+    thumbnail_poll_interval = 50
+
+    # previews of skeletons and animations: directory of the cache shared by projects, its maximal size in bytes,
+    # sides of previews in the tree and in the overview in pixels
+    preview_cache_dir = os.path.join(os.path.expanduser('~'), '.animation_editor', 'previews')
+    preview_cache_size = 16 * 1024 * 1024
+    preview_size = 16
+    overview_preview_size = 96
+    overview_columns = 5
+
+    # crowd preview: number of instances, number of different phases of every animation,
+    # size of the cell relative to the character, number of frames to average the frame rate
+    crowd_size = 100
+    crowd_phase_buckets = 16
+    crowd_spacing = 1.2
+    crowd_fps_window = 60
+
+    # period of checking project files for external changes in milliseconds
+    watch_interval = 1000
+
+    lod_enabled = True
+    lod_pixel_threshold = 2
+
+    atlas_fps = 24
+    atlas_max_page_size = 2048
+    atlas_padding = 1
+
+    # rasterizer: samples along each axis of the pixel for anti-aliasing, limit of distances computed at once,
+    # cost of a batch of bones in computed distances
+    raster_supersample = 1
+    raster_batch_pixels = 1 << 20
+    raster_batch_overhead = 1 << 12
+
+    # export of PNG images: frames per second, render processes, frame buffers in shared memory
+    export_fps = 24
+    export_workers = max((os.cpu_count() or 2) - 1, 1)
+    export_ring_size = 8
+    export_antialias = True
+    # milliseconds between checks whether the export started from the menu has finished
+    export_poll_interval = 100
+    # number of poses sampled at once when bounds of the whole export are computed
+    export_chunk_frames = 256
+
+    # manifest of the incremental export inside the output directory, see build.py
+    build_manifest_file = 'build_manifest.json'
+
+    runtime_fps = 30
+    # quantization steps of the runtime export
+    runtime_steps = {
+        'position': 1 / 64,
+        'thickness': 1 / 64,
+        'length': 1 / 64,
+        'rotation': 1 / 4096,
+        'radius': 1 / 64,
+        'color': 1,
+    }
+
+    keyframe_tolerances = {
+        'position': 0.5,
+        'color': 1,
+        'thickness': 0.05,
+        'length': 0.5,
+        'rotation': 0.005,
+        'radius': 0.5,
+    }
+
+    # directory for the journal and the checkpoint of the autosave, checkpoint period in seconds
+    autosave_dir = os.path.join(os.path.expanduser('~'), '.animation_editor', 'autosave')
+    autosave_interval = 30
+    # milliseconds between checks whether the autosave thread has finished when the editor is closed
+    autosave_poll_interval = 50
+
+    # shared library of skeletons and the file of the project with references to it
+    skeleton_library_dir = os.path.join(os.path.expanduser('~'), '.animation_editor', 'library')
+    library_references_file = 'library.json'
 
     animations_dir = 'animations'
     skeletons_dir = 'skeletons'
@@ -1,11 +1,59 @@
 import doctest
 
+import fixtures
+
+import atlas
+import autosave
+import blending
+import bounds
+import build
+import command
+import crowd
+import easing
+import frame_export
+import keyframes
+import library
 import model
+import numpy_raster
+import player.benchmark
+import player.playback
+import player.runtime
+import preview_cache
+import raster
+import render_worker
+import retarget
+import runtime_export
+import sequence_export
+import timeline
+import watcher
 
 mods_to_test = [
-    model
+    model,
+    numpy_raster,
+    player.playback,
+    player.runtime,
+    player.benchmark,
+    library,
+    easing,
+    raster,
+    atlas,
+    autosave,
+    frame_export,
+    sequence_export,
+    keyframes,
+    blending,
+    bounds,
+    build,
+    command,
+    crowd,
+    preview_cache,
+    render_worker,
+    retarget,
+    runtime_export,
+    timeline,
+    watcher,
 ]
 
 if __name__ == '__main__':
     for mod in mods_to_test:
-        doctest.testmod(mod, verbose=False)
+        doctest.testmod(mod, verbose=False, extraglobs=dict(fixtures=fixtures))
@@ -0,0 +1,278 @@
+"""
+This is the timeline of the animation under the canvas.
+States are shown as keys at their moments with transition times between them and a strip of thumbnails.
+Keys are dragged to change transition times, clicking a key selects its state,
+dragging over the rest of the timeline scrubs the animation.
+Thumbnails are rendered by render_worker.ThumbnailRenderer, only for the visible part of the timeline.
+"""
+
+import tkinter
+
+import command
+from model import Animation
+from render_worker import ThumbnailRenderer
+from settings import ProjectSettings
+
+MARGIN = 10
+RULER_HEIGHT = 16
+KEY_SIZE = 6
+LABEL_HEIGHT = 14
+
+
+def move_key(transitions, idx: int, time_point: float, snap=ProjectSettings.timeline_snap):
+    """
+    Moves the state of the animation to the moment, neighbour states stay in place.
+    :param transitions: times in seconds between neighbour states
+    :param idx: index of the moved state, the first state can not be moved
+    :param time_point: new time of the state, it is clamped by the neighbour states
+    :param snap: step of the time in seconds
+    :return: new list of transitions
+    >>> move_key([1.0, 1.0, 1.0], 1, 0.5)
+    [0.5, 1.5, 1.0]
+    >>> move_key([1.0, 1.0], 2, 5.004)
+    [1.0, 4.0]
+    >>> move_key([1.0, 1.0], 1, 3)
+    [2.0, 0.0]
+    >>> move_key([1.0, 1.0], 0, 3)
+    [1.0, 1.0]
+    """
+    result = list(transitions)
+    if idx <= 0 or idx > len(result):
+        return result
+    previous = sum(result[:idx - 1])
+    time_point = max(round(time_point / snap) * snap, previous)
+    if idx < len(result):
+        time_point = min(time_point, previous + result[idx - 1] + result[idx])
+        result[idx] = round(previous + result[idx - 1] + result[idx] - time_point, 6)
+    result[idx - 1] = round(time_point - previous, 6)
+    return result
+
+
+class TimelineView(tkinter.Canvas):
+    def __init__(self, master, command_list, scrub=None):
+        """
+        :param command_list: CommandList for changes of the animation
+        :param scrub: function (time, hold) which shows the animation at the moment, see ResourceViewer.seek()
+        """
+        self.__thumbnail_size = ProjectSettings.thumbnail_size
+        tkinter.Canvas.__init__(
+            self, master, background="white",
+            height=RULER_HEIGHT + self.__thumbnail_size + 2 * KEY_SIZE + LABEL_HEIGHT + 4
+        )
+        self.__command_list = command_list
+        self.__scrub = scrub
+        self.__model = None
+        self.__animation = None
+        self.__scale = ProjectSettings.timeline_pixels_per_second
+        self.__renderer = ThumbnailRenderer(self.__thumbnail_size)
+        self.__renderer.start()
+        # id of the state -> (version of the state, PhotoImage), PhotoImage has to be referenced while it is shown
+        self.__images = dict()
+        # id of the state -> canvas item of its thumbnail
+        self.__thumbnails = dict()
+        self.__drag = None
+        self.__scrub_time = None
+        self.__scrub_scheduled = False
+
+        self.bind("<ButtonPress-1>", self.__press)
+        self.bind("<B1-Motion>", self.__motion)
+        self.bind("<ButtonRelease-1>", self.__release)
+        self.bind("<Configure>", lambda event: self.redraw())
+        self.bind("<Destroy>", lambda event: self.__renderer.stop(wait=False))
+        self.after(ProjectSettings.thumbnail_poll_interval, self.__poll_thumbnails)
+
+    @property
+    def key_y(self):
+        return RULER_HEIGHT + self.__thumbnail_size + KEY_SIZE + 4
+
+    def x_of(self, time_point):
+        return MARGIN + time_point * self.__scale
+
+    def time_of(self, x):
+        return (self.canvasx(x) - MARGIN) / self.__scale
+
+    def xview(self, *args):
+        result = tkinter.Canvas.xview(self, *args)
+        if args:
+            self.__show_thumbnails()
+        return result
+
+    def on_model_changed(self, model):
+        self.__model = model
+        active = model.active_element
+        if isinstance(active, Animation):
+            self.__animation = active
+        else:
+            found = model.find_state(active)
+            self.__animation = found[0] if found else None
+        self.redraw()
+
+    def on_assets_reloaded(self, model, elements):
+        self.on_model_changed(model)
+
+    def show_time(self, time_point):
+        """
+        Moves the playhead to the moment.
+        :param time_point: time in seconds
+        """
+        x = self.x_of(time_point)
+        self.coords("playhead", x, 0, x, int(self["height"]))
+
+    def redraw(self):
+        self.delete("all")
+        self.__thumbnails.clear()
+        animation = self.__animation
+        if not animation or not animation.number_of_states:
+            self.__renderer.forget([])
+            self.__images.clear()
+            return
+        states = [animation.get_state(i) for i in range(animation.number_of_states)]
+        self.__renderer.forget(states)
+        for key in set(self.__images) - {id(state) for state in states}:
+            del self.__images[key]
+
+        width = max(self.winfo_width(), 1)
+        self.__scale = max(
+            ProjectSettings.timeline_pixels_per_second,
+            (width - 2 * MARGIN) / animation.loop_duration if animation.loop_duration > 0 else 0
+        )
+        height = int(self["height"])
+        end = self.x_of(animation.loop_duration)
+        self.configure(scrollregion=(0, 0, end + MARGIN, height))
+
+        self.__draw_ruler(animation.loop_duration)
+        timeline = animation.timeline
+        key_y = self.key_y
+        self.create_line(self.x_of(0), key_y, self.x_of(animation.duration), key_y, fill="gray")
+        self.create_line(self.x_of(animation.duration), key_y, end, key_y, fill="gray", dash=(2, 2))
+
+        active = self.__model.active_element if self.__model else None
+        last_thumbnail = None
+        for idx, (state, start) in enumerate(zip(states, timeline)):
+            x = self.x_of(start)
+            if idx + 1 < len(timeline):
+                self.create_text(
+                    (x + self.x_of(timeline[idx + 1])) / 2, key_y + KEY_SIZE + LABEL_HEIGHT / 2,
+                    text="{:.2f}".format(animation.transitions[idx]), fill="gray", font=("TkDefaultFont", 7),
+                    tags="label_{}".format(idx)
+                )
+            if last_thumbnail is None or x - last_thumbnail >= self.__thumbnail_size:
+                last_thumbnail = x
+                self.__thumbnails[id(state)] = self.create_image(
+                    x, RULER_HEIGHT + 2, anchor="n", tags=("thumbnail", "key_{}".format(idx))
+                )
+            self.create_polygon(
+                x, key_y - KEY_SIZE, x + KEY_SIZE, key_y, x, key_y + KEY_SIZE, x - KEY_SIZE, key_y,
+                fill="orange" if state is active else "gray", outline="black",
+                tags=("key", "key_{}".format(idx))
+            )
+        self.create_line(self.x_of(0), 0, self.x_of(0), height, fill="red", tags="playhead")
+        self.__show_thumbnails()
+
+    def __draw_ruler(self, duration):
+        step = 1.0
+        while step * self.__scale < 40:
+            step *= 2
+        while step * self.__scale > 160:
+            step /= 2
+        tick = 0
+        while tick * step <= duration:
+            x = self.x_of(tick * step)
+            self.create_line(x, RULER_HEIGHT - 4, x, RULER_HEIGHT, fill="gray")
+            self.create_text(x + 2, 1, text="{:g}".format(round(tick * step, 3)), anchor="nw",
+                             font=("TkDefaultFont", 7))
+            tick += 1
+        self.create_line(0, RULER_HEIGHT, self.x_of(duration) + MARGIN, RULER_HEIGHT, fill="gray")
+
+    def __show_thumbnails(self):
+        """
+        Shows thumbnails of the visible part of the timeline, missing ones are requested from the renderer.
+        """
+        if not self.__animation:
+            return
+        left = self.canvasx(0) - self.__thumbnail_size
+        right = self.canvasx(max(self.winfo_width(), 1)) + self.__thumbnail_size
+        for idx in range(self.__animation.number_of_states):
+            state = self.__animation.get_state(idx)
+            item = self.__thumbnails.get(id(state))
+            if item is None or not left <= self.coords(item)[0] <= right:
+                continue
+            cached = self.__images.get(id(state))
+            if cached and cached[0] == state.version:
+                self.itemconfigure(item, image=cached[1])
+                continue
+            data = self.__renderer.get(state)
+            if data:
+                image = tkinter.PhotoImage(data=data, format="PPM")
+                self.__images[id(state)] = (state.version, image)
+                self.itemconfigure(item, image=image)
+
+    def __poll_thumbnails(self):
+        if self.__renderer.collect():
+            self.__show_thumbnails()
+        self.after(ProjectSettings.thumbnail_poll_interval, self.__poll_thumbnails)
+
+    def __press(self, event):
+        self.__drag = None
+        if not self.__animation or not self.__animation.number_of_states:
+            return
+        for item in self.find_overlapping(
+            self.canvasx(event.x) - 1, self.canvasy(event.y) - 1, self.canvasx(event.x) + 1, self.canvasy(event.y) + 1
+        ):
+            tags = self.gettags(item)
+            if "key" in tags:
+                idx = int(next(tag for tag in tags if tag.startswith("key_"))[len("key_"):])
+                self.__drag = dict(idx=idx, x=self.canvasx(event.x), transitions=None)
+                return
+        if self.__model and self.__model.active_element is not self.__animation:
+            self.__command_list.add_command(command.SelectCommand(self.__animation))
+        self.__scrub_to(self.time_of(event.x))
+
+    def __motion(self, event):
+        if self.__drag is None:
+            if self.__scrub_time is not None:
+                self.__scrub_to(self.time_of(event.x))
+            return
+        idx = self.__drag["idx"]
+        if idx == 0:
+            return
+        transitions = move_key(self.__animation.transitions, idx, self.time_of(event.x))
+        x = self.x_of(sum(transitions[:idx]))
+        self.move("key_{}".format(idx), x - self.__drag["x"], 0)
+        self.__drag.update(x=x, transitions=transitions)
+        for label in (idx - 1, idx):
+            if label < len(transitions):
+                self.itemconfigure("label_{}".format(label), text="{:.2f}".format(transitions[label]))
+
+    def __release(self, event):
+        drag, self.__drag = self.__drag, None
+        if drag is None:
+            if self.__scrub_time is not None:
+                self.__scrub_to(self.time_of(event.x), hold=False)
+                self.__scrub_time = None
+            return
+        if drag["transitions"] is not None and drag["transitions"] != list(self.__animation.transitions):
+            self.__command_list.add_command(
+                command.PatchCommand({"transitions": drag["transitions"]}, target=self.__animation)
+            )
+        elif drag["transitions"] is None:
+            self.__command_list.add_command(command.SelectCommand(self.__animation.get_state(drag["idx"])))
+
+    def __scrub_to(self, time_point, hold=True):
+        """
+        Moves the playhead at once, the animation is drawn when the GUI thread is idle,
+        so fast mouse motion does not queue up frames.
+        """
+        self.__scrub_time = min(max(time_point, 0), self.__animation.loop_duration)
+        self.show_time(self.__scrub_time)
+        if not hold:
+            if self.__scrub:
+                self.__scrub(self.__scrub_time, False)
+        elif not self.__scrub_scheduled:
+            self.__scrub_scheduled = True
+            self.after_idle(self.__flush_scrub)
+
+    def __flush_scrub(self):
+        self.__scrub_scheduled = False
+        if self.__scrub and self.__scrub_time is not None:
+            self.__scrub(self.__scrub_time, True)
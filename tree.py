@@ -1,7 +1,10 @@
+import base64
+import tkinter
 import tkinter.ttk
 
 import command
 import gettext
+import preview_cache
 
 gettext.install('app', '.')
 
@@ -10,13 +13,25 @@ class ProjectHierarchyView(tkinter.ttk.Treeview):
         tkinter.ttk.Treeview.__init__(self)
         self.__command_list = command_list
         self.__items = dict()
+        # PNG image of the preview -> PhotoImage, PhotoImage has to be referenced while it is shown
+        self.__images = dict()
         self.bind("<1>", self.select_item)
         self.__default_item = None
 
+    def __preview(self, element, images):
+        """
+        :return: PhotoImage with the preview of the skeleton or the animation, see preview_cache
+        """
+        data = preview_cache.get_cache().get(element)
+        if data not in images:
+            images[data] = self.__images.get(data) or tkinter.PhotoImage(data=base64.b64encode(data), format="PNG")
+        return images[data]
+
     def on_model_changed(self, model):
         self.delete(*self.get_children())
         self.__items.clear()
         self.__default_item = model
+        images = dict()
 
         animations = self.insert("", "end", text=_("Animations"), open=True)
         skeletons = self.insert("", "end", text=_("Skeletons"), open=True)
@@ -26,6 +41,7 @@ class ProjectHierarchyView(tkinter.ttk.Treeview):
                 animations, "end",
                 iid=model.get_animation(i).name,
                 text=model.get_animation(i).name,
+                image=self.__preview(model.get_animation(i), images),
                 open=True
             )
 
@@ -51,6 +67,7 @@ class ProjectHierarchyView(tkinter.ttk.Treeview):
                 skeletons, "end",
                 iid=model.get_skeleton(i).name,
                 text=model.get_skeleton(i).name,
+                image=self.__preview(model.get_skeleton(i), images),
                 open=True
             )
 
@@ -70,6 +87,10 @@ class ProjectHierarchyView(tkinter.ttk.Treeview):
                     self.focus(bone)
                     self.selection_set(bone)
                 self.__items[bone] = model.get_skeleton(i).get_bone(j)
+        self.__images = images
+
+    def on_assets_reloaded(self, model, elements):
+        self.on_model_changed(model)
 
     def select_item(self, event):
         iid = self.identify("item", event.x, event.y)
@@ -0,0 +1,172 @@
+"""
+This is the watcher of the project files.
+It polls modification time and size of files in the skeletons and animations
+directories and reloads only changed files into the loaded project.
+"""
+
+import os
+
+from model import Skeleton, Animation
+from settings import ProjectSettings
+
+
+class ProjectWatcher:
+    """
+    Reloads skeletons and animations changed by external tools.
+    >>> import json, os, shutil, tempfile
+    >>> from model import Project
+    >>> with tempfile.TemporaryDirectory() as path:
+    ...     _ = shutil.copytree('Vasilich', path, dirs_exist_ok=True)
+    ...     project = Project()
+    ...     project.load(path)
+    ...     watcher = ProjectWatcher(project)
+    ...     skeleton_file = os.path.join(path, 'skeletons', 'Vasilich')
+    ...     with open(skeleton_file) as file:
+    ...         data = json.load(file)
+    ...     data['bones'][2]['thickness'] = 3.0
+    ...     with open(skeleton_file, 'w') as file:
+    ...         json.dump(data, file)
+    ...     [element.name for element in watcher.poll()]
+    ...     project.get_animation('Sertaki').get_state(0).get_skeleton().get_bone(2).to_dict()['thickness']
+    ...     watcher.poll()
+    ['Vasilich', 'Sertaki']
+    3.0
+    []
+    """
+    def __init__(self, project, path_to_project_dir=None):
+        """
+        :param project: loaded Project
+        :param path_to_project_dir: path to the directory of the project, path of the project is used by default
+        """
+        self.__project = project
+        self.__path = path_to_project_dir or project.path
+        self.__stats = self.snapshot()
+
+    def snapshot(self):
+        """
+        :return: dictionary (directory, file name) -> (modification time, size) for every file of the project
+        """
+        stats = dict()
+        for directory in (ProjectSettings.skeletons_dir, ProjectSettings.animations_dir):
+            try:
+                entries = list(os.scandir(os.path.join(self.__path, directory)))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    stats[(directory, entry.name)] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def reset(self):
+        """
+        Forgets all changes, for example after the project is saved by the editor.
+        """
+        self.__stats = self.snapshot()
+
+    def poll(self):
+        """
+        Reloads changed, new and removed files. Animations of reloaded skeletons are bound to them again.
+        Files which can not be read, for example because they are being written, are checked again on the next poll.
+        :return: list of reloaded skeletons and animations, views of the project are notified if it is not empty
+        """
+        stats = self.snapshot()
+        changed = {key for key in set(stats) | set(self.__stats) if stats.get(key) != self.__stats.get(key)}
+        if not changed:
+            return list()
+
+        active = self.__active_position()
+        reloaded = list()
+        for name in sorted(name for directory, name in changed if directory == ProjectSettings.skeletons_dir):
+            exists = (ProjectSettings.skeletons_dir, name) in stats
+            skeleton = self.__reload(Skeleton, name, exists)
+            if skeleton is None:
+                stats.pop((ProjectSettings.skeletons_dir, name), None)
+                continue
+            reloaded.append(skeleton)
+            for i in range(self.__project.number_of_animations if exists else 0):
+                animation = self.__project.get_animation(i)
+                if animation.skeleton_name == skeleton.name and (ProjectSettings.animations_dir, animation.name) \
+                        not in changed:
+                    animation.set_skeleton(skeleton)
+                    reloaded.append(animation)
+
+        for name in sorted(name for directory, name in changed if directory == ProjectSettings.animations_dir):
+            animation = self.__reload(Animation, name, (ProjectSettings.animations_dir, name) in stats)
+            if animation is None:
+                stats.pop((ProjectSettings.animations_dir, name), None)
+                continue
+            reloaded.append(animation)
+
+        for key in changed:
+            if key in self.__stats and key not in stats:
+                # file could not be read, it is reloaded on the next poll
+                stats[key] = self.__stats[key]
+        self.__stats = stats
+        self.__restore_active(active)
+        self.__project.notify_reloaded(reloaded)
+        return reloaded
+
+    def __reload(self, cls, name: str, exists: bool):
+        """
+        :param cls: Skeleton or Animation
+        :param name: name of the file
+        :param exists: False if the file was removed
+        :return: reloaded element, removed element or None if the file can not be read
+        """
+        project = self.__project
+        if cls is Skeleton:
+            count, get, add, remove = (
+                project.number_of_skeletons, project.get_skeleton, project.add_skeleton, project.remove_skeleton
+            )
+        else:
+            count, get, add, remove = (
+                project.number_of_animations, project.get_animation, project.add_animation, project.remove_animation
+            )
+        names = [get(i).name for i in range(count)]
+        if not exists:
+            if name not in names:
+                return None
+            element = get(name)
+            remove(names.index(name))
+            if project.active_element is element:
+                project.active_element = project
+            return element
+
+        element = get(name) or cls(name=name)
+        try:
+            skeleton_name = element.load(self.__path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if cls is Animation:
+            element.set_skeleton(project.get_skeleton(skeleton_name))
+        if name not in names:
+            add(element)
+        return element
+
+    def __active_position(self):
+        """
+        :return: (parent, index) of the active bone or state, bones and states are recreated by reloading
+        """
+        project = self.__project
+        active = project.active_element
+        if isinstance(active, (Skeleton, Animation)) or active is project:
+            return None
+        for i in range(project.number_of_skeletons):
+            skeleton = project.get_skeleton(i)
+            for j in range(skeleton.number_of_bones):
+                if skeleton.get_bone(j) is active:
+                    return skeleton, j
+        return project.find_state(active)
+
+    def __restore_active(self, position):
+        project = self.__project
+        if position is None:
+            return
+        parent, idx = position
+        if parent is not project.get_skeleton(parent.name) and parent is not project.get_animation(parent.name):
+            project.active_element = project
+        elif isinstance(parent, Skeleton):
+            project.active_element = parent.get_bone(idx) if idx < parent.number_of_bones else parent
+        else:
+            project.active_element = parent.get_state(idx) if idx < parent.number_of_states else parent